@@ -1,3 +1,4 @@
+import numpy as np
 import matplotlib as mpl
 
 # create a colormap that combines Set1, Set2 and Set3
@@ -14,3 +15,135 @@ for cmap in sets:
 # Create a new colormap from the list of colors
 combined_cmap = mpl.colors.ListedColormap(colors, name="Sets")
 Sets = combined_cmap
+
+
+def lut(cmap):
+    """
+    Lookup table of a colormap as uint8 RGBA
+
+    Parameters
+    ----------
+    cmap : str or matplotlib.colors.Colormap
+        The colormap
+
+    Returns
+    -------
+    np.ndarray
+        A [cmap.N + 3, 4] uint8 array, with the colors of the colormap followed by the under, over
+        and bad colors
+    """
+    cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    colors = np.vstack(
+        [cmap(np.arange(cmap.N)), cmap.get_under(), cmap.get_over(), cmap.get_bad()]
+    )
+    return (colors * 255).astype(np.uint8)
+
+
+def _quantize_chunk(values, norm, n):
+    normalized = norm(values)
+    data = np.ma.getdata(normalized)
+    if np.issubdtype(np.asarray(data).dtype, np.integer):
+        # norms such as BoundaryNorm and NoNorm (of integers) return indices into the colormap,
+        # which matplotlib uses as is
+        ix = np.array(data, dtype=np.intp)
+        ix[ix >= n] = n + 1
+        ix[ix < 0] = n
+        ix[np.ma.getmaskarray(normalized)] = n + 2
+        return ix
+    bad = np.ma.getmaskarray(normalized) | np.isnan(data)
+    scaled = np.array(data, dtype=float) * n
+    scaled[scaled == n] = n - 1
+    with np.errstate(invalid="ignore"):
+        ix = scaled.astype(np.intp)
+    ix[scaled < 0] = n
+    ix[scaled >= n] = n + 1
+    ix[bad] = n + 2
+    return ix
+
+
+def quantize(values, cmap="viridis", norm=None, chunk_size=2**20, out=None):
+    """
+    Map values to indices in the lookup table of a colormap (see `lut`), in chunks.
+
+    Indices are stored as uint8 if the lookup table has at most 256 entries, and as uint16
+    otherwise.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values. Can be memory-mapped.
+    cmap : str or matplotlib.colors.Colormap
+        The colormap
+    norm : matplotlib.colors.Normalize
+        Normalization of the values. Defaults to the minimum and maximum of the values.
+    chunk_size : int
+        Approximate number of values that are mapped at once
+    out : np.ndarray
+        Array to write the indices to
+
+    Returns
+    -------
+    np.ndarray
+        Indices with the same shape as `values`
+    """
+    cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    norm = _scaled_norm(norm, values)
+    values = np.asarray(values)
+    if out is None:
+        out = np.empty(values.shape, dtype=np.uint8 if cmap.N + 3 <= 256 else np.uint16)
+    flat_values = values.reshape(-1)
+    flat_out = out.reshape(-1)
+    for start in range(0, len(flat_values), chunk_size):
+        chunk = flat_values[start : start + chunk_size]
+        flat_out[start : start + chunk_size] = _quantize_chunk(chunk, norm, cmap.N)
+    return out
+
+
+def _scaled_norm(norm, values):
+    if norm is None:
+        norm = mpl.colors.Normalize()
+    if not norm.scaled():
+        norm.autoscale_None(values)
+    return norm
+
+
+def to_rgba(values, cmap="viridis", norm=None, chunk_size=2**20, out=None):
+    """
+    Map values to uint8 RGBA colors through a lookup table, in chunks.
+
+    Unlike matplotlib, which creates a float64 RGBA array (32 bytes per value) before resampling,
+    this only allocates the uint8 output (4 bytes per value) and temporary arrays for one chunk.
+    The result can be passed directly to `imshow`. Colors are the same as those of
+    `cmap(norm(values))`.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values, e.g. a 2D matrix. Can be memory-mapped.
+    cmap : str or matplotlib.colors.Colormap
+        The colormap, e.g. `polyptich.colormaps.Sets`
+    norm : matplotlib.colors.Normalize
+        Normalization of the values. Defaults to the minimum and maximum of the values.
+    chunk_size : int
+        Approximate number of values that are mapped at once
+    out : np.ndarray
+        Array to write the colors to, with shape `values.shape + (4,)` and dtype uint8
+
+    Returns
+    -------
+    np.ndarray
+        uint8 RGBA colors with shape `values.shape + (4,)`
+    """
+    cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    norm = _scaled_norm(norm, values)
+    table = lut(cmap)
+
+    values = np.asarray(values)
+    if out is None:
+        out = np.empty(values.shape + (4,), dtype=np.uint8)
+    flat_values = values.reshape(-1)
+    flat_out = out.reshape(-1, 4)
+    for start in range(0, len(flat_values), chunk_size):
+        ix = _quantize_chunk(flat_values[start : start + chunk_size], norm, cmap.N)
+        np.take(table, ix, axis=0, out=flat_out[start : start + chunk_size])
+    return out
@@ -0,0 +1,16 @@
+from .backends import get_backend, set_backend
+from .bandwidth import select_bandwidth, select_pairwise_bandwidth
+from .batched import grouped_kde_1d, marginal_kde_1d, pairwise_kde_2d
+from .binned import kde_1d_reflection_binned, kde_2d_reflection_binned, linear_binning
+from .kde import kde_1d, kde_2d
+from .points import point_density
+from .ridgeline import Ridgeline
+from .streaming import DensityAccumulator, accumulate_density
+from .plot import plot_density, plot_point_density, plot_all_pairwise_kde, plot_corner_kde
+
+
+def __getattr__(name):
+    # the jax kernels are only imported when they are used
+    if name in ["kde_1d_reflection_jax", "kde_2d_reflection_jax"]:
+        return getattr(get_backend("jax"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
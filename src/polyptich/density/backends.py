@@ -0,0 +1,37 @@
+import importlib
+
+BACKENDS = {
+    "numpy": ".numpy_backend",
+    "jax": ".jax_backend",
+}
+
+_default_backend = "numpy"
+
+
+def set_backend(name):
+    """
+    Set the default backend of the exact density kernels, "numpy" or "jax"
+    """
+    global _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name}, should be one of {list(BACKENDS)}")
+    _default_backend = name
+
+
+def get_backend(name=None):
+    """
+    Module implementing the exact density kernels of a backend, imported on first use so that
+    optional dependencies such as jax are only needed when the backend is requested
+
+    Parameters
+    ----------
+    name : str
+        "numpy" or "jax". Defaults to the backend set with `set_backend`, "numpy" by default.
+    """
+    name = _default_backend if name is None else name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name}, should be one of {list(BACKENDS)}")
+    try:
+        return importlib.import_module(BACKENDS[name], __package__)
+    except ImportError as exc:
+        raise RuntimeError(f"Install {name} to use the {name} density backend.") from exc
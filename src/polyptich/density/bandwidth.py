@@ -0,0 +1,249 @@
+import numpy as np
+
+from .binned import _marginal_counts
+
+RULES = ["scott", "silverman", "isj"]
+
+# order of the derivative at which the ISJ fixed point iteration starts
+ISJ_ORDER = 7
+
+
+def _dct(values):
+    """
+    Unnormalized type II discrete cosine transform along the last axis, using the FFT
+    """
+    n = values.shape[-1]
+    reordered = np.concatenate([values[..., ::2], values[..., 1::2][..., ::-1]], -1)
+    return 2 * np.real(np.exp(-1j * np.pi * np.arange(n) / (2 * n)) * np.fft.fft(reordered))
+
+
+def _binned_spread(counts, grid_points):
+    """
+    Standard deviation and interquartile range of each row of binned counts
+    """
+    totals = np.maximum(counts.sum(-1), 1e-300)
+    mean = counts @ grid_points / totals
+    std = np.sqrt((counts * (grid_points - mean[:, None]) ** 2).sum(-1) / totals)
+
+    cumulative = np.cumsum(counts, -1) / totals[:, None]
+    quartiles = []
+    for q in [0.25, 0.75]:
+        # linear interpolation between the grid points around the quantile
+        right = np.minimum((cumulative < q).sum(-1), len(grid_points) - 1)
+        left = np.maximum(right - 1, 0)
+        rows = np.arange(len(counts))
+        low, high = cumulative[rows, left], cumulative[rows, right]
+        fraction = np.clip((q - low) / np.where(high > low, high - low, 1), 0, 1)
+        quartiles.append(grid_points[left] + fraction * (grid_points[right] - grid_points[left]))
+    return std, quartiles[1] - quartiles[0]
+
+
+def _isj_fixed_point(t, n, squared_index, coefficients):
+    """
+    Difference between t and the bandwidth (squared, on the unit interval) implied by the density
+    functionals that are estimated with the plug-in bandwidths derived from t, for each row
+    """
+    def functional(order, time):
+        return (
+            2
+            * np.pi ** (2 * order)
+            * (
+                squared_index**order * coefficients * np.exp(-squared_index * np.pi**2 * time)
+            ).sum(-1)
+        )
+
+    f = functional(ISJ_ORDER, t[:, None])
+    for order in range(ISJ_ORDER - 1, 1, -1):
+        k0 = np.prod(np.arange(1, 2 * order, 2)) / np.sqrt(2 * np.pi)
+        constant = (1 + 0.5 ** (order + 0.5)) / 3
+        time = (2 * constant * k0 / n / f) ** (2 / (3 + 2 * order))
+        f = functional(order, time[:, None])
+    return t - (2 * n * np.sqrt(np.pi) * f) ** (-2 / 5)
+
+
+def _isj(counts, totals, boundaries):
+    """
+    Improved Sheather-Jones bandwidth of each row of binned counts (Botev et al., 2010)
+
+    The discrete cosine transform of the binned counts gives the density functionals for any
+    bandwidth in O(G). The fixed point is found by bisection, for all rows at once. Rows without
+    a fixed point get a bandwidth of NaN.
+    """
+    xmin, xmax = boundaries
+    grid_size = counts.shape[-1]
+    n = np.maximum(totals, 1)
+    transformed = _dct(counts / np.maximum(counts.sum(-1, keepdims=True), 1e-300))
+    coefficients = (transformed[:, 1:] / 2) ** 2
+    squared_index = np.arange(1, grid_size, dtype=float) ** 2
+
+    low = np.full(len(counts), 1e-12)
+    high = np.full(len(counts), 0.1)
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        found = (_isj_fixed_point(low, n, squared_index, coefficients) < 0) & (
+            _isj_fixed_point(high, n, squared_index, coefficients) > 0
+        )
+        # bisection in log space, as the fixed point can be orders of magnitude below the bounds
+        for _ in range(60):
+            middle = np.sqrt(low * high)
+            positive = _isj_fixed_point(middle, n, squared_index, coefficients) > 0
+            high = np.where(positive, middle, high)
+            low = np.where(positive, low, middle)
+    return np.where(found, np.sqrt(np.sqrt(low * high)) * (xmax - xmin), np.nan)
+
+
+def bandwidths_from_counts(counts, totals, boundaries, rule="isj"):
+    """
+    Bandwidth of each feature, from its binned counts
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        [n_features, grid_size] linearly binned counts of each feature
+    totals : np.ndarray
+        Number (or total weight) of the samples of each feature
+    boundaries : tuple
+        A tuple of (min_val, max_val) of the grid
+    rule : str
+        "scott", "silverman" or "isj". Features for which the ISJ fixed point does not exist,
+        e.g. because they have too few samples, fall back to Silverman's rule.
+
+    Returns
+    -------
+    np.ndarray
+        The bandwidth of each feature
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown bandwidth rule {rule}, should be one of {RULES}")
+    counts = np.asarray(counts, dtype=float)
+    n = np.maximum(np.asarray(totals, dtype=float), 1)
+    grid_points = np.linspace(*boundaries, counts.shape[-1])
+    std, iqr = _binned_spread(counts, grid_points)
+
+    if rule == "scott":
+        return 1.059 * std * n ** (-1 / 5)
+    silverman = 0.9 * np.minimum(std, np.where(iqr > 0, iqr / 1.349, std)) * n ** (-1 / 5)
+    if rule == "silverman":
+        return silverman
+    isj = _isj(counts, n, boundaries)
+    return np.where(np.isnan(isj), silverman, isj)
+
+
+def _scale_2d(bandwidths, totals, rule):
+    """
+    1D bandwidths without their dependence on the number of samples, and without the factor of
+    the rule in 1D, so that multiplying them by n^(-1/6) gives 2D bandwidths
+    """
+    scale = bandwidths * np.maximum(np.asarray(totals, dtype=float), 1) ** (1 / 5)
+    if rule == "scott":
+        # Scott's factor is 1 in 2D, instead of 1.059
+        scale = scale / 1.059
+    elif rule == "silverman":
+        # Silverman's factor is (4 / (d + 2)) ** (1 / (d + 4)) = 1 in 2D, instead of 0.9
+        scale = scale / 0.9
+    return scale
+
+
+def pairwise_bandwidths_from_counts(counts, totals, pair_totals, pairs, boundaries, rule="isj"):
+    """
+    Bandwidth of each pair of features, from the binned counts of each feature
+
+    The isotropic bandwidth of a pair combines the spread of both features as a geometric mean,
+    scaled with the number of samples of the pair at the optimal rate of a 2D density, n^(-1/6).
+    For the ISJ rule, the 1D plug-in bandwidths are rescaled from the 1D rate, n^(-1/5).
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        [n_features, grid_size] linearly binned counts of each feature
+    totals : np.ndarray
+        Number (or total weight) of the samples of each feature
+    pair_totals : np.ndarray
+        Number (or total weight) of the samples without missing values of each pair
+    pairs : list
+        Pairs of feature indices
+    boundaries : tuple
+        A tuple of (min_val, max_val) of the grid
+    rule : str
+        "scott", "silverman" or "isj"
+
+    Returns
+    -------
+    np.ndarray
+        The bandwidth of each pair
+    """
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    n_pairs = np.maximum(np.asarray(pair_totals, dtype=float), 1)
+    scale = _scale_2d(bandwidths_from_counts(counts, totals, boundaries, rule), totals, rule)
+    return np.sqrt(scale[pairs[:, 0]] * scale[pairs[:, 1]]) * n_pairs ** (-1 / 6)
+
+
+def select_bandwidth(Z, boundaries, rule="isj", grid_size=1024, weights=None):
+    """
+    Bandwidth of each feature, selected by a rule of thumb or a plug-in method on the binned data
+
+    All features are binned in one pass and their bandwidths are selected together, in O(N + G log
+    G) per feature.
+
+    Parameters
+    ----------
+    Z : np.ndarray
+        A [n_samples] array of a single feature, or a [n_samples, n_features] data matrix
+    boundaries : tuple
+        A tuple of (min_val, max_val) for all features
+    rule : str
+        "scott", "silverman" or "isj" (Improved Sheather-Jones, Botev et al. 2010)
+    grid_size : int
+        Number of grid points on which the data is binned
+    weights : np.ndarray
+        Weights of the samples, interpreted as counts
+
+    Returns
+    -------
+    float or np.ndarray
+        The bandwidth of the feature, or of each feature
+    """
+    Z = np.asarray(Z, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    counts, totals = _marginal_counts(Z.reshape(len(Z), -1), boundaries, grid_size, weights)
+    bandwidths = bandwidths_from_counts(counts, totals, boundaries, rule)
+    return bandwidths[0] if Z.ndim == 1 else bandwidths
+
+
+def select_pairwise_bandwidth(Z, boundaries, rule="isj", pairs=None, grid_size=1024, weights=None):
+    """
+    Bandwidth of each pair of features, see `pairwise_bandwidths_from_counts`
+
+    Parameters
+    ----------
+    Z : np.ndarray
+        A [n_samples, n_features] data matrix
+    boundaries : tuple
+        A tuple of (min_val, max_val) for all features
+    rule : str
+        "scott", "silverman" or "isj"
+    pairs : list
+        Pairs of feature indices. Defaults to all combinations.
+    grid_size : int
+        Number of grid points on which the data is binned
+    weights : np.ndarray
+        Weights of the samples, interpreted as counts
+
+    Returns
+    -------
+    np.ndarray
+        The bandwidth of each pair
+    """
+    Z = np.asarray(Z, dtype=float)
+    n_features = Z.shape[1]
+    if pairs is None:
+        pairs = [(i, j) for i in range(n_features) for j in range(i + 1, n_features)]
+    valid = (~np.isnan(Z)).astype(float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    pair_totals = valid.T @ (valid if weights is None else valid * weights[:, None])
+    counts, totals = _marginal_counts(Z, boundaries, grid_size, weights)
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    return pairwise_bandwidths_from_counts(
+        counts, totals, pair_totals[pairs[:, 0], pairs[:, 1]], pairs, boundaries, rule
+    )
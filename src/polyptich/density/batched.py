@@ -0,0 +1,267 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from . import backends
+from .bandwidth import bandwidths_from_counts, select_bandwidth, select_pairwise_bandwidth
+from .binned import _feature_positions, _grouped_counts, _marginal_counts, smooth_reflected
+from .kde import METHODS, kde_1d
+
+
+def _pair_counts(left, weight_left, weight_right, i, j, grid_size, weights=None):
+    """
+    Linear binning of the (weighted) points of a pair of features, from the positions of each
+    feature
+    """
+    index = left[i] * grid_size + left[j]
+    size = grid_size * grid_size
+    left_i, right_i = weight_left[i], weight_right[i]
+    if weights is not None:
+        left_i, right_i = left_i * weights, right_i * weights
+    # the counts of the 4 corners of each grid cell, shifted by the offset of the corner
+    counts = np.zeros(size + grid_size + 1)
+    for offset, weight_i, weight_j in [
+        (0, left_i, weight_left[j]),
+        (1, left_i, weight_right[j]),
+        (grid_size, right_i, weight_left[j]),
+        (grid_size + 1, right_i, weight_right[j]),
+    ]:
+        counts[offset : offset + size] += np.bincount(index, weight_i * weight_j, minlength=size)
+    return counts[:size].reshape(grid_size, grid_size)
+
+
+def _pairwise_counts(Z, boundaries, grid_size, pairs, weights=None):
+    """
+    Linearly binned counts of all pairs of features, and the total weight of the rows without
+    missing values of each pair
+    """
+    positions = _feature_positions(Z, boundaries, grid_size)
+    counts = np.stack([_pair_counts(*positions, i, j, grid_size, weights) for i, j in pairs])
+    valid = (~np.isnan(Z)).astype(float)
+    # total weight of the rows without missing values, for every pair at once
+    totals = valid.T @ (valid if weights is None else valid * weights[:, None])
+    return counts, np.array([totals[i, j] for i, j in pairs])
+
+
+def _smooth_pairwise(counts, totals, boundaries, bandwidth, batch_size=16):
+    """
+    Densities from the binned counts of pairs of features, smoothed in batches of pairs
+    """
+    xmin, xmax = boundaries
+    delta = (xmax - xmin) / (counts.shape[1] - 1)
+    totals = np.where(totals > 0, totals, 1)
+    bandwidths = np.broadcast_to(np.asarray(bandwidth, dtype=float), totals.shape)
+    densities = np.zeros(counts.shape)
+    for start in range(0, len(counts), batch_size):
+        batch = slice(start, start + batch_size)
+        h = bandwidths[batch]
+        smoothed = smooth_reflected(counts[batch], [h, h], [delta, delta], [1, 2])
+        densities[batch] = smoothed / (totals[batch] * (h**2) * (2 * np.pi))[:, None, None]
+    return densities
+
+
+def _smooth_marginal(counts, totals, boundaries, bandwidth):
+    """
+    Densities from the binned counts of features
+    """
+    xmin, xmax = boundaries
+    delta = (xmax - xmin) / (counts.shape[1] - 1)
+    totals = np.where(totals > 0, totals, 1)
+    bandwidths = np.broadcast_to(np.asarray(bandwidth, dtype=float), totals.shape)
+    densities = smooth_reflected(counts, [bandwidths], [delta], [1])
+    return densities / (totals * bandwidths * np.sqrt(2 * np.pi))[:, None]
+
+
+def _exact_pair(args):
+    points, weights, boundaries, bandwidth, grid_size, backend = args
+    if len(points) == 0:
+        return np.zeros((grid_size, grid_size))
+    return backends.get_backend(backend).kde_2d_reflection(
+        points, boundaries, bandwidth, grid_size, weights
+    )[0]
+
+
+def pairwise_kde_2d(
+    Z,
+    boundaries,
+    bandwidth,
+    grid_size=200,
+    pairs=None,
+    method="binned",
+    backend=None,
+    n_jobs=None,
+    batch_size=16,
+    weights=None,
+):
+    """
+    2D densities of all pairs of features, with boundary correction using reflection
+
+    With the binned method, the grid positions of every feature are computed once and reused for
+    all pairs, and pairs are smoothed together in batches of FFT convolutions. With the exact
+    method, pairs are computed in a process pool (numpy backend) or in vmapped batches (jax
+    backend). Rows with missing values are excluded per pair, and densities are normalized by
+    the total weight of the remaining rows.
+
+    Args:
+        Z (np.ndarray): The data matrix [n_samples, n_features].
+        boundaries (tuple): A tuple of (min_val, max_val) for all features.
+        bandwidth (float, np.ndarray or str): The bandwidth (h) of the Gaussian kernel, the
+            bandwidth of each pair, or a rule to select the bandwidth of each pair: 'scott',
+            'silverman' or 'isj' (see `select_pairwise_bandwidth`).
+        grid_size (int): The number of points in each dimension of the grid.
+        pairs (list, optional): Pairs of feature indices. Defaults to all combinations.
+        method (str, optional): 'binned' or 'exact'.
+        backend (str, optional): Backend of the exact KDE, 'numpy' or 'jax'.
+        n_jobs (int, optional): Number of processes for the exact numpy backend.
+        batch_size (int, optional): Number of pairs that are smoothed or evaluated at once.
+        weights (np.ndarray, optional): A [n_samples] array of non-negative weights of the rows.
+
+    Returns:
+        densities (np.ndarray): A [pairs, grid_size, grid_size] array of the densities.
+        grid_x (np.ndarray): The x-coordinates of the grid.
+        grid_y (np.ndarray): The y-coordinates of the grid.
+    """
+    Z = np.asarray(Z, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    xmin, xmax = boundaries
+    pairs = list(combinations(range(Z.shape[1]), 2)) if pairs is None else list(pairs)
+    grid_x, grid_y = np.meshgrid(
+        np.linspace(xmin, xmax, grid_size), np.linspace(xmin, xmax, grid_size), indexing="ij"
+    )
+    densities = np.zeros((len(pairs), grid_size, grid_size))
+    if len(pairs) == 0:
+        return densities, grid_x, grid_y
+    if isinstance(bandwidth, str):
+        bandwidth = select_pairwise_bandwidth(Z, boundaries, bandwidth, pairs, weights=weights)
+
+    if method == "binned":
+        counts, totals = _pairwise_counts(Z, boundaries, grid_size, pairs, weights)
+        densities = _smooth_pairwise(counts, totals, boundaries, bandwidth, batch_size)
+    elif method == "exact":
+        # the default is read at call time, so that it follows `set_backend`
+        backend = backends._default_backend if backend is None else backend
+        pair_points, pair_weights = [], []
+        for i, j in pairs:
+            points = Z[:, [i, j]]
+            complete = ~np.isnan(points).any(axis=1)
+            pair_points.append(points[complete])
+            pair_weights.append(None if weights is None else weights[complete])
+        boundaries_2d = (xmin, xmax, xmin, xmax)
+        if backend == "jax":
+            densities[:] = backends.get_backend("jax").kde_2d_reflection_batched(
+                pair_points,
+                boundaries_2d,
+                bandwidth,
+                grid_size,
+                batch_size=batch_size,
+                weight_sets=None if weights is None else pair_weights,
+            )
+        else:
+            tasks = [
+                (points, point_weights, boundaries_2d, pair_bandwidth, grid_size, backend)
+                for points, point_weights, pair_bandwidth in zip(
+                    pair_points, pair_weights, np.broadcast_to(bandwidth, len(pairs))
+                )
+            ]
+            if n_jobs is None or n_jobs == 1:
+                densities[:] = list(map(_exact_pair, tasks))
+            else:
+                with ProcessPoolExecutor(n_jobs) as executor:
+                    densities[:] = list(executor.map(_exact_pair, tasks))
+    else:
+        raise ValueError(f"Unknown method {method}, should be one of {METHODS}")
+
+    return densities, grid_x, grid_y
+
+
+def marginal_kde_1d(
+    Z, boundaries, bandwidth, grid_size=200, method="binned", backend=None, weights=None
+):
+    """
+    1D densities of all features, with boundary correction using reflection. Missing values are
+    excluded per feature, and densities are normalized by the total weight of the remaining rows.
+    The bandwidth is either a float, an array with the bandwidth of each feature, or a rule to
+    select the bandwidth of each feature: 'scott', 'silverman' or 'isj' (see `select_bandwidth`).
+
+    Returns:
+        densities (np.ndarray): A [n_features, grid_size] array of the densities.
+        grid_points (np.ndarray): The coordinates of the grid.
+    """
+    Z = np.asarray(Z, dtype=float)
+    n_samples, n_features = Z.shape
+    weights = np.ones(n_samples) if weights is None else np.asarray(weights, dtype=float)
+    xmin, xmax = boundaries
+    grid_points = np.linspace(xmin, xmax, grid_size)
+    if isinstance(bandwidth, str):
+        bandwidth = select_bandwidth(Z, boundaries, bandwidth, weights=weights)
+    bandwidths = np.broadcast_to(np.asarray(bandwidth, dtype=float), n_features)
+
+    if method == "binned":
+        counts, totals = _marginal_counts(Z, boundaries, grid_size, weights)
+        return _smooth_marginal(counts, totals, boundaries, bandwidth), grid_points
+    elif method == "exact":
+        densities = np.zeros((n_features, grid_size))
+        for i in range(n_features):
+            complete = ~np.isnan(Z[:, i])
+            if complete.any():
+                densities[i] = kde_1d(
+                    Z[complete, i],
+                    boundaries,
+                    bandwidths[i],
+                    grid_size,
+                    method=method,
+                    backend=backend,
+                    weights=weights[complete],
+                )[0]
+        return densities, grid_points
+    raise ValueError(f"Unknown method {method}, should be one of {METHODS}")
+
+
+def grouped_kde_1d(
+    values, groups, boundaries, bandwidth, grid_size=200, n_groups=None, weights=None
+):
+    """
+    1D densities of the values of each group, e.g. of one feature in each cluster, with boundary
+    correction using reflection
+
+    The values of all groups are binned in a single pass over the data, and all groups are
+    smoothed together in one batched FFT convolution, instead of one KDE per group. Missing
+    values are excluded, and densities are normalized by the total weight of the remaining values
+    of each group.
+
+    Args:
+        values (np.ndarray): A [n_samples] array of values.
+        groups (np.ndarray): A [n_samples] array with the integer code of the group of each value.
+            Values with a negative code, such as missing categories in `pd.Categorical.codes`,
+            are excluded.
+        boundaries (tuple): A tuple of (min_val, max_val) of the grid.
+        bandwidth (float, np.ndarray or str): The bandwidth (h) of the Gaussian kernel, the
+            bandwidth of each group, or a rule to select the bandwidth of each group from its
+            binned values: 'scott', 'silverman' or 'isj' (see `bandwidths_from_counts`).
+        grid_size (int): The number of grid points.
+        n_groups (int, optional): The number of groups. Defaults to the largest code + 1.
+        weights (np.ndarray, optional): A [n_samples] array of non-negative weights of the values.
+
+    Returns:
+        densities (np.ndarray): A [n_groups, grid_size] array of the densities, 0 for groups
+            without values.
+        grid_points (np.ndarray): The coordinates of the grid.
+    """
+    values = np.asarray(values, dtype=float)
+    groups = np.asarray(groups, dtype=np.intp)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+
+    counts, totals = _grouped_counts(values, groups, n_groups, boundaries, grid_size, weights)
+    if isinstance(bandwidth, str):
+        bandwidth = bandwidths_from_counts(counts, totals, boundaries, bandwidth)
+    # groups without values have no spread, any bandwidth gives a density of 0
+    bandwidth = np.where(
+        totals > 0, np.broadcast_to(np.asarray(bandwidth, dtype=float), n_groups), 1.0
+    )
+    densities = _smooth_marginal(counts, totals, boundaries, bandwidth)
+    return densities, np.linspace(*boundaries, grid_size)
@@ -0,0 +1,286 @@
+import numpy as np
+
+# the kernel is truncated at this many bandwidths
+KERNEL_CUTOFF = 5.0
+
+
+def linear_binning(points, boundaries, grid_size=200, weights=None):
+    """
+    Distribute (weighted) points over a regular grid, each point proportionally to its distance to
+    the surrounding grid points
+
+    Parameters
+    ----------
+    points : np.ndarray
+        A [N] array of 1D points, or a [N, D] array of D-dimensional points
+    boundaries : tuple
+        (xmin, xmax) for 1D points, or (xmin, xmax, ymin, ymax, ...) for D-dimensional points
+    grid_size : int
+        Number of grid points in each dimension, including both boundaries
+    weights : np.ndarray
+        Weight of each point. Defaults to 1.
+
+    Returns
+    -------
+    np.ndarray
+        [grid_size] * D array with the binned weights. Points outside of the boundaries or with
+        missing values are ignored.
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points[:, None]
+    n_dims = points.shape[1]
+    weights = np.ones(len(points)) if weights is None else np.asarray(weights, dtype=float)
+
+    left, fraction, inside = grid_positions(points, boundaries, grid_size)
+    left, fraction, weights = left[inside], fraction[inside], weights[inside]
+
+    counts = np.zeros(grid_size**n_dims)
+    strides = grid_size ** np.arange(n_dims - 1, -1, -1)
+    # each point contributes to the 2^D corners of its grid cell
+    for corner in range(2**n_dims):
+        offset = (corner >> np.arange(n_dims - 1, -1, -1)) & 1
+        corner_weights = weights * np.prod(np.where(offset, fraction, 1 - fraction), 1)
+        counts += np.bincount((left + offset) @ strides, corner_weights, minlength=len(counts))
+    return counts.reshape((grid_size,) * n_dims)
+
+
+def grid_positions(points, boundaries, grid_size=200):
+    """
+    Grid cell of each point, and its relative position within the cell
+
+    Parameters
+    ----------
+    points : np.ndarray
+        A [N, D] array of points
+    boundaries : tuple
+        (xmin, xmax, ymin, ymax, ...)
+    grid_size : int
+        Number of grid points in each dimension
+
+    Returns
+    -------
+    tuple
+        [N, D] index of the grid point to the left, [N, D] fraction of the distance to the next
+        grid point, and whether each point is within the boundaries (and not missing)
+    """
+    n_dims = points.shape[1]
+    boundaries = np.asarray(boundaries, dtype=float).reshape(n_dims, 2)
+
+    # position in units of grid steps
+    scale = (grid_size - 1) / (boundaries[:, 1] - boundaries[:, 0])
+    position = (points - boundaries[:, 0]) * scale
+    with np.errstate(invalid="ignore"):
+        inside = ((position >= 0) & (position <= grid_size - 1)).all(1)
+    position = np.where(inside[:, None], position, 0.0)
+
+    left = np.minimum(np.floor(position).astype(np.intp), grid_size - 2)
+    return left, position - left, inside
+
+
+def _feature_positions(Z, boundaries, grid_size):
+    """
+    Grid positions of every value of every feature, computed once for all pairs
+
+    Returns the [F, N] index of the grid point to the left of each value, and the [F, N] weights
+    of the grid points to the left and to the right, which are 0 for values that are outside of
+    the boundaries or missing.
+    """
+    n_samples, n_features = Z.shape
+    left, fraction, inside = grid_positions(Z.T.reshape(-1, 1), boundaries, grid_size)
+    fraction = np.where(inside, fraction[:, 0], 0.0)
+    weight_left = inside - fraction
+    return (
+        left.reshape(n_features, n_samples),
+        weight_left.reshape(n_features, n_samples),
+        fraction.reshape(n_features, n_samples),
+    )
+
+
+def _marginal_counts(Z, boundaries, grid_size, weights=None):
+    """
+    Linearly binned counts of all features, and the total weight of the non-missing values of
+    each feature
+    """
+    n_samples, n_features = Z.shape
+    weights = np.ones(n_samples) if weights is None else weights
+    left, weight_left, weight_right = _feature_positions(Z, boundaries, grid_size)
+    index = (np.arange(n_features)[:, None] * grid_size + left).ravel()
+    size = n_features * grid_size
+    counts = np.bincount(index, (weight_left * weights).ravel(), minlength=size)
+    counts[1:] += np.bincount(index, (weight_right * weights).ravel(), minlength=size)[:-1]
+    return counts.reshape(n_features, grid_size), weights @ ~np.isnan(Z)
+
+
+def _grouped_counts(values, groups, n_groups, boundaries, grid_size, weights=None):
+    """
+    Linearly binned counts of the values of each group, and the total weight of the non-missing
+    values of each group, in a single bincount over group and grid point. Values with a negative
+    group code, e.g. of a missing category, are excluded.
+    """
+    weights = np.ones(len(values)) if weights is None else weights
+    left, weight_left, weight_right = (
+        positions[0] for positions in _feature_positions(values[:, None], boundaries, grid_size)
+    )
+    included = (groups >= 0) & (groups < n_groups)
+    weights = np.where(included, weights, 0.0)
+    index = np.where(included, groups, 0) * grid_size + left
+    size = n_groups * grid_size
+    counts = np.bincount(index, weight_left * weights, minlength=size)
+    counts[1:] += np.bincount(index, weight_right * weights, minlength=size)[:-1]
+    totals = np.bincount(
+        np.where(included, groups, 0), weights * ~np.isnan(values), minlength=n_groups
+    )
+    return counts.reshape(n_groups, grid_size), totals[:n_groups]
+
+
+def _reflect(counts, axis):
+    """
+    Extend binned counts along an axis with their reflections around both boundaries, from
+    -(G - 1) to 2(G - 1)
+    """
+    counts = np.moveaxis(counts, axis, -1)
+    grid_size = counts.shape[-1]
+    extended = np.zeros(counts.shape[:-1] + (3 * grid_size - 2,))
+    extended[..., grid_size - 1 : 2 * grid_size - 1] += counts
+    # a point at index k is reflected to -k and to 2(G - 1) - k
+    extended[..., : grid_size] += counts[..., ::-1]
+    extended[..., 2 * grid_size - 2 :] += counts[..., ::-1]
+    return np.moveaxis(extended, -1, axis)
+
+
+def _gaussian_kernel(bandwidth, delta, grid_size):
+    """
+    Gaussian kernel sampled on the grid, or a [B, K] array of kernels for an array of B bandwidths
+    that share the radius of the widest kernel
+    """
+    radius = int(min(np.ceil(KERNEL_CUTOFF * np.max(bandwidth) / delta), 2 * (grid_size - 1)))
+    offsets = np.arange(-radius, radius + 1) * delta
+    return np.exp(-0.5 * (offsets / np.asarray(bandwidth)[..., None]) ** 2), radius
+
+
+def _convolve(values, kernel, axis):
+    """
+    Convolve values with a kernel along an axis using the FFT, keeping the full output. A [B, K]
+    kernel convolves each of the B entries along the first axis of the values with its own kernel.
+    """
+    n = values.shape[axis] + kernel.shape[-1] - 1
+    n_fft = 1 << int(np.ceil(np.log2(n)))
+    shape = [1] * values.ndim
+    shape[axis] = -1
+    if kernel.ndim == 2:
+        shape[0] = len(kernel)
+    transformed = np.fft.rfft(values, n_fft, axis=axis)
+    transformed *= np.fft.rfft(kernel, n_fft).reshape(shape)
+    return np.take(np.fft.irfft(transformed, n_fft, axis=axis), np.arange(n), axis=axis)
+
+
+def smooth_reflected(counts, bandwidths, deltas, axes):
+    """
+    Gaussian smoothing of binned counts along the given axes, with reflection at the boundaries
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Binned counts, possibly with leading batch dimensions
+    bandwidths : list
+        Bandwidth for each axis, either a float or an array with a bandwidth for each entry along
+        the first (batch) axis
+    deltas : list
+        Distance between grid points for each axis
+    axes : list
+        The axes of the grid
+
+    Returns
+    -------
+    np.ndarray
+        Sum of the (unnormalized) kernel over all points and their reflections, at each grid point
+    """
+    result = counts
+    for bandwidth, delta, axis in zip(bandwidths, deltas, axes):
+        grid_size = counts.shape[axis]
+        kernel, radius = _gaussian_kernel(bandwidth, delta, grid_size)
+        convolved = _convolve(_reflect(result, axis), kernel, axis)
+        # grid point j is at index (G - 1) + j of the extension, shifted by the kernel radius
+        start = grid_size - 1 + radius
+        result = np.take(convolved, np.arange(start, start + grid_size), axis=axis)
+    # the FFT leaves round-off errors around 0 far away from any point, which are not densities
+    return np.maximum(result, 0)
+
+
+def total_weight(n_points, weights=None):
+    """
+    Total weight of the points, used to normalize a density. Empty (or zero-weight) inputs are
+    normalized by 1, so that their density is 0.
+    """
+    total = n_points if weights is None else np.sum(weights)
+    return total if total > 0 else 1
+
+
+def kde_1d_reflection_binned(points, boundaries, bandwidth, grid_size=200, weights=None):
+    """
+    1D Kernel Density Estimation with boundary correction using reflection, using linear binning
+    and an FFT convolution.
+
+    Runs in O(N + G log G) time and O(G) memory. Points outside of the boundaries are ignored, but
+    are still counted for the normalization. With weights, e.g. the number of times each point
+    occurs, the density is normalized by the total weight.
+
+    Args:
+        points (np.ndarray): A [N] array of data points.
+        boundaries (tuple): A tuple of (xmin, xmax).
+        bandwidth (float): The bandwidth (h) of the Gaussian kernel.
+        grid_size (int): The number of points in the output grid.
+        weights (np.ndarray, optional): A [N] array of non-negative weights. Defaults to 1.
+
+    Returns:
+        density (np.ndarray): A [grid_size] array of the estimated density.
+        grid_points (np.ndarray): The coordinates of the grid.
+    """
+    xmin, xmax = boundaries
+    points = np.asarray(points, dtype=float)
+    counts = linear_binning(points, boundaries, grid_size, weights)
+    delta = (xmax - xmin) / (grid_size - 1)
+
+    density = smooth_reflected(counts, [bandwidth], [delta], [0])
+    density /= total_weight(len(points), weights) * bandwidth * np.sqrt(2 * np.pi)
+
+    return density, np.linspace(xmin, xmax, grid_size)
+
+
+def kde_2d_reflection_binned(points, boundaries, bandwidth, grid_size=200, weights=None):
+    """
+    2D Kernel Density Estimation with boundary correction using reflection, using linear binning
+    and an FFT convolution.
+
+    Runs in O(N + G² log G) time and O(G²) memory, instead of comparing every grid point with every
+    (reflected) point. Points outside of the boundaries are ignored, but are still counted for
+    the normalization. With weights, the density is normalized by the total weight.
+
+    Args:
+        points (np.ndarray): A [N, 2] array of data points.
+        boundaries (tuple): A tuple of (xmin, xmax, ymin, ymax).
+        bandwidth (float or tuple): The bandwidth (h) of the Gaussian kernel, or a tuple of the
+            bandwidths along x and y.
+        grid_size (int): The number of points in each dimension of the output grid.
+        weights (np.ndarray, optional): A [N] array of non-negative weights. Defaults to 1.
+
+    Returns:
+        density (np.ndarray): A [grid_size, grid_size] array of the estimated density.
+        grid_x (np.ndarray): The x-coordinates of the grid.
+        grid_y (np.ndarray): The y-coordinates of the grid.
+    """
+    xmin, xmax, ymin, ymax = boundaries
+    points = np.asarray(points, dtype=float)
+    counts = linear_binning(points, boundaries, grid_size, weights)
+    deltas = [(xmax - xmin) / (grid_size - 1), (ymax - ymin) / (grid_size - 1)]
+
+    bandwidth_x, bandwidth_y = np.broadcast_to(bandwidth, 2)
+
+    density = smooth_reflected(counts, [bandwidth_x, bandwidth_y], deltas, [0, 1])
+    density /= total_weight(len(points), weights) * bandwidth_x * bandwidth_y * (2 * np.pi)
+
+    grid_x, grid_y = np.meshgrid(
+        np.linspace(xmin, xmax, grid_size), np.linspace(ymin, ymax, grid_size), indexing="ij"
+    )
+    return density, grid_x, grid_y
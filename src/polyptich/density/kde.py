@@ -0,0 +1,40 @@
+from .backends import get_backend
+from .binned import kde_1d_reflection_binned, kde_2d_reflection_binned
+
+METHODS = ["binned", "exact"]
+
+
+def kde_1d(
+    points, boundaries, bandwidth, grid_size=200, method="binned", backend=None, weights=None
+):
+    """
+    1D Kernel Density Estimation with boundary correction using reflection, either binned and
+    convolved with an FFT ("binned", fast for any number of points), or exact ("exact") using the
+    "numpy" or "jax" backend. Optional `weights` of the points, e.g. counts of deduplicated or
+    pre-binned points, or importance weights of subsampled points, are normalized by their sum.
+    """
+    if method == "binned":
+        return kde_1d_reflection_binned(points, boundaries, bandwidth, grid_size, weights)
+    elif method == "exact":
+        return get_backend(backend).kde_1d_reflection(
+            points, boundaries, bandwidth, grid_size, weights
+        )
+    raise ValueError(f"Unknown method {method}, should be one of {METHODS}")
+
+
+def kde_2d(
+    points, boundaries, bandwidth, grid_size=200, method="binned", backend=None, weights=None
+):
+    """
+    2D Kernel Density Estimation with boundary correction using reflection, either binned and
+    convolved with an FFT ("binned", fast for any number of points), or exact ("exact") using the
+    "numpy" or "jax" backend. Optional `weights` of the points are normalized by their sum, as in
+    `kde_1d`.
+    """
+    if method == "binned":
+        return kde_2d_reflection_binned(points, boundaries, bandwidth, grid_size, weights)
+    elif method == "exact":
+        return get_backend(backend).kde_2d_reflection(
+            points, boundaries, bandwidth, grid_size, weights
+        )
+    raise ValueError(f"Unknown method {method}, should be one of {METHODS}")
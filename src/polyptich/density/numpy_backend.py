@@ -0,0 +1,86 @@
+import numpy as np
+
+from .binned import total_weight
+
+# number of (grid point, point) pairs that are evaluated at once
+CHUNK_SIZE = 2**22
+
+
+def _reflect_1d(points, low, high):
+    return np.concatenate([points, 2 * low - points, 2 * high - points])
+
+
+def kde_2d_reflection(
+    points, boundaries, bandwidth, grid_size=200, weights=None, chunk_size=CHUNK_SIZE
+):
+    """
+    Exact 2D Kernel Density Estimation with boundary correction using reflection, evaluated in
+    chunks of points so that memory is bounded by `chunk_size`.
+
+    Args:
+        points (np.ndarray): A [N, 2] array of data points.
+        boundaries (tuple): A tuple of (xmin, xmax, ymin, ymax).
+        bandwidth (float): The bandwidth (h) of the Gaussian kernel.
+        grid_size (int): The number of points in each dimension of the output grid.
+        weights (np.ndarray, optional): A [N] array of non-negative weights. Defaults to 1.
+
+    Returns:
+        density (np.ndarray): A [grid_size, grid_size] array of the estimated density.
+        grid_x (np.ndarray): The x-coordinates of the grid.
+        grid_y (np.ndarray): The y-coordinates of the grid.
+    """
+    xmin, xmax, ymin, ymax = boundaries
+    points = np.asarray(points, dtype=float)
+    weights = np.ones(len(points)) if weights is None else np.asarray(weights, dtype=float)
+    grid_x_vals = np.linspace(xmin, xmax, grid_size)
+    grid_y_vals = np.linspace(ymin, ymax, grid_size)
+
+    # the Gaussian kernel is separable, so each (reflected) point contributes an outer product of
+    # its kernel values along x and y
+    density = np.zeros((grid_size, grid_size))
+    step = max(chunk_size // (3 * grid_size), 1)
+    for start in range(0, len(points), step):
+        chunk = points[start : start + step]
+        kernel_x = np.exp(
+            -0.5 * ((grid_x_vals[:, None] - _reflect_1d(chunk[:, 0], xmin, xmax)) / bandwidth) ** 2
+        )
+        kernel_x *= np.tile(weights[start : start + step], 3)
+        kernel_y = np.exp(
+            -0.5 * ((grid_y_vals[:, None] - _reflect_1d(chunk[:, 1], ymin, ymax)) / bandwidth) ** 2
+        )
+        # all 9 combinations of reflections in x and y
+        n = len(chunk)
+        for rx in range(3):
+            for ry in range(3):
+                density += (
+                    kernel_x[:, rx * n : (rx + 1) * n] @ kernel_y[:, ry * n : (ry + 1) * n].T
+                )
+
+    density /= total_weight(len(points), weights) * (bandwidth**2) * (2 * np.pi)
+
+    grid_x, grid_y = np.meshgrid(grid_x_vals, grid_y_vals, indexing="ij")
+    return density, grid_x, grid_y
+
+
+def kde_1d_reflection(
+    points, boundaries, bandwidth, grid_size=200, weights=None, chunk_size=CHUNK_SIZE
+):
+    """
+    Exact 1D Kernel Density Estimation with boundary correction using reflection, evaluated in
+    chunks of points so that memory is bounded by `chunk_size`.
+    """
+    xmin, xmax = boundaries
+    points = np.asarray(points, dtype=float)
+    weights = np.ones(len(points)) if weights is None else np.asarray(weights, dtype=float)
+    grid_points = np.linspace(xmin, xmax, grid_size)
+
+    density = np.zeros(grid_size)
+    step = max(chunk_size // (3 * grid_size), 1)
+    for start in range(0, len(points), step):
+        reflected = _reflect_1d(points[start : start + step], xmin, xmax)
+        kernel = np.exp(-0.5 * ((grid_points[:, None] - reflected) / bandwidth) ** 2)
+        density += kernel @ np.tile(weights[start : start + step], 3)
+
+    density /= total_weight(len(points), weights) * bandwidth * np.sqrt(2 * np.pi)
+
+    return density, grid_points
@@ -0,0 +1,319 @@
+import collections.abc
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import polyptich as pp
+
+from .batched import marginal_kde_1d, pairwise_kde_2d
+from .points import point_density
+from .streaming import DensityAccumulator, accumulate_density
+
+
+def plot_density(ax, xx, yy, density, levels=20, cmap="magma"):
+    """Plot the contour density on the given axis."""
+    ax.contourf(xx, yy, density, levels=levels, cmap=cmap)
+    ax.contour(xx, yy, density, colors="k", linewidths=0.5, levels=levels, alpha=0.5)
+    ax.set_xlabel("")
+    ax.set_ylabel("")
+
+
+def plot_point_density(ax, points, density=None, cmap="magma", s=2, **kwargs):
+    """
+    Scatter of points colored by their density, with dense points drawn last, as a single
+    rasterized collection
+
+    Args:
+        ax (mpl.axes.Axes): The axis, e.g. a `pp.grid.Panel`.
+        points (np.ndarray): A [N, 2] array of points.
+        density (tuple, optional): The (density, order) of the points, as returned by
+            `point_density`. Computed with its defaults if not provided.
+        cmap (str, optional): The colormap of the density.
+        s (float, optional): The size of the markers.
+        **kwargs: Passed to `ax.scatter`.
+
+    Returns:
+        mpl.collections.PathCollection: The scatter.
+    """
+    points = np.asarray(points, dtype=float)
+    if density is None:
+        density = point_density(points)
+    values, order = density
+    kwargs = {"lw": 0, "rasterized": True, **kwargs}
+    return ax.scatter(
+        points[order, 0], points[order, 1], c=values[order], cmap=cmap, s=s, **kwargs
+    )
+
+
+def _corner_densities(
+    Z, boundaries, bandwidth, labels, diag_kind, grid_size, method, backend, n_jobs, weights
+):
+    """
+    2D densities of all pairs of features and 1D densities of each feature, either from the data
+    or from the binned counts of a `DensityAccumulator` or an iterator of chunks, and the labels
+    of the features, which default to the columns of a DataFrame or of its chunks
+    """
+    if isinstance(Z, pd.DataFrame):
+        if labels is None:
+            labels = [str(column) for column in Z.columns]
+        Z = Z.values
+    if isinstance(Z, collections.abc.Iterator):
+        Z = accumulate_density(Z, boundaries, grid_size)
+    if isinstance(Z, DensityAccumulator):
+        if method != "binned" or diag_kind != "kde":
+            raise ValueError(
+                "Chunked data only supports method='binned' and diag_kind='kde', as the samples "
+                "are not kept in memory"
+            )
+        densities, xx, yy = Z.pairwise_kde_2d(bandwidth)
+        densities_1d, xx_1d = Z.marginal_kde_1d(bandwidth)
+        labels = Z.labels if labels is None else labels
+        return Z, labels, Z.pairs, densities, xx, yy, densities_1d, xx_1d
+
+    pairs = list(combinations(range(Z.shape[1]), 2))
+    densities, xx, yy = pairwise_kde_2d(
+        Z,
+        boundaries,
+        bandwidth,
+        grid_size,
+        pairs=pairs,
+        method=method,
+        backend=backend,
+        n_jobs=n_jobs,
+        weights=weights,
+    )
+    densities_1d, xx_1d = None, None
+    if diag_kind == "kde":
+        densities_1d, xx_1d = marginal_kde_1d(
+            Z, boundaries, bandwidth, grid_size, method=method, backend=backend, weights=weights
+        )
+    return Z, labels, pairs, densities, xx, yy, densities_1d, xx_1d
+
+
+# Main logic
+def plot_all_pairwise_kde(
+    Z, boundaries, bandwidth, labels=None, diag_kind="kde", grid_size=200, method="exact", backend=None, n_jobs=None, weights=None
+):
+    """
+    Generates a corner plot of pairwise 2D KDEs with 1D distributions on the diagonal,
+    using the polyptich library structure.
+
+    Args:
+        Z (np.ndarray or pd.DataFrame): The data matrix [n_samples, n_features], or a
+            `DensityAccumulator` or an iterator of chunks of the data (see `accumulate_density`)
+            for data that does not fit in memory.
+        boundaries (tuple): A tuple of (min_val, max_val) for all features.
+        bandwidth (float or str): The KDE bandwidth, or a rule to select the bandwidth of each
+            feature and pair: 'scott', 'silverman' or 'isj'.
+        labels (list, optional): Names for the features/variables. Defaults to the columns if
+            `Z` or its chunks are DataFrames.
+        diag_kind (str, optional): 'kde' or 'hist' for the diagonal.
+        grid_size (int, optional): Resolution of the KDE grid.
+        method (str, optional): 'exact' (default) or 'binned' (FFT convolution of binned
+            points), which is much faster for large data, and required for chunked data.
+        backend (str, optional): Backend of the exact KDE, 'numpy' (default) or 'jax'.
+        n_jobs (int, optional): Number of processes for the exact KDEs of the numpy backend.
+        weights (np.ndarray, optional): Weights of the samples, e.g. counts of deduplicated
+            points. Densities are normalized by the total weight.
+    """
+
+    # 1. Pre-calculate all 2D KDEs at once, to find a common color scale
+    Z, labels, pairs, densities, xx, yy, densities_1d, xx_1d = _corner_densities(
+        Z, boundaries, bandwidth, labels, diag_kind, grid_size, method, backend, n_jobs, weights
+    )
+    kde_2d_data = {pair: (xx, yy, density) for pair, density in zip(pairs, densities)}
+
+    n_cols = Z.n_features if isinstance(Z, DensityAccumulator) else Z.shape[1]
+    if labels is None:
+        labels = [f"{i}" for i in range(n_cols)]
+
+    # Determine shared levels for a consistent color bar across all 2D plots
+    max_density = densities.max() if len(densities) else 0
+    levels = np.linspace(0, max_density, 30)
+    cmap = mpl.colormaps["magma"]
+
+    # 2. Set up the polyptich figure and grid
+    # The grid must be n_cols x n_cols to accommodate the diagonal
+    fig = pp.grid.Figure(pp.grid.Grid(padding_width=0.02, padding_height=0.02))
+
+    # 3. Loop through the grid and populate the panels
+    for i in range(n_cols):  # Row index
+        for j in range(n_cols):  # Column index
+            # We only populate the lower triangle and the diagonal
+            if j > i:
+                continue
+
+            # --- Diagonal Plots (1D Distributions) ---
+            if i == j:
+                ax = fig.main[i, j] = pp.grid.Panel((1, 1))
+                if diag_kind == "kde":
+                    density_1d = densities_1d[i]
+                    ax.fill_between(xx_1d, 0, density_1d, color=cmap(0.6), lw=0)
+                    ax.plot(xx_1d, density_1d, color="k", lw=1.2)
+                elif diag_kind == "hist":
+                    complete = ~np.isnan(Z[:, i])
+                    z_uni = Z[complete, i]
+                    w_uni = None if weights is None else np.asarray(weights)[complete]
+                    ax.hist(
+                        np.asarray(z_uni),
+                        weights=w_uni,
+                        bins=40,
+                        range=boundaries,
+                        density=True,
+                        color=cmap(0.6),
+                        histtype="stepfilled",
+                        ec="k",
+                        lw=1.2,
+                    )
+
+                ax.set_xlim(boundaries)
+                ax.set_ylim(bottom=0)
+                # Add variable label to the diagonal plot
+                ax.text(
+                    0.5,
+                    0.5,
+                    labels[i],
+                    ha="center",
+                    va="center",
+                    transform=ax.transAxes,
+                    fontsize=12,
+                    weight="bold",
+                )
+
+            # --- Off-Diagonal Plots (2D KDEs) ---
+            else:  # Here j < i
+                ax = fig.main[i, j] = pp.grid.Panel((1, 1))
+                # Retrieve the pre-calculated data
+                xx, yy, density = kde_2d_data[(j, i)]
+                plot_density(ax, xx, yy, density, levels=levels, cmap=cmap)
+                ax.set_xlim(boundaries)
+                ax.set_ylim(boundaries)
+
+            # 4. Handle Axis Labels and Ticks for a clean look
+            # By default, turn all ticks off. We'll turn them on for the outer edge.
+            ax.set_xticks([])
+            ax.set_yticks([])
+
+            # Show Y-labels and ticks ONLY on the leftmost column (j=0)
+            if j == 0 and i > 0:
+                ax.set_ylabel(labels[i])
+
+            # Show X-labels and ticks ONLY on the bottom row (i=n_cols-1)
+            if i == n_cols - 1:
+                ax.set_xlabel(labels[j])
+
+    return fig
+
+
+
+def plot_corner_kde(
+    Z, boundaries, bandwidth, labels=None, diag_kind="kde", grid_size=200, panel_size = 1, panel_size_1d = 0.3, method="exact", backend=None, n_jobs=None, weights=None
+):
+    """
+    Generates a corner plot of pairwise 2D KDEs with 1D distributions on the
+    left and bottom margins.
+
+    Args:
+        Z (np.ndarray or pd.DataFrame): The data matrix [n_samples, n_features], or a
+            `DensityAccumulator` or an iterator of chunks of the data (see `accumulate_density`)
+            for data that does not fit in memory.
+        boundaries (tuple): A tuple of (min_val, max_val) for all features.
+        bandwidth (float or str): The KDE bandwidth, or a rule to select the bandwidth of each
+            feature and pair: 'scott', 'silverman' or 'isj'.
+        labels (list, optional): Names for the features/variables. Defaults to the columns if
+            `Z` or its chunks are DataFrames.
+        diag_kind (str, optional): 'kde' or 'hist' for the marginal plots.
+        grid_size (int, optional): Resolution of the KDE grid.
+        method (str, optional): 'exact' (default) or 'binned' (FFT convolution of binned
+            points), which is much faster for large data, and required for chunked data.
+        backend (str, optional): Backend of the exact KDE, 'numpy' (default) or 'jax'.
+        n_jobs (int, optional): Number of processes for the exact KDEs of the numpy backend.
+        weights (np.ndarray, optional): Weights of the samples, e.g. counts of deduplicated
+            points. Densities are normalized by the total weight.
+    """
+
+    # 1. Pre-calculate all 2D KDEs at once
+    Z, labels, pairs, densities, xx, yy, densities_1d, xx_1d = _corner_densities(
+        Z, boundaries, bandwidth, labels, diag_kind, grid_size, method, backend, n_jobs, weights
+    )
+    kde_2d_data = {pair: (xx, yy, density) for pair, density in zip(pairs, densities)}
+
+    n_cols = Z.n_features if isinstance(Z, DensityAccumulator) else Z.shape[1]
+    if labels is None:
+        labels = [f"P{i+1}" for i in range(n_cols)]
+
+    max_density = densities.max() if len(densities) else 0
+    levels = np.linspace(0, max_density, 30)
+    cmap = mpl.colormaps["magma"]
+
+    # 2. Set up the polyptich figure with LEFT and BOTTOM margins
+    grid = pp.grid.Grid(
+        padding_width=0.02,
+        padding_height=0.02,
+    )
+    fig = pp.grid.Figure(grid)
+
+    # 3. Populate the grid panels
+    # --- Off-Diagonal Plots (2D KDEs in the lower triangle) ---
+    for i in range(n_cols):      # Row index
+        for j in range(i):       # Column index (j < i)
+            ax = fig.main[i+1, j+1] = pp.grid.Panel((panel_size, panel_size))
+            xx, yy, density = kde_2d_data[(j, i)]
+            plot_density(ax, xx, yy, density, levels=levels, cmap=cmap)
+            
+            # --- Ticks and Limits ---
+            ax.set_xlim(boundaries)
+            ax.set_ylim(boundaries)
+            ax.set_xticks([])
+            ax.set_yticks([])
+
+    # --- Populate the Bottom Margin (1D Horizontal Plots) ---
+    for j in range(n_cols-1):        
+        ax = fig.main[n_cols+1, j+1] = pp.grid.Panel((panel_size, panel_size_1d))
+        if diag_kind == "kde":
+            density_1d = densities_1d[j]
+            ax.fill_between(xx_1d, 0, density_1d, color=cmap(0.6), lw=0)
+            ax.plot(xx_1d, density_1d, color="k", lw=1.2)
+        else: # hist
+            complete = ~np.isnan(Z[:, j])
+            z_uni = Z[complete, j]
+            w_uni = None if weights is None else np.asarray(weights)[complete]
+            ax.hist(
+                np.asarray(z_uni),
+                bins=40,
+                range=boundaries,
+                density=True,
+                weights=w_uni,
+                color=cmap(0.6),
+            )
+
+        ax.set_xlim(boundaries)
+        ax.set_ylim(bottom=0)
+        ax.set_yticks([]) # Hide y-ticks
+        ax.set_xticks([]) # Hide y-ticks
+        ax.set_xlabel(labels[j]) # Add label here
+
+    # --- Populate the Left Margin (1D Vertical Plots) ---
+    for i in range(1, n_cols):
+        ax = fig.main[i+1, 0] = pp.grid.Panel((panel_size_1d, panel_size))
+        if diag_kind == "kde":
+            density_1d, yy_1d = densities_1d[i], xx_1d
+            # Swap x and y for vertical orientation!
+            ax.fill_betweenx(yy_1d, 0, density_1d, color=cmap(0.6), lw=0)
+            ax.plot(density_1d, yy_1d, color="k", lw=1.2)
+        else: # hist
+             complete = ~np.isnan(Z[:, i])
+             z_uni = Z[complete, i]
+             w_uni = None if weights is None else np.asarray(weights)[complete]
+             ax.hist(np.asarray(z_uni), bins=40, range=boundaries, density=True, weights=w_uni,
+                     color=cmap(0.6), orientation='horizontal')
+
+        ax.set_ylim(boundaries)
+        ax.set_xlim(left=0)
+        ax.set_xticks([]) # Hide x-ticks
+        ax.set_yticks([]) # Hide x-ticks
+        ax.set_ylabel(labels[i]) # Add label here
+
+
+    return fig
\ No newline at end of file
@@ -0,0 +1,129 @@
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from ..colormaps import Sets
+from ..grid import Panel
+from .batched import grouped_kde_1d
+
+
+class Ridgeline(Panel):
+    """
+    Ridgeline plot of the 1D densities of many groups, e.g. of one feature in each cluster
+
+    Each group is a row, with its density drawn as a filled ridge above the baseline of the row.
+    All ridges share the same normalization, so that their heights can be compared: the highest
+    density across all groups reaches `overlap` rows above its baseline. All ridges are drawn as
+    a single collection, with lower rows in front of the rows above.
+
+    Parameters
+    ----------
+    densities : np.ndarray
+        A [n_groups, grid_size] array of densities, e.g. from `grouped_kde_1d`
+    grid_points : np.ndarray
+        The coordinates of the grid
+    labels : list
+        Label of each group, shown on the y axis
+    width : float
+        Width of the panel, in inches
+    row_height : float
+        Height of a row, in inches
+    overlap : float
+        Height of the highest ridge, in rows
+    colors : str, list or dict
+        A color for all ridges, the color of each group, or a dict with the color of each label.
+        Defaults to the colors of `polyptich.colormaps.Sets`.
+    edgecolor : str
+        Color of the outline of the ridges
+    linewidth : float
+        Width of the outline of the ridges
+
+    Attributes
+    ----------
+    collection : matplotlib.collections.PolyCollection
+        The ridges
+    scale : float
+        Height of a density of 1, in rows
+    """
+
+    def __init__(
+        self,
+        densities,
+        grid_points,
+        labels=None,
+        width=3.0,
+        row_height=0.2,
+        overlap=1.5,
+        colors=None,
+        edgecolor="#333333",
+        linewidth=0.5,
+        **kwargs,
+    ):
+        densities = np.asarray(densities, dtype=float)
+        grid_points = np.asarray(grid_points, dtype=float)
+        n_groups = len(densities)
+        labels = list(range(n_groups)) if labels is None else list(labels)
+        if len(labels) != n_groups:
+            raise ValueError(f"Got {len(labels)} labels for {n_groups} groups")
+
+        super().__init__((width, max(n_groups - 1 + overlap, 1) * row_height), **kwargs)
+
+        # shared normalization of all groups
+        maximum = np.nanmax(densities) if densities.size else 0.0
+        self.scale = overlap / maximum if maximum > 0 else 0.0
+
+        if colors is None:
+            colors = [Sets(i % Sets.N) for i in range(n_groups)]
+        elif isinstance(colors, dict):
+            colors = [colors[label] for label in labels]
+
+        # the baseline of row i is at y = i + 1, with the y axis pointing down
+        baselines = np.arange(1, n_groups + 1)[:, None]
+        tops = baselines - np.nan_to_num(densities) * self.scale
+        verts = np.concatenate(
+            [
+                np.stack([np.broadcast_to(grid_points, tops.shape), tops], -1),
+                np.stack(
+                    [
+                        np.broadcast_to(grid_points[[-1, 0]], (n_groups, 2)),
+                        np.broadcast_to(baselines, (n_groups, 2)),
+                    ],
+                    -1,
+                ),
+            ],
+            1,
+        )
+        self.collection = mpl.collections.PolyCollection(
+            verts, facecolors=colors, edgecolors=edgecolor, linewidths=linewidth
+        )
+        self.add_collection(self.collection, autolim=False)
+
+        self.labels = labels
+        self.set_xlim(grid_points[0], grid_points[-1])
+        self.set_ylim(n_groups, min(1 - overlap, 0))
+        self.set_yticks(np.arange(1, n_groups + 1), [str(label) for label in labels])
+        self.tick_params(axis="y", length=0)
+        for spine in ["left", "right", "top"]:
+            self.spines[spine].set_visible(False)
+
+    @classmethod
+    def from_values(
+        cls, values, groups, boundaries, bandwidth, grid_size=200, weights=None, **kwargs
+    ):
+        """
+        Ridgeline plot of the values of each group, see `grouped_kde_1d`
+
+        Groups are the categories of `groups`, in order, which can be any labels or a
+        `pd.Categorical`. Values without a group are excluded.
+        """
+        groups = pd.Categorical(groups)
+        densities, grid_points = grouped_kde_1d(
+            values,
+            groups.codes,
+            boundaries,
+            bandwidth,
+            grid_size,
+            n_groups=len(groups.categories),
+            weights=weights,
+        )
+        return cls(densities, grid_points, labels=groups.categories, **kwargs)
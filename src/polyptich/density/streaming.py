@@ -0,0 +1,152 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .bandwidth import bandwidths_from_counts, pairwise_bandwidths_from_counts
+from .batched import _pairwise_counts, _smooth_marginal, _smooth_pairwise
+from .binned import _marginal_counts
+
+
+class DensityAccumulator:
+    """
+    Binned counts of all pairs of features and of each feature, accumulated over chunks of
+    samples, so that densities of data that does not fit in memory can be computed in a single
+    pass. Memory is bounded by the number of pairs and the grid size, and does not depend on the
+    number of samples.
+
+    Parameters
+    ----------
+    boundaries : tuple
+        A tuple of (min_val, max_val) for all features
+    grid_size : int
+        The number of points in each dimension of the grid
+    pairs : list
+        Pairs of feature indices. Defaults to all combinations.
+
+    Attributes
+    ----------
+    counts_2d : np.ndarray
+        [pairs, grid_size, grid_size] binned counts of each pair
+    counts_1d : np.ndarray
+        [n_features, grid_size] binned counts of each feature
+    labels : list
+        Columns of the chunks, if they are DataFrames
+    """
+
+    def __init__(self, boundaries, grid_size=200, pairs=None):
+        self.boundaries = boundaries
+        self.grid_size = grid_size
+        self.pairs = None if pairs is None else list(pairs)
+        self.n_features = None
+        self.labels = None
+
+    def update(self, chunk, weights=None):
+        """
+        Add the samples of a chunk, a [n_samples, n_features] array or DataFrame, with optional
+        weights of each sample
+        """
+        if isinstance(chunk, pd.DataFrame):
+            if self.labels is None:
+                self.labels = [str(column) for column in chunk.columns]
+            chunk = chunk.values
+        chunk = np.asarray(chunk, dtype=float)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+
+        if self.n_features is None:
+            self.n_features = chunk.shape[1]
+            if self.pairs is None:
+                self.pairs = list(combinations(range(self.n_features), 2))
+            self.counts_2d = np.zeros((len(self.pairs), self.grid_size, self.grid_size))
+            self.totals_2d = np.zeros(len(self.pairs))
+            self.counts_1d = np.zeros((self.n_features, self.grid_size))
+            self.totals_1d = np.zeros(self.n_features)
+        elif chunk.shape[1] != self.n_features:
+            raise ValueError(
+                f"Chunk has {chunk.shape[1]} features, previous chunks had {self.n_features}"
+            )
+
+        if len(self.pairs):
+            counts, totals = _pairwise_counts(
+                chunk, self.boundaries, self.grid_size, self.pairs, weights
+            )
+            self.counts_2d += counts
+            self.totals_2d += totals
+        counts, totals = _marginal_counts(chunk, self.boundaries, self.grid_size, weights)
+        self.counts_1d += counts
+        self.totals_1d += totals
+        return self
+
+    def _check(self):
+        if self.n_features is None:
+            raise ValueError("No chunks were accumulated")
+
+    def pairwise_kde_2d(self, bandwidth, batch_size=16):
+        """
+        2D densities of all pairs of features, see `pairwise_kde_2d`. A bandwidth rule is applied
+        to the accumulated counts of each feature.
+        """
+        self._check()
+        if isinstance(bandwidth, str):
+            bandwidth = pairwise_bandwidths_from_counts(
+                self.counts_1d,
+                self.totals_1d,
+                self.totals_2d,
+                self.pairs,
+                self.boundaries,
+                bandwidth,
+            )
+        xmin, xmax = self.boundaries
+        grid_x, grid_y = np.meshgrid(
+            np.linspace(xmin, xmax, self.grid_size),
+            np.linspace(xmin, xmax, self.grid_size),
+            indexing="ij",
+        )
+        densities = _smooth_pairwise(
+            self.counts_2d, self.totals_2d, self.boundaries, bandwidth, batch_size
+        )
+        return densities, grid_x, grid_y
+
+    def marginal_kde_1d(self, bandwidth):
+        """
+        1D densities of all features, see `marginal_kde_1d`
+        """
+        self._check()
+        if isinstance(bandwidth, str):
+            bandwidth = bandwidths_from_counts(
+                self.counts_1d, self.totals_1d, self.boundaries, bandwidth
+            )
+        densities = _smooth_marginal(self.counts_1d, self.totals_1d, self.boundaries, bandwidth)
+        return densities, np.linspace(*self.boundaries, self.grid_size)
+
+
+def accumulate_density(chunks, boundaries, grid_size=200, pairs=None):
+    """
+    Accumulate the binned counts of chunks of samples in a single pass
+
+    Parameters
+    ----------
+    chunks : iterable
+        [n_samples, n_features] arrays or DataFrames, e.g. read one by one from parquet or npy
+        files, or (chunk, weights) tuples
+    boundaries : tuple
+        A tuple of (min_val, max_val) for all features
+    grid_size : int
+        The number of points in each dimension of the grid
+    pairs : list
+        Pairs of feature indices. Defaults to all combinations.
+
+    Returns
+    -------
+    DensityAccumulator
+        The accumulated counts, which can be passed to `plot_corner_kde` and
+        `plot_all_pairwise_kde` with `method="binned"` instead of the data
+    """
+    accumulator = DensityAccumulator(boundaries, grid_size, pairs)
+    for chunk in chunks:
+        if isinstance(chunk, tuple):
+            accumulator.update(*chunk)
+        else:
+            accumulator.update(chunk)
+    return accumulator
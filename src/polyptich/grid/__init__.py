@@ -1,6 +1,8 @@
 from .figure import Figure
 from .panel import Panel, Title, Panel2
 from .grid import Grid, Wrap
-from .broken import Broken, BrokenGrid, Breaking
+from .broken import Broken, BrokenGrid, BrokenPanel, Breaking
+from .features import FeatureTrack
+from .scatter import AggregatedScatter
 
-__all__ = ["Figure", "Panel", "Grid", "Wrap", "Broken", "BrokenGrid", "Breaking", "Panel2", "Title"]
\ No newline at end of file
+__all__ = ["Figure", "Panel", "Grid", "Wrap", "Broken", "BrokenGrid", "BrokenPanel", "Breaking", "FeatureTrack", "AggregatedScatter", "Panel2", "Title"]
\ No newline at end of file
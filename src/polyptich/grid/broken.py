@@ -6,19 +6,40 @@ import dataclasses
 import matplotlib as mpl
 
 
+def _same_key(cached, key):
+    """
+    Whether a cache key of arrays and scalars has the same values as a previous one
+    """
+    if cached is None:
+        return False
+    return all(
+        np.array_equal(a, b) if isinstance(a, np.ndarray) or isinstance(b, np.ndarray) else a == b
+        for a, b in zip(cached, key)
+    )
+
+
 @dataclasses.dataclass
 class Breaking:
     """
     Breaking of a genome into distinct regions
 
+    The length, width and offset of each region are computed once as arrays, without modifying
+    `regions`.
+
     Parameters
     ----------
     regions : pd.DataFrame
-        DataFrame with columns "start" and "end" defining the regions
+        DataFrame with columns "start" and "end" defining the regions, and optionally a
+        "resolution" column with the resolution of each region
     gap : int   
         Gap between regions in inches
     resolution : int
         Number of base pairs per inch
+    merge_distance : int
+        If given, consecutive regions that are separated by less than this number of base pairs
+        are merged into one region
+    dpi : float
+        If given, regions that are narrower than one pixel at this resolution are dropped
     """
 
     regions: pd.DataFrame
@@ -27,11 +48,108 @@ class Breaking:
 
     resolution: int = 2500
 
+    merge_distance: int = None
+
+    dpi: float = None
+
+    def __post_init__(self):
+        if self.merge_distance is not None:
+            self.regions = merge_regions(self.regions, self.merge_distance)
+        if self.dpi is not None:
+            self.regions = self.regions.loc[self.widths * self.dpi >= 1]
+
+    def _arrays(self):
+        # cached on the values of the regions rather than their identity, so that assigning new
+        # regions or modifying them in place both invalidate it
+        starts = self.regions["start"].values
+        ends = self.regions["end"].values
+        resolutions = (
+            self.regions["resolution"].values if "resolution" in self.regions.columns else None
+        )
+        key = (starts, ends, resolutions, self.resolution, self.gap)
+        if not _same_key(getattr(self, "_cache_key", None), key):
+            lengths = ends - starts
+            if resolutions is not None:
+                resolutions = resolutions.astype(float)
+            else:
+                resolutions = np.full(len(starts), float(self.resolution))
+            widths = lengths / resolutions
+            offsets = np.pad(np.cumsum(widths)[:-1], (1, 0)) + np.arange(len(widths)) * self.gap
+            self._cache = dict(
+                starts=starts,
+                ends=ends,
+                lengths=lengths,
+                resolutions=resolutions,
+                widths=widths,
+                offsets=offsets,
+            )
+            self._cache_key = tuple(
+                value.copy() if isinstance(value, np.ndarray) else value for value in key
+            )
+        return self._cache
+
+    @property
+    def starts(self):
+        return self._arrays()["starts"]
+
+    @property
+    def ends(self):
+        return self._arrays()["ends"]
+
+    @property
+    def lengths(self):
+        """
+        Length of each region in base pairs
+        """
+        return self._arrays()["lengths"]
+
+    @property
+    def resolutions(self):
+        """
+        Resolution of each region, in base pairs per inch
+        """
+        return self._arrays()["resolutions"]
+
+    @property
+    def widths(self):
+        """
+        Width of each region in inches
+        """
+        return self._arrays()["widths"]
+
+    @property
+    def offsets(self):
+        """
+        Position of the start of each region in inches, including the gaps
+        """
+        return self._arrays()["offsets"]
+
     @property
     def width(self):
-        if "length" not in self.regions.columns:
-            self.regions["length"] = self.regions["end"] - self.regions["start"]
-        return (self.regions["length"] / self.resolution).sum() + self.gap * (len(self.regions) - 1)
+        return self.widths.sum() + self.gap * (len(self.regions) - 1)
+
+
+def merge_regions(regions, distance):
+    """
+    Merge consecutive regions that are separated by less than `distance` base pairs. Other columns
+    are taken from the first region that is merged.
+    """
+    starts = regions["start"].values
+    ends = regions["end"].values
+    if len(regions) == 0:
+        return regions
+    # compared to the furthest end so far, so that a region contained in a longer one does not
+    # break the merge. Regions that start before the previous one are never merged, and start a
+    # new run of sorted regions.
+    sorted_ = starts[1:] >= starts[:-1]
+    runs = np.concatenate([[0], np.cumsum(~sorted_)])
+    max_ends = pd.Series(ends).groupby(runs).cummax().values
+    close = sorted_ & (starts[1:] - max_ends[:-1] < distance)
+    first = np.flatnonzero(np.concatenate([[True], ~close]))
+    merged = regions.iloc[first].copy()
+    merged["start"] = np.minimum.reduceat(starts, first)
+    merged["end"] = np.maximum.reduceat(ends, first)
+    return merged
 
 
 class Broken(Grid):
@@ -42,29 +160,21 @@ class Broken(Grid):
     def __init__(self, breaking, height=0.5, margin_top=0.0, *args, **kwargs):
         super().__init__(padding_width=breaking.gap, margin_top=margin_top, *args, **kwargs)
 
-        regions = breaking.regions
-
-        regions["width"] = regions["end"] - regions["start"]
-        regions["ix"] = np.arange(len(regions))
-
-        for i, (region, region_info) in enumerate(regions.iterrows()):
-            if "resolution" in region_info.index:
-                resolution = region_info["resolution"]
-            else:
-                resolution = breaking.resolution
-            subpanel_width = region_info["width"] / resolution
+        n = len(breaking.regions)
+        for i, (start, end, width) in enumerate(
+            zip(breaking.starts, breaking.ends, breaking.widths)
+        ):
             panel, ax = self.add_right(
-                Panel((subpanel_width, height + 1e-4)),
+                Panel((width, height + 1e-4)),
             )
 
-            ax.set_xlim(region_info["start"], region_info["end"])
+            ax.set_xlim(start, end)
             ax.set_xticks([])
             ax.set_ylim(0, 1)
             if i != 0:
                 ax.set_yticks([])
-            if region_info["ix"] != 0:
                 ax.spines.left.set_visible(False)
-            if region_info["ix"] != len(regions) - 1:
+            if i != n - 1:
                 ax.spines.right.set_visible(False)
             ax.spines.top.set_visible(False)
             ax.set_facecolor("none")
@@ -82,16 +192,9 @@ class BrokenGrid(Grid):
     ):
         super().__init__(padding_width=breaking.gap, margin_top=margin_top, *args, **kwargs)
 
-        regions = breaking.regions
-
-        regions["width"] = regions["end"] - regions["start"]
-        regions["ix"] = np.arange(len(regions))
-
-        regions["panel_width"] = regions["width"] / breaking.resolution
-
-        self.panel_widths = regions["panel_width"].values
+        self.panel_widths = breaking.widths
 
-        for i, (region, region_info) in enumerate(regions.iterrows()):
+        for _ in range(len(breaking.regions)):
             _ = self.add_right(
                 Grid(padding_height=padding_height, margin_top=0.0),
             )
@@ -116,6 +219,11 @@ class TransformBroken:
         """
         Transforms from data coordinates to (broken) data coordinates
 
+        Regions are laid out one after the other in the order of `breaking.regions`, separated by
+        a gap of `breaking.gap` inches. Regions should not overlap. If the regions have a
+        "resolution" column, each region is scaled so that it has this resolution when the broken
+        coordinates are shown at `breaking.resolution`.
+
         Parameters
         ----------
         breaking : Breaking
@@ -123,62 +231,217 @@ class TransformBroken:
 
         regions = breaking.regions
 
-        regions["width"] = regions["end"] - regions["start"]
-        regions["ix"] = np.arange(len(regions))
+        self.starts = breaking.starts
+        self.ends = breaking.ends
+        self.scales = breaking.resolution / breaking.resolutions
+        self.cumstarts = breaking.offsets * breaking.resolution
+        self.cumends = self.cumstarts + breaking.lengths * self.scales
 
-        regions["cumstart"] = (np.pad(np.cumsum(regions["width"])[:-1], (1, 0))) + regions[
-            "ix"
-        ] * breaking.gap * breaking.resolution
-        regions["cumend"] = (
-            np.cumsum(regions["width"]) + regions["ix"] * breaking.gap * breaking.resolution
-        )
+        # regions sorted by start, for lookups of data coordinates
+        self._order = np.argsort(self.starts, kind="stable")
+        self._sorted_starts = self.starts[self._order]
 
-        self.regions = regions
+        self.regions = regions.assign(cumstart=self.cumstarts, cumend=self.cumends)
         self.resolution = breaking.resolution
         self.gap = breaking.gap
 
+    def region_ix(self, x):
+        """
+        Index of the region containing each position in data coordinates, or -1 if the position
+        is not in any region
+        """
+        x = np.asarray(x)
+        if len(self.starts) == 0:
+            return np.full(x.shape, -1)
+        ix = np.searchsorted(self._sorted_starts, x, side="right") - 1
+        ix = self._order[np.maximum(ix, 0)]
+        with np.errstate(invalid="ignore"):
+            inside = (x >= self.starts[ix]) & (x <= self.ends[ix])
+        return np.where(inside, ix, -1)
+
     def __call__(self, x):
         """
         Transform from data coordinates to (broken) data coordinates
 
         Parameters
         ----------
-        x : float
-            Position in data coordinates
+        x : float or np.ndarray
+            Position(s) in data coordinates
 
         Returns
         -------
-        float
-            Position in (broken) data coordinates
+        np.ndarray
+            Position(s) in (broken) data coordinates, NaN for positions outside of the regions
 
         """
 
-        assert isinstance(x, (int, float, np.ndarray, np.float64, np.int64))
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        if len(self.starts) == 0:
+            return np.full(x.shape, np.nan)
+        ix = self.region_ix(x)
+        y = self.cumstarts[ix] + (x - self.starts[ix]) * self.scales[ix]
+        y[ix < 0] = np.nan
+        return y
 
-        if isinstance(x, (int, float, np.float64, np.int64)):
-            x = np.array([x])
+    def inverse(self, y):
+        """
+        Transform from (broken) data coordinates to data coordinates
 
-        match = (x[:, None] >= self.regions["start"].values) & (
-            x[:, None] <= self.regions["end"].values
-        )
+        Parameters
+        ----------
+        y : float or np.ndarray
+            Position(s) in (broken) data coordinates
 
-        argmax = np.argmax(
-            match,
-            axis=1,
-        )
-        allzero = (match == False).all(axis=1)
+        Returns
+        -------
+        np.ndarray
+            Position(s) in data coordinates, NaN for positions in the gaps between regions
+        """
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        if len(self.starts) == 0:
+            return np.full(y.shape, np.nan)
+        ix = np.maximum(np.searchsorted(self.cumstarts, y, side="right") - 1, 0)
+        x = self.starts[ix] + (y - self.cumstarts[ix]) / self.scales[ix]
+        with np.errstate(invalid="ignore"):
+            x[~((y >= self.cumstarts[ix]) & (y <= self.cumends[ix]))] = np.nan
+        return x
+
+    def transform(self):
+        """
+        Matplotlib transform that maps x from data coordinates to (broken) data coordinates, so
+        that artists can be plotted in data coordinates, e.g.
+        `ax.plot(x, y, transform=transform_broken.transform() + ax.transData)`
+        """
+        return BrokenTransform(self)
 
-        # argmax[allzero] = np.nan
 
-        y = self.regions.iloc[argmax]["cumstart"].values + (
-            x - self.regions.iloc[argmax]["start"].values
-        )
-        y[allzero] = np.nan
+class BrokenTransform(mpl.transforms.Transform):
+    """
+    Matplotlib transform of the x coordinate from data coordinates to (broken) data coordinates
 
-        return y
+    Parameters
+    ----------
+    transform_broken : TransformBroken
+    inverse : bool
+        Whether to transform from (broken) data coordinates to data coordinates instead
+    """
 
+    input_dims = output_dims = 2
+    is_separable = True
+    has_inverse = True
 
+    def __init__(self, transform_broken, inverse=False):
+        super().__init__()
+        self.transform_broken = transform_broken
+        self.inverse = inverse
 
+    def transform_non_affine(self, values):
+        values = np.array(values, dtype=float)
+        if self.inverse:
+            values[..., 0] = self.transform_broken.inverse(values[..., 0].ravel()).reshape(
+                values[..., 0].shape
+            )
+        else:
+            values[..., 0] = self.transform_broken(values[..., 0].ravel()).reshape(
+                values[..., 0].shape
+            )
+        return values
+
+    def inverted(self):
+        return BrokenTransform(self.transform_broken, inverse=not self.inverse)
+
+
+class BrokenPanel(Panel):
+    """
+    A single panel showing distinct regions that are using the same coordinate space
+
+    Unlike `Broken`, which creates one panel per region, all regions are drawn on one axes in
+    (broken) data coordinates (see `TransformBroken`), with region boundaries and gap markers
+    drawn as collections. This keeps building and drawing fast for thousands of regions.
+
+    Data coordinates can be plotted with the `transBroken` transform, and artists can be clipped
+    to the regions with `clip`, e.g.
+    `panel.clip(panel.plot(x, y, transform=panel.transBroken)[0])`
+
+    Parameters
+    ----------
+    breaking : Breaking
+        The regions. Regions can have their own "resolution".
+    height : float
+        Height of the panel
+    gap_markers : bool
+        Whether to mark the gaps between regions with slanted lines
+    """
+
+    def __init__(self, breaking, height=0.5, gap_markers=True, **kwargs):
+        self.transform_broken = TransformBroken(breaking)
+        self.breaking = breaking
+        cumstarts, cumends = self.transform_broken.cumstarts, self.transform_broken.cumends
+        width = max(cumends[-1] / breaking.resolution, 1e-4) if len(cumends) else 1e-4
+        super().__init__((width, height), **kwargs)
+
+        self.set_xlim(0, cumends[-1] if len(cumends) else 1)
+        self.set_ylim(0, 1)
+        self.set_xticks([])
+        self.set_facecolor("none")
+        for spine in ["top", "bottom"]:
+            self.spines[spine].set_visible(False)
+
+        # x in (broken) data coordinates, y in axes coordinates
+        blended = mpl.transforms.blended_transform_factory(self.transData, self.transAxes)
+        self.transBroken = self.transform_broken.transform() + self.transData
+
+        # bottom axis line of each region
+        self.add_collection(
+            mpl.collections.LineCollection(
+                np.stack(
+                    [
+                        np.column_stack([cumstarts, np.zeros(len(cumstarts))]),
+                        np.column_stack([cumends, np.zeros(len(cumends))]),
+                    ],
+                    1,
+                ),
+                transform=blended,
+                color="k",
+                lw=mpl.rcParams["axes.linewidth"],
+                clip_on=False,
+            ),
+            autolim=False,
+        )
+
+        # clip path covering all regions
+        rectangles = [
+            mpl.path.Path.unit_rectangle().transformed(
+                mpl.transforms.Affine2D().scale(end - start, 1).translate(start, 0)
+            )
+            for start, end in zip(cumstarts, cumends)
+        ]
+        if not rectangles:
+            rectangles = [mpl.path.Path.unit_rectangle()]
+        self._clip_path = mpl.transforms.TransformedPath(
+            mpl.path.Path.make_compound_path(*rectangles), blended
+        )
+
+        if gap_markers and len(cumstarts) > 1:
+            x = np.concatenate([cumends[:-1], cumstarts[1:]])
+            self.scatter(
+                np.repeat(x, 2),
+                np.tile([0.0, 1.0], len(x)),
+                marker=[(-1, -1), (1, 1)],
+                s=16,
+                c="k",
+                linewidths=1,
+                transform=blended,
+                clip_on=False,
+                zorder=3,
+            )
+
+    def clip(self, artist):
+        """
+        Clip an artist to the regions, so that nothing is drawn in the gaps between regions
+        """
+        artist.set_clip_path(self._clip_path)
+        return artist
 
 
 class Expanding(Panel):
@@ -216,64 +479,66 @@ class Expanding(Panel):
         ax = self
         ax.axis("off")
 
-        # breaking
-        from polyptich.grid.broken import TransformBroken
         bt1 = TransformBroken(breaking1)
         bt2 = TransformBroken(breaking2)
-        for i, (region, region_info) in enumerate(bt2.regions.iterrows()):
-            y0 = 1.
-            y1 = 1
-            y2 = 0
-            end1 = bt1(region_info["end"])[0] / breaking1.regions["cumend"].max() * scale_top
-            start1 = bt1(region_info["start"])[0] / breaking1.regions["cumend"].max() * scale_top
-            end2 = bt2(region_info["end"])[0] / breaking2.regions["cumend"].max() * scale_bottom
-            start2 = bt2(region_info["start"])[0] / breaking2.regions["cumend"].max() * scale_bottom
-
-            control_point_height = 0.5
-
-            points = np.array([
-                [end1, y0], # top right
-                [end1, y1], # top right
-                [end1, control_point_height], # bottom right P1
-                [end2, control_point_height], # bottom right P2
-                [end2, y2], # bottom right
-                [start2,y2],   # bottom left
-                [start2, control_point_height], # bottom left P1
-                [start1, control_point_height], # bottom left P2
-                [start1, y1], # bottom left
-                [start1, y0], # top left
-            ])
-
-            # polygon
-            # polygon = mpl.patches.Polygon(
-            #     points,
-            #     fc="#CCCCCC",
-            #     lw=0.,
-            #     zorder=-2,
-            #     clip_on = False
-            # )
-
-            # smooth bezier path
-            Path = mpl.path.Path
-
-            path = mpl.path.Path(points, codes = [
-                Path.MOVETO,
-                Path.LINETO,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.LINETO,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CLOSEPOLY
-            ])
-            
-            polygon = mpl.patches.PathPatch(
-                path,
-                fc="#D6D6D6" if i % 2 == 0 else "#E6E6E6",
-                lw=0.,
-                zorder=-2,
-                clip_on = False
-            )
-            ax.add_patch(polygon)
\ No newline at end of file
+
+        # all regions of the second breaking at once
+        start1 = bt1(breaking2.starts) / bt1.cumends.max() * scale_top
+        end1 = bt1(breaking2.ends) / bt1.cumends.max() * scale_top
+        start2 = bt2(breaking2.starts) / bt2.cumends.max() * scale_bottom
+        end2 = bt2(breaking2.ends) / bt2.cumends.max() * scale_bottom
+
+        y0 = 1.0
+        y1 = 1.0
+        y2 = 0.0
+        control_point_height = 0.5
+
+        n = len(start1)
+        x = np.stack(
+            [
+                end1,  # top right
+                end1,  # top right
+                end1,  # bottom right P1
+                end2,  # bottom right P2
+                end2,  # bottom right
+                start2,  # bottom left
+                start2,  # bottom left P1
+                start1,  # bottom left P2
+                start1,  # bottom left
+                start1,  # top left
+            ],
+            1,
+        )
+        y = np.broadcast_to(
+            [y0, y1, control_point_height, control_point_height, y2, y2,
+             control_point_height, control_point_height, y1, y0],
+            (n, 10),
+        )
+        points = np.stack([x, y], -1)
+
+        # smooth bezier paths
+        Path = mpl.path.Path
+        codes = [
+            Path.MOVETO,
+            Path.LINETO,
+            Path.CURVE4,
+            Path.CURVE4,
+            Path.CURVE4,
+            Path.LINETO,
+            Path.CURVE4,
+            Path.CURVE4,
+            Path.CURVE4,
+            Path.CLOSEPOLY,
+        ]
+        collection = mpl.collections.PathCollection(
+            [Path(region_points, codes) for region_points in points],
+            facecolors=np.where(np.arange(n) % 2 == 0, "#D6D6D6", "#E6E6E6"),
+            lw=0.0,
+            zorder=-2,
+            clip_on=False,
+            transform=ax.transData,
+        )
+        ax.add_collection(collection, autolim=False)
+        # x is relative to the width of the panel, so that connectors line up with both breakings
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
@@ -0,0 +1,207 @@
+import heapq
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from .broken import Breaking, TransformBroken
+from .panel import Panel
+
+
+class FeatureIndex:
+    """
+    Interval index of features, e.g. genes, peaks or motifs, for overlap queries
+
+    Features are grouped into classes of lengths that are within a factor of 2 of each other, and
+    sorted by start within each class. The features of a class that overlap a region start at
+    most the maximal length of the class before the region, so they are found by binary search
+    among a contiguous range of candidates. Candidates that end before the region all contain the
+    point half the class length before the region, so a few long features do not make every
+    region scan all features that start after them.
+
+    Parameters
+    ----------
+    starts : np.ndarray
+        Start of each feature
+    ends : np.ndarray
+        End of each feature
+    """
+
+    def __init__(self, starts, ends):
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        lengths = np.maximum(ends - starts, 0)
+        length_classes = np.ceil(np.log2(np.maximum(lengths, 1))).astype(int)
+
+        # (maximal length, order, starts, ends) of the features of each length class
+        self.classes = []
+        for length_class in np.unique(length_classes):
+            ix = np.flatnonzero(length_classes == length_class)
+            order = ix[np.argsort(starts[ix], kind="stable")]
+            self.classes.append((lengths[ix].max(), order, starts[order], ends[order]))
+        self.starts = starts
+        self.ends = ends
+
+    def _candidates(self, starts, ends):
+        """
+        Index of the region and index of the feature of each candidate pair, which start before
+        the end of the region and at most the maximal length of their class before its start
+        """
+        region_ix, feature_ix = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+        for max_length, order, class_starts, _ in self.classes:
+            lo = np.searchsorted(class_starts, starts - max_length, side="left")
+            hi = np.searchsorted(class_starts, ends, side="right")
+            counts = np.maximum(hi - lo, 0)
+
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            region_ix.append(np.repeat(np.arange(len(starts)), counts))
+            feature_ix.append(order[np.repeat(lo, counts) + offsets])
+        return np.concatenate(region_ix), np.concatenate(feature_ix)
+
+    def overlaps(self, starts, ends):
+        """
+        All overlapping pairs of regions and features, for all regions in one pass
+
+        Parameters
+        ----------
+        starts : np.ndarray
+            Start of each region
+        ends : np.ndarray
+            End of each region
+
+        Returns
+        -------
+        tuple
+            Index of the region and index of the feature (in the original order) of each pair,
+            sorted by region and then feature start
+        """
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        region_ix, feature_ix = self._candidates(starts, ends)
+
+        overlapping = self.ends[feature_ix] >= starts[region_ix]
+        region_ix, feature_ix = region_ix[overlapping], feature_ix[overlapping]
+        order = np.lexsort((feature_ix, self.starts[feature_ix], region_ix))
+        return region_ix[order], feature_ix[order]
+
+
+def pack_rows(starts, ends, spacing=0.0):
+    """
+    Assign intervals to rows so that intervals in the same row do not overlap, using as few rows
+    as possible
+
+    Intervals are placed greedily in order of their start, in the row that has been free for the
+    longest time, in O(n log n).
+
+    Parameters
+    ----------
+    starts : np.ndarray
+        Start of each interval
+    ends : np.ndarray
+        End of each interval
+    spacing : float
+        Minimal distance between intervals in the same row
+
+    Returns
+    -------
+    np.ndarray
+        Row of each interval
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    rows = np.zeros(len(starts), dtype=int)
+    # heap of (end of the last interval, row)
+    free = []
+    n_rows = 0
+    for i in np.argsort(starts, kind="stable"):
+        if free and free[0][0] + spacing <= starts[i]:
+            _, row = heapq.heappop(free)
+        else:
+            row = n_rows
+            n_rows += 1
+        rows[i] = row
+        heapq.heappush(free, (ends[i], row))
+    return rows
+
+
+class FeatureTrack(Panel):
+    """
+    Track of features, e.g. genes, peaks or motifs, within the regions of a breaking
+
+    Features are looked up for all regions at once using a `FeatureIndex`, clipped to the regions,
+    packed into rows so that they do not overlap, and drawn as a single collection in (broken)
+    data coordinates (see `TransformBroken`). The track lines up with a `BrokenPanel` of the same
+    breaking.
+
+    Parameters
+    ----------
+    breaking : Breaking
+        The regions
+    features : pd.DataFrame
+        DataFrame with columns "start" and "end", and optionally "color"
+    row_height : float
+        Height of a row of features, in inches
+    color : str
+        Color of features without a "color"
+    spacing : float
+        Minimal distance between features in the same row, in inches
+
+    Attributes
+    ----------
+    pieces : pd.DataFrame
+        The part of each feature in each region, with its region, feature and row
+    """
+
+    def __init__(
+        self,
+        breaking: Breaking,
+        features: pd.DataFrame,
+        row_height=0.1,
+        color="#333333",
+        spacing=0.02,
+        **kwargs,
+    ):
+        transform_broken = TransformBroken(breaking)
+        index = FeatureIndex(features["start"].values, features["end"].values)
+        region_ix, feature_ix = index.overlaps(breaking.starts, breaking.ends)
+
+        # the part of each feature within each region, in broken coordinates
+        starts = np.maximum(features["start"].values[feature_ix], breaking.starts[region_ix])
+        ends = np.minimum(features["end"].values[feature_ix], breaking.ends[region_ix])
+        scales = transform_broken.scales[region_ix]
+        x0 = transform_broken.cumstarts[region_ix] + (starts - breaking.starts[region_ix]) * scales
+        x1 = transform_broken.cumstarts[region_ix] + (ends - breaking.starts[region_ix]) * scales
+        rows = pack_rows(x0, x1, spacing * breaking.resolution)
+        n_rows = max(rows.max() + 1 if len(rows) else 0, 1)
+
+        self.transform_broken = transform_broken
+        self.pieces = pd.DataFrame(
+            {"region_ix": region_ix, "feature_ix": feature_ix, "row": rows, "x0": x0, "x1": x1}
+        )
+
+        cumends = transform_broken.cumends
+        width = max(cumends[-1] / breaking.resolution, 1e-4) if len(cumends) else 1e-4
+        super().__init__((width, n_rows * row_height), **kwargs)
+
+        # rectangles spanning 80% of their row
+        top, bottom = rows + 0.1, rows + 0.9
+        verts = np.stack(
+            [
+                np.column_stack([x0, top]),
+                np.column_stack([x1, top]),
+                np.column_stack([x1, bottom]),
+                np.column_stack([x0, bottom]),
+            ],
+            1,
+        )
+        if "color" in features.columns:
+            colors = features["color"].values[feature_ix]
+        else:
+            colors = color
+        self.add_collection(
+            mpl.collections.PolyCollection(verts, facecolors=colors, edgecolors="none"),
+            autolim=False,
+        )
+        self.set_xlim(0, cumends[-1] if len(cumends) else 1)
+        self.set_ylim(n_rows, 0)
+        self.axis("off")
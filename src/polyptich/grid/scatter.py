@@ -0,0 +1,325 @@
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from ..colormaps import Sets, to_rgba
+from .panel import Panel
+
+AGGREGATIONS = ["count", "mean", "mode"]
+SHADINGS = ["linear", "log", "eq_hist"]
+
+# fraction of the range of the points by which the default limits extend beyond the points
+PADDING = 0.02
+
+
+def aggregate_pixels(x, y, xlim, ylim, shape, values=None, aggregation="count", n_categories=None):
+    """
+    Aggregate points to the pixels of an image, in a single `np.bincount` per aggregate
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x coordinate of each point
+    y : np.ndarray
+        y coordinate of each point
+    xlim : tuple
+        x coordinates of the left and right edges of the image
+    ylim : tuple
+        y coordinates of the bottom and top edges of the image
+    shape : tuple
+        (height, width) of the image, in pixels
+    values : np.ndarray
+        Value of each point, for the "mean" aggregation, or category code of each point, for the
+        "mode" aggregation
+    aggregation : str
+        "count", "mean" or "mode"
+    n_categories : int
+        Number of categories, for the "mode" aggregation
+
+    Returns
+    -------
+    np.ndarray
+        A [height, width] array of counts for "count", a [height, width, 2] array of the sum of
+        the values and the number of values for "mean", or a [height, width, n_categories] array
+        of the counts of each category for "mode". Row 0 is at the bottom of the image.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {aggregation}, should be one of {AGGREGATIONS}")
+    height, width = shape
+    with np.errstate(invalid="ignore"):
+        col = np.floor((x - xlim[0]) / (xlim[1] - xlim[0]) * width)
+        row = np.floor((y - ylim[0]) / (ylim[1] - ylim[0]) * height)
+        # missing coordinates are never inside
+        inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+    pixel = row[inside].astype(np.intp) * width + col[inside].astype(np.intp)
+    n_pixels = height * width
+
+    if aggregation == "count":
+        return np.bincount(pixel, minlength=n_pixels).reshape(height, width).astype(float)
+    values = np.asarray(values)[inside]
+    if aggregation == "mean":
+        present = ~np.isnan(values)
+        sums = np.bincount(pixel[present], values[present], minlength=n_pixels)
+        counts = np.bincount(pixel[present], minlength=n_pixels)
+        return np.stack([sums, counts], -1).reshape(height, width, 2).astype(float)
+    # points without a category have a negative code
+    present = values >= 0
+    counts = np.bincount(
+        pixel[present] * n_categories + values[present], minlength=n_pixels * n_categories
+    )
+    return counts.reshape(height, width, n_categories).astype(float)
+
+
+def _box_sum(aggregate, radius):
+    """
+    Sum over the (2 * radius + 1)² pixels around each pixel, using cumulative sums
+    """
+    if radius == 0:
+        return aggregate
+    size = 2 * radius + 1
+    padding = [(radius + 1, radius), (radius + 1, radius)] + [(0, 0)] * (aggregate.ndim - 2)
+    cumulative = np.pad(aggregate, padding).cumsum(0).cumsum(1)
+    return (
+        cumulative[size:, size:]
+        - cumulative[:-size, size:]
+        - cumulative[size:, :-size]
+        + cumulative[:-size, :-size]
+    )
+
+
+def spread_radius(occupied, max_spread=3, threshold=0.5):
+    """
+    Radius by which to spread the pixels of an image, so that isolated points remain visible
+    without merging dense regions
+
+    Following the dynamic spreading of datashader, the radius is increased as long as at most a
+    fraction `threshold` of the occupied pixels would touch another occupied pixel once spread.
+
+    Parameters
+    ----------
+    occupied : np.ndarray
+        A [height, width] boolean array of the pixels that contain points
+    max_spread : int
+        Maximal radius, in pixels
+    threshold : float
+        Maximal fraction of occupied pixels that touch another one after spreading
+
+    Returns
+    -------
+    int
+        The radius, in pixels
+    """
+    occupied = np.asarray(occupied, dtype=float)
+    n_occupied = occupied.sum()
+    radius = 0
+    for candidate in range(1, max_spread + 1):
+        if n_occupied == 0:
+            break
+        # spreading two pixels by r makes them touch if they are within 2r of each other
+        neighbours = _box_sum(occupied, 2 * candidate) - occupied
+        if (neighbours[occupied > 0] > 0).mean() > threshold:
+            break
+        radius = candidate
+    return radius
+
+
+def _equalize(counts, occupied):
+    """
+    Rank of each count among the counts of the occupied pixels, between 0 and 1
+    """
+    unique, inverse = np.unique(counts[occupied], return_inverse=True)
+    equalized = np.full(counts.shape, np.nan)
+    equalized[occupied] = inverse / max(len(unique) - 1, 1)
+    return equalized
+
+
+class _AggregatedImage(mpl.image.AxesImage):
+    """
+    Image that is re-aggregated whenever it is drawn at a different resolution or with different
+    axis limits
+    """
+
+    def __init__(self, ax, render, **kwargs):
+        super().__init__(ax, interpolation="nearest", origin="lower", **kwargs)
+        self._render = render
+        self._key = None
+        self.set_data(np.zeros((1, 1, 4), dtype=np.uint8))
+
+    def draw(self, renderer, *args, **kwargs):
+        # one pixel of the image per pixel of the output, also for vector output in which images
+        # are embedded at the dpi of savefig
+        magnification = renderer.get_image_magnification()
+        shape = (
+            max(round(self.axes.bbox.height * magnification), 1),
+            max(round(self.axes.bbox.width * magnification), 1),
+        )
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
+        key = (shape, xlim, ylim)
+        if key != self._key:
+            self.set_data(self._render(shape, xlim, ylim))
+            self.set_extent((*xlim, *ylim))
+            self._key = key
+        super().draw(renderer, *args, **kwargs)
+
+
+class AggregatedScatter(Panel):
+    """
+    Scatter plot of millions of points, aggregated to the pixels of the output and drawn as a
+    single image
+
+    Points are binned to a pixel grid with the size of the panel (`dim`) at the resolution of the
+    output, using `np.bincount`, in O(N) per drawing instead of one marker per point. The image is
+    re-aggregated when the figure is drawn or saved at a different dpi, or with different limits.
+    Sparse images are spread dynamically (see `spread_radius`) so that isolated points remain
+    visible.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x coordinate of each point
+    y : np.ndarray
+        y coordinate of each point
+    values : np.ndarray
+        Value of each point for the "mean" aggregation, or category of each point for the "mode"
+        aggregation
+    dim : tuple
+        The dimensions of the panel in inches
+    aggregation : str
+        "count": number of points in each pixel, "mean": mean of the values in each pixel, or
+        "mode": most frequent category in each pixel
+    cmap : str or matplotlib.colors.Colormap
+        Colormap of the counts or means
+    norm : matplotlib.colors.Normalize
+        Normalization of the means. Defaults to the minimum and maximum of the values, so that
+        colors do not depend on the resolution.
+    shading : str
+        Mapping of the counts to colors: "linear", "log" or "eq_hist" (histogram equalization)
+    colors : dict or list
+        Color of each category for the "mode" aggregation. Defaults to the colors of
+        `polyptich.colormaps.Sets`.
+    max_spread : int
+        Maximal radius by which pixels are spread, in pixels. 0 disables spreading.
+    spread_threshold : float
+        Maximal fraction of occupied pixels that touch another one after spreading
+
+    Attributes
+    ----------
+    image : matplotlib.image.AxesImage
+        The image of the aggregated points
+    categories : pd.Index
+        The categories, for the "mode" aggregation
+    """
+
+    def __init__(
+        self,
+        x,
+        y,
+        values=None,
+        dim=(2, 2),
+        aggregation="count",
+        cmap="magma",
+        norm=None,
+        shading="log",
+        colors=None,
+        max_spread=3,
+        spread_threshold=0.5,
+        **kwargs,
+    ):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {aggregation}, should be one of {AGGREGATIONS}")
+        if shading not in SHADINGS:
+            raise ValueError(f"Unknown shading {shading}, should be one of {SHADINGS}")
+        if aggregation != "count" and values is None:
+            raise ValueError(f"The {aggregation} aggregation requires values")
+        super().__init__(dim, **kwargs)
+
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.aggregation = aggregation
+        self.cmap = cmap
+        self.shading = shading
+        self.max_spread = max_spread
+        self.spread_threshold = spread_threshold
+        self.categories = None
+
+        if aggregation == "mean":
+            self.values = np.asarray(values, dtype=float)
+            if norm is None:
+                present = self.values[~np.isnan(self.values)]
+                norm = mpl.colors.Normalize(*(
+                    (present.min(), present.max()) if len(present) else (0, 1)
+                ))
+        elif aggregation == "mode":
+            values = pd.Categorical(values)
+            self.values = values.codes.astype(np.intp)
+            self.categories = values.categories
+            if colors is None:
+                colors = [Sets(i % Sets.N) for i in range(len(self.categories))]
+            elif isinstance(colors, dict):
+                colors = [colors[category] for category in self.categories]
+            self.colors = (mpl.colors.to_rgba_array(colors) * 255).astype(np.uint8)
+        self.norm = norm
+
+        self.image = _AggregatedImage(self, self._render)
+        self.add_image(self.image)
+
+        complete = ~(np.isnan(self.x) | np.isnan(self.y))
+        for points, set_lim in [(self.x, self.set_xlim), (self.y, self.set_ylim)]:
+            if complete.any():
+                low, high = points[complete].min(), points[complete].max()
+            else:
+                low, high = 0.0, 1.0
+            padding = (high - low if high > low else 1.0) * PADDING
+            set_lim(low - padding, high + padding)
+
+    def aggregate(self, shape, xlim=None, ylim=None):
+        """
+        Aggregate the points to an image with the given (height, width) in pixels, spread
+        dynamically, see `aggregate_pixels`
+        """
+        xlim = self.get_xlim() if xlim is None else xlim
+        ylim = self.get_ylim() if ylim is None else ylim
+        aggregate = aggregate_pixels(
+            self.x,
+            self.y,
+            xlim,
+            ylim,
+            shape,
+            None if self.aggregation == "count" else self.values,
+            self.aggregation,
+            None if self.categories is None else len(self.categories),
+        )
+        if self.aggregation == "count":
+            occupied = aggregate > 0
+        elif self.aggregation == "mean":
+            occupied = aggregate[..., 1] > 0
+        else:
+            occupied = aggregate.sum(-1) > 0
+        radius = spread_radius(occupied, self.max_spread, self.spread_threshold)
+        return _box_sum(aggregate, radius)
+
+    def _render(self, shape, xlim, ylim):
+        aggregate = self.aggregate(shape, xlim, ylim)
+
+        if self.aggregation == "count":
+            occupied = aggregate > 0
+            if self.shading == "eq_hist":
+                values, norm = _equalize(aggregate, occupied), mpl.colors.Normalize(0, 1)
+            elif self.shading == "log":
+                values = np.where(occupied, aggregate, np.nan)
+                norm = mpl.colors.LogNorm(1, max(aggregate.max(), 1 + 1e-12))
+            else:
+                values = np.where(occupied, aggregate, np.nan)
+                norm = mpl.colors.Normalize(0, max(aggregate.max(), 1))
+            rgba = to_rgba(values, self.cmap, norm)
+        elif self.aggregation == "mean":
+            occupied = aggregate[..., 1] > 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = aggregate[..., 0] / aggregate[..., 1]
+            rgba = to_rgba(np.where(occupied, means, np.nan), self.cmap, self.norm)
+        else:
+            occupied = aggregate.sum(-1) > 0
+            rgba = self.colors[aggregate.argmax(-1)]
+
+        rgba[~occupied] = 0
+        return rgba
@@ -2,6 +2,14 @@ from .heatmap import Heatmap, TopPanels
 from .layouts import Simple
 from .heading import Heading
 from . import layouts
+from . import norm
+from .aggregate import aggregate
+from .norm import quantile_norm, QuantileSketch
 from . import ticks
 from . import heading
+from . import annotation
+from . import dendrogram
+from . import labels
+from . import categorical
+from .dendrogram import Dendrogram
 from .ticks import Ticks
\ No newline at end of file
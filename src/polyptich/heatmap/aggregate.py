@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+STATISTICS = ["mean", "sum", "count", "fraction", "var"]
+
+
+def _require_scipy_sparse():
+    try:
+        import scipy.sparse
+    except ImportError as exc:
+        raise RuntimeError("Install scipy to aggregate heatmaps.") from exc
+    return scipy.sparse
+
+
+def aggregate(data, split: pd.Series, statistics="mean", chunk_size=2**22):
+    """
+    Aggregate the rows of `data` per group, e.g. to get a "pseudobulk" mean expression per celltype.
+
+    All statistics are computed in a single pass over the data, in chunks of rows, by multiplying
+    a sparse group indicator matrix with the data.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The data, with one row per element. Can have sparse columns.
+    split : pd.Series
+        Categorical defining the group of each row, with the same index as `data`. Rows with a
+        missing group are ignored.
+    statistics : str or list
+        Statistic(s) to compute. Can be "mean", "sum", "count" (number of nonzero values),
+        "fraction" (fraction of nonzero values) or "var" (population variance)
+    chunk_size : int
+        Approximate number of values that are processed at once
+
+    Returns
+    -------
+    pd.DataFrame or dict
+        A [groups, columns] DataFrame for each statistic, with the observed groups as index in the
+        order of the categories. If `statistics` is a list, a dictionary of DataFrames.
+    """
+    sparse = _require_scipy_sparse()
+
+    if not isinstance(split.dtype, pd.CategoricalDtype):
+        raise ValueError("split must be categorical")
+    assert data.index.equals(split.index), f"{data.index} != {split.index}"
+    single = isinstance(statistics, str)
+    statistics = [statistics] if single else list(statistics)
+    for statistic in statistics:
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown statistic {statistic}, should be one of {STATISTICS}")
+
+    if hasattr(data, "sparse") and all(isinstance(dtype, pd.SparseDtype) for dtype in data.dtypes):
+        values = data.sparse.to_coo().tocsr()
+    else:
+        values = data.values
+
+    codes = split.cat.codes.values
+    group_sizes = np.bincount(codes[codes >= 0], minlength=len(split.cat.categories))
+    observed = np.flatnonzero(group_sizes)
+    remap = np.full(len(split.cat.categories) + 1, -1)
+    remap[observed] = np.arange(len(observed))
+    codes = remap[codes]
+    n_groups, n_cols = len(observed), data.shape[1]
+
+    need_nonzero = "count" in statistics or "fraction" in statistics
+    need_squares = "var" in statistics
+    sums = np.zeros((n_groups, n_cols))
+    nonzero = np.zeros((n_groups, n_cols)) if need_nonzero else None
+    squares = np.zeros((n_groups, n_cols)) if need_squares else None
+
+    step = max(chunk_size // max(n_cols, 1), 1)
+    for start in range(0, data.shape[0], step):
+        chunk_codes = codes[start : start + step]
+        chunk = values[start : start + step]
+        keep = np.flatnonzero(chunk_codes >= 0)
+        indicator = sparse.csr_matrix(
+            (np.ones(len(keep)), (chunk_codes[keep], keep)), shape=(n_groups, len(chunk_codes))
+        )
+        if sparse.issparse(chunk):
+            sums += (indicator @ chunk).toarray()
+            if need_nonzero:
+                nonzero += (indicator @ (chunk != 0).astype(float)).toarray()
+            if need_squares:
+                squares += (indicator @ chunk.multiply(chunk)).toarray()
+        else:
+            chunk = np.asarray(chunk, dtype=float)
+            sums += indicator @ chunk
+            if need_nonzero:
+                nonzero += indicator @ (chunk != 0).astype(float)
+            if need_squares:
+                squares += indicator @ np.square(chunk)
+
+    n = group_sizes[observed][:, None].astype(float)
+    results = {}
+    for statistic in statistics:
+        if statistic == "mean":
+            result = sums / n
+        elif statistic == "sum":
+            result = sums
+        elif statistic == "count":
+            result = nonzero
+        elif statistic == "fraction":
+            result = nonzero / n
+        elif statistic == "var":
+            result = np.maximum(squares / n - (sums / n) ** 2, 0.0)
+        results[statistic] = pd.DataFrame(
+            result,
+            index=pd.Index(split.cat.categories[observed], name=split.name),
+            columns=data.columns,
+        )
+    return results[statistics[0]] if single else results
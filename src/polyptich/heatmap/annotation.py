@@ -3,6 +3,8 @@ import matplotlib as mpl
 import numpy as np
 import pandas as pd
 
+from .heading import group_bars_panel
+
 
 class Annotation(pp.Grid):
     """
@@ -22,6 +24,9 @@ class Annotation(pp.Grid):
         Margin to use between the heatmap and the heading
     orientation : str
         Where to place the heading. Can be "top", "right", "bottom" or "left"
+    single_axes : bool
+        Whether to draw all groups on a single axes, as one collection of patches. Labels that do
+        not fit in their group are not shown. Useful for layouts with many groups.
     """
 
     def __init__(
@@ -31,6 +36,7 @@ class Annotation(pp.Grid):
         layout=None,
         margin=None,
         orientation="top",
+        single_axes=False,
     ):
         if layout is None:
             layout = pp.heatmap.layouts.Simple()
@@ -58,7 +64,10 @@ class Annotation(pp.Grid):
                 padding_width=0.0,
                 padding_height=layout.padding,
             )
-        print(layout)
+        if single_axes:
+            group_bars_panel(self, data, layout, info, orientation)
+            return
+
         for i, name, df, width in layout.iter(data):
             if name is None:
                 continue
@@ -116,26 +125,26 @@ class Annotation(pp.Grid):
 class AnnotationTop(Annotation):
     __doc__ = Annotation.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="top")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="top")
 
 
 class AnnotationRight(Annotation):
     __doc__ = Annotation.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="right")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="right")
 
 
 class AnnotationBottom(Annotation):
     __doc__ = Annotation.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="bottom")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="bottom")
 
 
 class AnnotationLeft(Annotation):
     __doc__ = Annotation.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="left")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="left")
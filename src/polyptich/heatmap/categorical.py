@@ -0,0 +1,131 @@
+import polyptich as pp
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from ..colormaps import Sets, lut
+
+
+def code_dtype(n_categories):
+    """
+    Smallest signed integer dtype that can hold the codes of `n_categories` categories and -1
+    """
+    for dtype in [np.int8, np.int16, np.int32]:
+        if n_categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encode(data, categories=None):
+    """
+    Encode a categorical matrix as small integer codes, column by column
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Matrix of categories, e.g. cluster assignments or genotype calls. Columns can be categorical
+        or contain any hashable values.
+    categories : list
+        The categories, in order. Defaults to the categories of the first categorical column if
+        all columns share them, and to the sorted unique values otherwise.
+
+    Returns
+    -------
+    tuple
+        The [rows, columns] codes (int8 for up to 127 categories, int16 for up to 32767), with
+        missing or unknown values as -1, and the categories as a pd.Index
+    """
+    dtypes = list(data.dtypes)
+    if categories is None:
+        if dtypes and all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and all(
+            dtype.categories.equals(dtypes[0].categories) for dtype in dtypes
+        ):
+            categories = dtypes[0].categories
+        else:
+            values = pd.unique(
+                np.concatenate([pd.unique(data[column].dropna()) for column in data.columns])
+            )
+            categories = np.sort(values) if len(values) else values
+    categories = pd.Index(categories)
+
+    codes = np.empty(data.shape, dtype=code_dtype(len(categories)))
+    for j in range(data.shape[1]):
+        column = data.iloc[:, j]
+        if isinstance(column.dtype, pd.CategoricalDtype) and column.cat.categories.equals(
+            categories
+        ):
+            codes[:, j] = column.cat.codes.values
+        else:
+            codes[:, j] = categories.get_indexer(column.values)
+    return codes, categories
+
+
+def category_colors(categories, colors=None):
+    """
+    Color of each category, from a dict, Series or list of colors, cycling through
+    `polyptich.colormaps.Sets` by default
+
+    Returns
+    -------
+    pd.Series
+        Colors indexed by the categories
+    """
+    if colors is None:
+        colors = [Sets.colors[i % Sets.N] for i in range(len(categories))]
+    elif isinstance(colors, (dict, pd.Series)):
+        colors = [colors[category] for category in categories]
+    return pd.Series(list(colors), index=categories)
+
+
+def categorical_cmap(colors, missing="white"):
+    """
+    Colormap and norm that map category codes to their colors, and -1 to `missing`
+    """
+    cmap = mpl.colors.ListedColormap(list(colors)).with_extremes(under=missing, bad=missing)
+    norm = mpl.colors.BoundaryNorm(np.arange(len(colors) + 1) - 0.5, len(colors))
+    return cmap, norm
+
+
+def codes_to_rgba(codes, cmap):
+    """
+    uint8 RGBA colors of category codes, looked up directly in the colormap
+    """
+    # -1 (missing) is mapped to the under color, which follows the colors in the lookup table
+    return lut(cmap)[np.where(codes < 0, cmap.N, codes)]
+
+
+class CategoricalLegend(pp.Panel):
+    """
+    Legend of the colors of a categorical heatmap
+
+    Parameters
+    ----------
+    colors : pd.Series
+        Color of each category, indexed by the category
+    title : str
+        Title of the legend
+    width : float
+        Width of the legend
+    fontsize : float
+        Font size of the labels
+    """
+
+    def __init__(self, colors, title=None, width=1.0, fontsize=8):
+        height = (len(colors) + (title is not None)) * fontsize * 1.5 / 72
+        super().__init__((width, height))
+        handles = [
+            mpl.patches.Patch(facecolor=color, edgecolor="none", label=str(category))
+            for category, color in colors.items()
+        ]
+        self.legend(
+            handles=handles,
+            title=title,
+            loc="upper left",
+            bbox_to_anchor=(0, 1),
+            borderaxespad=0,
+            frameon=False,
+            fontsize=fontsize,
+            title_fontsize=fontsize,
+            alignment="left",
+        )
+        self.axis("off")
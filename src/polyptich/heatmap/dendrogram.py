@@ -0,0 +1,144 @@
+import polyptich as pp
+import matplotlib as mpl
+import numpy as np
+
+
+def dendrogram_segments(Z, order):
+    """
+    Line segments of a dendrogram, with leaves positioned at their rank in `order`
+
+    Parameters
+    ----------
+    Z : np.ndarray
+        Linkage matrix
+    order : np.ndarray
+        Leaf order
+
+    Returns
+    -------
+    np.ndarray
+        A [n_merges * 3, 2, 2] array of segments in (leaf position, height) coordinates
+    """
+    n = Z.shape[0] + 1
+    x = np.zeros(2 * n - 1)
+    x[order] = np.arange(n)
+    h = np.zeros(2 * n - 1)
+    for k, (a, b, height) in enumerate(Z[:, :3]):
+        a, b = int(a), int(b)
+        x[n + k] = (x[a] + x[b]) / 2
+        h[n + k] = height
+
+    a, b, height = Z[:, 0].astype(int), Z[:, 1].astype(int), Z[:, 2]
+    segments = np.stack(
+        [
+            np.stack([np.stack([x[a], h[a]], -1), np.stack([x[a], height], -1)], 1),
+            np.stack([np.stack([x[a], height], -1), np.stack([x[b], height], -1)], 1),
+            np.stack([np.stack([x[b], height], -1), np.stack([x[b], h[b]], -1)], 1),
+        ],
+        1,
+    )
+    return segments.reshape(-1, 2, 2)
+
+
+class Dendrogram(pp.Grid):
+    """
+    Dendrogram of a clustered heatmap layout, with one panel per group
+
+    Parameters
+    ----------
+    layout : polyptich.heatmap.layouts.Clustered or polyptich.heatmap.layouts.BrokenClustered
+        Clustered layout of the heatmap rows or columns
+    size : float
+        Height (or width for left/right orientations) of the dendrogram in inches
+    margin : float
+        Margin to use between the heatmap and the dendrogram
+    orientation : str
+        Where to place the dendrogram. Can be "top", "right", "bottom" or "left"
+    color :
+        Color of the lines
+    lw : float
+        Width of the lines
+    """
+
+    def __init__(self, layout, size=0.5, margin=None, orientation="top", color="black", lw=0.5):
+        if orientation in ["top", "bottom"]:
+            super().__init__(padding_height=0.0, padding_width=layout.padding)
+        else:
+            super().__init__(padding_width=0.0, padding_height=layout.padding)
+        margin = layout.padding if margin is None else margin
+        if orientation == "top":
+            self.margin_bottom = margin
+        elif orientation == "right":
+            self.margin_left = margin
+        elif orientation == "bottom":
+            self.margin_top = margin
+        elif orientation == "left":
+            self.margin_right = margin
+
+        partition = layout.partition(layout.data)
+        if partition.linkages is None:
+            raise ValueError("layout is not clustered")
+        heights = [Z[:, 2].max() for Z in partition.linkages if Z is not None and len(Z)]
+        max_height = max(heights + [1e-10])
+
+        for i, ((name, positions, width), Z) in enumerate(zip(partition, partition.linkages)):
+            n = len(positions)
+            if orientation in ["top", "bottom"]:
+                ax = self[0, i] = pp.Panel((width, size))
+            else:
+                ax = self[i, 0] = pp.Panel((size, width))
+            ax.axis("off")
+
+            if Z is not None:
+                # leaves of Z are numbered within the group
+                segments = dendrogram_segments(Z, _leaves(Z))
+                if orientation in ["right", "left"]:
+                    segments = segments[..., ::-1]
+                ax.add_collection(mpl.collections.LineCollection(segments, color=color, lw=lw))
+
+            if orientation == "top":
+                ax.set_xlim(-0.5, n - 0.5)
+                ax.set_ylim(0, max_height)
+            elif orientation == "bottom":
+                ax.set_xlim(-0.5, n - 0.5)
+                ax.set_ylim(max_height, 0)
+            elif orientation == "left":
+                ax.set_ylim(n - 0.5, -0.5)
+                ax.set_xlim(max_height, 0)
+            elif orientation == "right":
+                ax.set_ylim(n - 0.5, -0.5)
+                ax.set_xlim(0, max_height)
+
+
+def _leaves(Z):
+    import scipy.cluster.hierarchy
+
+    return scipy.cluster.hierarchy.leaves_list(Z)
+
+
+class DendrogramTop(Dendrogram):
+    __doc__ = Dendrogram.__doc__
+
+    def __init__(self, layout, size=0.5, margin=None, **kwargs):
+        super().__init__(layout, size=size, margin=margin, orientation="top", **kwargs)
+
+
+class DendrogramRight(Dendrogram):
+    __doc__ = Dendrogram.__doc__
+
+    def __init__(self, layout, size=0.5, margin=None, **kwargs):
+        super().__init__(layout, size=size, margin=margin, orientation="right", **kwargs)
+
+
+class DendrogramBottom(Dendrogram):
+    __doc__ = Dendrogram.__doc__
+
+    def __init__(self, layout, size=0.5, margin=None, **kwargs):
+        super().__init__(layout, size=size, margin=margin, orientation="bottom", **kwargs)
+
+
+class DendrogramLeft(Dendrogram):
+    __doc__ = Dendrogram.__doc__
+
+    def __init__(self, layout, size=0.5, margin=None, **kwargs):
+        super().__init__(layout, size=size, margin=margin, orientation="left", **kwargs)
@@ -4,6 +4,89 @@ import numpy as np
 import pandas as pd
 
 
+def group_labels_colors(names, info=None):
+    """
+    Label and color of each group, based on the "label" and "color" columns of `info`. Unnamed
+    groups get no label and no color.
+    """
+    named = [name for name in names if name is not None]
+    if info is None:
+        labels, colors = list(named), ["black"] * len(named)
+    else:
+        missing = [name for name in named if name not in info.index]
+        if missing:
+            raise ValueError(f"Name {missing[0]} not found in info")
+        info = info.loc[named]
+        labels = list(info["label"]) if "label" in info.columns else list(named)
+        colors = list(info["color"]) if "color" in info.columns else ["black"] * len(named)
+    labels, colors = iter(labels), iter(colors)
+    return (
+        [None if name is None else next(labels) for name in names],
+        ["none" if name is None else next(colors) for name in names],
+    )
+
+
+def group_bars(ax, partition, labels, colors, orientation="top", fontsize=10):
+    """
+    Draw a bar for each group of a layout partition on a single axes
+
+    The axes is in inches along the layout, so that the bars align with the heatmap panels. Labels
+    that are longer than their group are not drawn.
+    """
+    offsets = partition.offsets
+    sizes = partition.sizes
+    horizontal = orientation in ["top", "bottom"]
+
+    if horizontal:
+        rects = [mpl.patches.Rectangle((x, 0), w, 1) for x, w in zip(offsets, sizes)]
+        ax.set_xlim(0, partition.size)
+        ax.set_ylim(0, 1)
+    else:
+        rects = [mpl.patches.Rectangle((0, y), 1, h) for y, h in zip(offsets, sizes)]
+        ax.set_xlim(0, 1)
+        ax.set_ylim(partition.size, 0)
+    ax.add_collection(
+        mpl.collections.PatchCollection(rects, facecolors=colors, edgecolors="none", alpha=0.5)
+    )
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+    prop = mpl.font_manager.FontProperties(size=fontsize)
+    text_to_path = mpl.textpath.TextToPath()
+    rotation = 0 if horizontal else (90 if orientation == "left" else -90)
+    for label, offset, size in zip(labels, offsets, sizes):
+        if label is None:
+            continue
+        width, _, _ = text_to_path.get_text_width_height_descent(str(label), prop, ismath=False)
+        if width / 72 > size:
+            continue
+        center = offset + size / 2
+        ax.text(
+            center if horizontal else 0.5,
+            0.5 if horizontal else center,
+            label,
+            ha="center",
+            va="center",
+            fontsize=fontsize,
+            color="white",
+            rotation=rotation,
+        )
+
+
+def group_bars_panel(grid, data, layout, info=None, orientation="top"):
+    """
+    Add a single panel to a grid with a bar for each group of a layout, see `group_bars`
+    """
+    partition = layout.partition(data)
+    labels, colors = group_labels_colors(partition.names, info)
+    if orientation in ["top", "bottom"]:
+        ax = grid[0, 0] = pp.Panel((partition.size, 0.2))
+    else:
+        ax = grid[0, 0] = pp.Panel((0.2, partition.size))
+    group_bars(ax, partition, labels, colors, orientation)
+    return ax
+
+
 class Heading(pp.Grid):
     """
     Heading for multiple groups in a heatmap
@@ -22,6 +105,9 @@ class Heading(pp.Grid):
         Margin to use between the heatmap and the heading
     orientation : str
         Where to place the heading. Can be "top", "right", "bottom" or "left"
+    single_axes : bool
+        Whether to draw all groups on a single axes, as one collection of patches. Labels that do
+        not fit in their group are not shown. Useful for layouts with many groups.
 
 
     """
@@ -33,6 +119,7 @@ class Heading(pp.Grid):
         layout=None,
         margin=None,
         orientation="top",
+        single_axes=False,
     ):
         if layout is None:
             layout = pp.heatmap.layouts.Simple()
@@ -60,7 +147,10 @@ class Heading(pp.Grid):
                 padding_width=0.0,
                 padding_height=layout.padding,
             )
-        print(layout)
+        if single_axes:
+            group_bars_panel(self, data, layout, info, orientation)
+            return
+
         for i, name, df, width in layout.iter(data):
             if name is None:
                 continue
@@ -118,26 +208,26 @@ class Heading(pp.Grid):
 class HeadingTop(Heading):
     __doc__ = Heading.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="top")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="top")
 
 
 class HeadingRight(Heading):
     __doc__ = Heading.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="right")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="right")
 
 
 class HeadingBottom(Heading):
     __doc__ = Heading.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="bottom")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="bottom")
 
 
 class HeadingLeft(Heading):
     __doc__ = Heading.__doc__
 
-    def __init__(self, data, layout, info=None, margin=None):
-        super().__init__(data, layout=layout, info=info, margin=margin, orientation="left")
+    def __init__(self, data, layout, info=None, margin=None, **kwargs):
+        super().__init__(data, layout=layout, info=info, margin=margin, **kwargs, orientation="left")
@@ -1,8 +1,68 @@
 import polyptich as pp
 import matplotlib as mpl
+import numpy as np
+import pandas as pd
 from . import layouts
+from . import categorical as categorical_
+from .norm import quantile_norm
+from .aggregate import aggregate as _aggregate
+from .labels import cell_labels as _cell_labels
+from ..colormaps import to_rgba
+
+def _get_norm(norm, data):
+    """
+    Normalization from min/max (None), robust quantiles ("quantile"), quantiles centered at zero
+    ("diverging") or a given `mpl.colors.Normalize`
+    """
+    if norm is None:
+        values = np.asarray(data, dtype=float)
+        return mpl.colors.Normalize(vmin=np.nanmin(values), vmax=np.nanmax(values))
+    if isinstance(norm, str):
+        if norm == "quantile":
+            return quantile_norm(data)
+        if norm == "diverging":
+            return quantile_norm(data, center=0.0)
+        raise ValueError(f"Unknown norm {norm}")
+    return norm
+
 
 class Heatmap(pp.Grid):
+    """
+    Heatmap of a matrix, split into panels according to the row and column layouts
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Matrix with columns of the heatmap as rows, and rows of the heatmap as columns
+    col_layout :
+        Layout of the heatmap columns
+    row_layout :
+        Layout of the heatmap rows
+    cmap :
+        Colormap
+    norm :
+        Normalization of the values. Can be a `mpl.colors.Normalize`, None (minimum and maximum),
+        "quantile" (1st and 99th percentile) or "diverging" (centered at zero)
+    compact : bool
+        Whether to colormap the data in polyptich as uint8 RGBA, rather than letting matplotlib
+        create a float64 RGBA image. Uses 8 times less memory for large heatmaps.
+    aggregate : str
+        If given, shows one column per group of the (Broken) `col_layout`, with this statistic of
+        the group, e.g. "mean" or "fraction" (see `polyptich.heatmap.aggregate`). Ticks and
+        headings should then use the `col_layout` attribute of the heatmap.
+    cell_labels : bool or str
+        Whether to print the value in each cell, or the format spec of the values, e.g. ".1f".
+        Labels that do not fit in their cell at `cell_fontsize` are skipped.
+    cell_fontsize : float
+        Font size of the cell labels
+    categorical : bool
+        Whether the data contains categories (e.g. cluster assignments) rather than numbers. The
+        data is stored as int8/int16 codes in `codes`, and colored with `colors`.
+    colors : dict or pd.Series
+        For categorical data, the color of each category. Defaults to `polyptich.colormaps.Sets`.
+        Its index (or keys) also determines the order of the categories.
+    """
+
     def __init__(
         self,
         data,
@@ -12,6 +72,12 @@ class Heatmap(pp.Grid):
         var = None,
         cmap="viridis",
         norm = None,
+        compact = True,
+        aggregate = None,
+        cell_labels = False,
+        cell_fontsize = 6,
+        categorical = False,
+        colors = None,
         **kwargs,
     ):
         if col_layout is None:
@@ -19,18 +85,111 @@ class Heatmap(pp.Grid):
         if row_layout is None:
             row_layout = layouts.Simple()
 
+        if aggregate is not None:
+            if not isinstance(col_layout, layouts.Broken):
+                raise ValueError("aggregate requires a Broken col_layout")
+            data = _aggregate(data, col_layout.split, aggregate)
+            col_layout = col_layout.aggregated()
+        self.col_layout = col_layout
+        self.row_layout = row_layout
+
         super().__init__(padding_width=col_layout.padding, padding_height=row_layout.padding, margin_bottom=0., margin_right=0.)
         
-        if norm is None:
-            norm = mpl.colors.Normalize(vmin=data.values.min(), vmax=data.values.max())
-        for j, name_row, data_row, row_height in row_layout.iter(data.T):
-            for i, name_col, data_cell, col_width in col_layout.iter(data_row.T):
+        if categorical:
+            # a dict or Series of colors also gives the order of the categories
+            values, categories = categorical_.encode(
+                data, list(colors.keys()) if isinstance(colors, (dict, pd.Series)) else None
+            )
+            self.codes = values
+            self.colors = categorical_.category_colors(categories, colors)
+            cmap, norm = categorical_.categorical_cmap(self.colors.values)
+            if cell_labels:
+                raise ValueError("cell_labels are not supported for categorical data")
+        else:
+            values = np.asarray(data.values)
+            norm = _get_norm(norm, values)
+        row_partition = row_layout.partition(data.columns)
+        col_partition = col_layout.partition(data.index)
+        self.data = data
+        self.cmap = cmap
+        self.norm = norm
+        self.row_partition = row_partition
+        self.col_partition = col_partition
+        for j, (name_row, row_positions, row_height) in enumerate(row_partition):
+            for i, (name_col, col_positions, col_width) in enumerate(col_partition):
                 ax = self[j, i] = pp.Panel((col_width, row_height))
 
-                ax.matshow(data_cell.T, aspect="auto", cmap=cmap, norm = norm)
+                data_cell = values[np.ix_(col_positions, row_positions)]
+                rgba = None
+                if compact and categorical:
+                    rgba = categorical_.codes_to_rgba(data_cell.T, cmap)
+                    ax.imshow(rgba, aspect="auto", interpolation="nearest")
+                elif compact:
+                    rgba = to_rgba(data_cell.T, cmap, norm)
+                    ax.imshow(rgba, aspect="auto", interpolation="nearest")
+                else:
+                    ax.matshow(data_cell.T, aspect="auto", cmap=cmap, norm = norm)
+                if cell_labels:
+                    if rgba is None:
+                        rgba = to_rgba(data_cell.T, cmap, norm)
+                    _cell_labels(
+                        ax,
+                        data_cell.T,
+                        rgba,
+                        (col_width * 72 / len(col_positions), row_height * 72 / len(row_positions)),
+                        fmt=".2g" if cell_labels is True else cell_labels,
+                        fontsize=cell_fontsize,
+                    )
                 ax.set_xticks([])
                 ax.set_yticks([])
                 ax.grid(False)
+
+    def legend(self, title=None, **kwargs):
+        """
+        Legend of the category colors of a categorical heatmap
+
+        Returns
+        -------
+        polyptich.heatmap.categorical.CategoricalLegend
+        """
+        if not hasattr(self, "codes"):
+            raise ValueError("Only categorical heatmaps have a legend")
+        return categorical_.CategoricalLegend(self.colors, title=title, **kwargs)
+
+    def write_tiles(self, path, title=None, description=None, **kwargs):
+        """
+        Export the heatmap as a multi-resolution tile pyramid, which can be panned and zoomed in
+        the browser using `polyptich-www`. Rows and columns are ordered as in the layouts.
+
+        Parameters
+        ----------
+        path : str or Path
+            Directory of the endpoint, inside a `www` folder
+        **kwargs
+            Passed to `polyptich.www.tiles.TileHeatmap`
+
+        Returns
+        -------
+        polyptich.www.tiles.TileHeatmap
+        """
+        from ..www.tiles import TileHeatmap
+
+        if hasattr(self, "codes"):
+            # zoomed out levels average values, which is meaningless for categories
+            raise ValueError("Categorical heatmaps cannot be exported as tiles")
+        return TileHeatmap(
+            path,
+            np.asarray(self.data.values).T,
+            row_labels=self.data.columns,
+            col_labels=self.data.index,
+            cmap=self.cmap,
+            norm=self.norm,
+            title=title,
+            description=description,
+            row_order=np.concatenate(self.row_partition.positions),
+            col_order=np.concatenate(self.col_partition.positions),
+            **kwargs,
+        )
                 
 
 class TopPanels(pp.Grid):
@@ -51,7 +210,6 @@ class TopPanels(pp.Grid):
 
         super().__init__(padding_width=col_layout.padding, padding_height=0, margin_bottom=margin)
         
-        if norm is None:
-            norm = mpl.colors.Normalize(vmin=data.min().min(), vmax=data.max().max())
+        norm = _get_norm(norm, data)
         for i, name_col, data_cell, col_width in col_layout.iter(data):
             ax = self[0, i] = pp.Panel((col_width, height))
@@ -0,0 +1,133 @@
+import matplotlib as mpl
+import numpy as np
+
+
+def contrasting_colors(rgba, threshold=0.179):
+    """
+    Black or white, whichever contrasts most with each background color
+
+    Parameters
+    ----------
+    rgba : np.ndarray
+        [..., 4] background colors, as uint8 or floats between 0 and 1
+    threshold : float
+        Relative luminance above which black is used. The default is where black and white have
+        the same contrast ratio.
+
+    Returns
+    -------
+    np.ndarray
+        [..., 4] float RGBA colors
+    """
+    rgb = np.asarray(rgba)[..., :3]
+    rgb = rgb / 255.0 if rgb.dtype == np.uint8 else rgb.astype(float)
+    # relative luminance of sRGB colors
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    luminance = linear @ np.array([0.2126, 0.7152, 0.0722])
+    colors = np.zeros(luminance.shape + (4,))
+    colors[..., 3] = 1.0
+    colors[luminance <= threshold, :3] = 1.0
+    return colors
+
+
+def format_values(values, fmt=".2g"):
+    """
+    Format values with a format spec, formatting each unique value only once
+
+    Returns
+    -------
+    tuple
+        The unique labels, and the index of the label of each value
+    """
+    unique, inverse = np.unique(np.asarray(values).ravel(), return_inverse=True)
+    labels = np.array([format(value, fmt) for value in unique])
+    # different values can have the same label
+    labels, label_inverse = np.unique(labels, return_inverse=True)
+    return labels, label_inverse[inverse].reshape(np.shape(values))
+
+
+def _label_widths(labels, fontsize):
+    """
+    Width of each label, in points
+    """
+    prop = mpl.font_manager.FontProperties(size=fontsize)
+    text_to_path = mpl.textpath.TextToPath()
+    return np.array(
+        [text_to_path.get_text_width_height_descent(label, prop, ismath=False)[0] for label in labels]
+    )
+
+
+def _label_paths(labels, fontsize):
+    """
+    Text path of each label in points, centered on the origin
+    """
+    prop = mpl.font_manager.FontProperties(size=fontsize)
+    paths = []
+    for label in labels:
+        path = mpl.textpath.TextPath((0, 0), label, prop=prop)
+        vertices = path.vertices
+        if len(vertices):
+            # the bounds of the control points, much faster than the exact extents
+            vertices = vertices - (vertices.min(0) + vertices.max(0)) / 2
+        paths.append(mpl.path.Path(vertices, path.codes))
+    return paths
+
+
+def cell_labels(ax, values, rgba, cell_size, fmt=".2g", fontsize=6, spacing=1.2):
+    """
+    Print the value of each cell of a heatmap panel, if it fits in the cell
+
+    All labels are drawn as a single collection of text paths, so that rendering stays fast for
+    many cells. Labels that do not fit in their cell, given the font size, are skipped.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The panel, with cells centered on integer data coordinates
+    values : np.ndarray
+        [rows, columns] values, as displayed
+    rgba : np.ndarray
+        [rows, columns, 4] colors of the cells, used to choose a contrasting text color
+    cell_size : tuple
+        Width and height of a cell, in points
+    fmt : str
+        Format spec of the values
+    fontsize : float
+        Font size, in points
+    spacing : float
+        Minimal size of a cell relative to the size of its label
+
+    Returns
+    -------
+    matplotlib.collections.PathCollection or None
+    """
+    cell_width, cell_height = cell_size
+    if cell_height < fontsize * spacing:
+        return None
+    values = np.asarray(values)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return None
+
+    labels, label_ix = format_values(values[finite], fmt)
+    fits = _label_widths(labels, fontsize) * spacing <= cell_width
+    if not fits[label_ix].any():
+        return None
+
+    rows, cols = np.nonzero(finite)
+    keep = fits[label_ix]
+    rows, cols, label_ix = rows[keep], cols[keep], label_ix[keep]
+    # only create paths for the labels that are shown
+    used, label_ix = np.unique(label_ix, return_inverse=True)
+    paths = _label_paths(labels[used], fontsize)
+    collection = mpl.collections.PathCollection(
+        [paths[i] for i in label_ix],
+        sizes=[1.0],
+        offsets=np.column_stack([cols, rows]),
+        offset_transform=ax.transData,
+        transform=mpl.transforms.IdentityTransform(),
+        facecolors=contrasting_colors(np.asarray(rgba)[rows, cols]),
+        edgecolors="none",
+    )
+    ax.add_collection(collection, autolim=False)
+    return collection
@@ -1,19 +1,106 @@
+import collections
+import concurrent.futures
+import dataclasses
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+@dataclasses.dataclass
+class Partition:
+    """
+    Partition of the rows or columns of a heatmap into groups
+
+    Parameters
+    ----------
+    names : list
+        Name of each group, in plotting order
+    positions : list
+        Integer positions of the elements of each group
+    sizes : np.ndarray
+        Size of each group in inches
+    padding : float
+        Padding between groups in inches
+    linkages : list
+        Linkage matrix of each group, if the layout is clustered
+    """
+
+    names: list
+    positions: list
+    sizes: np.ndarray
+    padding: float = 0.0
+    linkages: list = None
+
+    @property
+    def offsets(self):
+        """
+        Start of each group in inches, including the padding between groups
+        """
+        return np.concatenate([[0.0], np.cumsum(self.sizes[:-1] + self.padding)])
+
+    @property
+    def size(self):
+        """
+        Total size in inches, including the padding between groups
+        """
+        return float(self.sizes.sum() + self.padding * max(len(self.sizes) - 1, 0))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        yield from zip(self.names, self.positions, self.sizes)
+
+
+def _get_index(data):
+    if isinstance(data, pd.Index):
+        return data
+    return data.index
+
+
 class Layout():
     def __init__(self, padding = 0.05, size = None, resolution = None):
-        
+
         self.padding = padding
         self._size = size
         self.resolution = resolution
+        self._partitions = {}
 
     def iter(self, data):
+        for i, (name, positions, size) in enumerate(self.partition(data)):
+            yield i, name, data.iloc[positions], size
+
+    def partition(self, data):
+        """
+        Partition the rows of `data` (or a `pd.Index`) into groups.
+
+        The partition is computed on first use and cached on the identity of the index, so that
+        heatmaps, ticks, headings and annotations sharing this layout do not recompute it.
+        """
+        index = _get_index(data)
+        key = (id(index), self.padding, self._size, self.resolution)
+        cached = self._partitions.get(key)
+        if cached is not None and cached[0] is index:
+            return cached[1]
+        partition = self._partition(index)
+        self._partitions[key] = (index, partition)
+        return partition
+
+    def _partition(self, index):
         raise NotImplementedError
 
+    def _invalidate(self):
+        self._partitions = {}
+
     def size(self, data):
+        return self._size_of(data.shape[0])
+
+    def _size_of(self, n):
         if self._size is None:
             if self.resolution is None:
                 size = 5
             else:
-                size = self.resolution * data.shape[0]
+                size = self.resolution * n
         else:
             size = self._size
         return size
@@ -25,28 +112,284 @@ class Simple(Layout):
     def iter(self, data):
         yield 0, None, data, self.size(data)
 
-import pandas as pd
+    def _partition(self, index):
+        return Partition(
+            names=[None],
+            positions=[np.arange(len(index))],
+            sizes=np.array([self._size_of(len(index))], dtype=float),
+            padding=self.padding,
+        )
+
 class Broken(Layout):
     def __init__(self, split:pd.Series, padding = 0.05, size = None, resolution = None):
         super().__init__(padding = padding, size = size, resolution = resolution)
+        self.split = split
+
+    @property
+    def split(self):
+        return self._split
+
+    @split.setter
+    def split(self, split):
         # make sure is categorical
-        if not pd.api.types.is_categorical_dtype(split):
+        if not isinstance(split.dtype, pd.CategoricalDtype):
             raise ValueError("split must be categorical")
-        self.split = split
+        self._split = split
+        self._groups = None
+        self._invalidate()
+
+    def _split_groups(self):
+        """
+        Names and integer positions of each observed group, computed without caching
+        """
+        codes = self.split.cat.codes.values
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.split.cat.categories))
+        order = np.argsort(codes, kind="stable")[(codes < 0).sum():]
+        positions = np.split(order, np.cumsum(counts)[:-1])
+        observed = np.flatnonzero(counts)
+        return (
+            [self.split.cat.categories[k] for k in observed],
+            [positions[k] for k in observed],
+        )
+
+    def groups(self):
+        """
+        Names and integer positions of each observed group, in the order of the categories
+        """
+        if self._groups is None:
+            self._groups = self._split_groups()
+        return self._groups
+
+    def aggregated(self):
+        """
+        Layout of the data after aggregating each group into a single element (see
+        `polyptich.heatmap.aggregate`), with one panel per group
+        """
+        names, _ = self.groups()
+        index = pd.Index(names, name=self.split.name)
+        split = pd.Series(pd.Categorical(names, categories=names), index=index)
+        return Broken(split, padding=self.padding, size=self._size, resolution=self.resolution)
+
+    def _partition(self, index):
+        assert len(index) == len(self.split), f"{len(index)} != {len(self.split)}"
+        assert index.equals(self.split.index), f"{index} != {self.split.index}"
+        names, positions = self.groups()
+        n = len(index)
+        sizes = np.array(
+            [self._size_of(len(pos)) * len(pos) / n for pos in positions], dtype=float
+        )
+        return Partition(names=names, positions=positions, sizes=sizes, padding=self.padding)
+
+APPROXIMATE_THRESHOLD = 20000
+"""
+Number of elements above which clustered layouts switch to an approximate ordering by default
+"""
+
+_linkage_cache = collections.OrderedDict()
+_LINKAGE_CACHE_SIZE = 32
+
+
+def _hash_values(values):
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.data, digest_size=16).hexdigest()
+    return digest, values.shape, values.dtype.str
+
+
+def linkage(values, method="average", metric="euclidean", optimal_ordering=True):
+    """
+    Hierarchical clustering of the rows of `values`, cached on a hash of the data
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Matrix of which the rows are clustered
+    method : str
+        Linkage method, see `scipy.cluster.hierarchy.linkage`
+    metric : str
+        Distance metric, see `scipy.spatial.distance.pdist`
+    optimal_ordering : bool
+        Whether to reorder the leaves so that the distance between successive leaves is minimal
+
+    Returns
+    -------
+    np.ndarray
+        Linkage matrix
+    """
+    try:
+        import scipy.cluster.hierarchy
+    except ImportError as exc:
+        raise RuntimeError("Install scipy to use clustered heatmap layouts.") from exc
+
+    key = (_hash_values(values), method, metric, optimal_ordering)
+    if key in _linkage_cache:
+        _linkage_cache.move_to_end(key)
+        return _linkage_cache[key]
+
+    Z = scipy.cluster.hierarchy.linkage(
+        values, method=method, metric=metric, optimal_ordering=optimal_ordering
+    )
+    _linkage_cache[key] = Z
+    if len(_linkage_cache) > _LINKAGE_CACHE_SIZE:
+        _linkage_cache.popitem(last=False)
+    return Z
+
+
+def embedding_order(values, n_iter=20, seed=0):
+    """
+    Approximate ordering of the rows of `values` by their projection on the first principal
+    component. Uses power iteration, so it runs in O(n) memory.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values - values.mean(0)
+    v = np.random.default_rng(seed).normal(size=values.shape[1])
+    for _ in range(n_iter):
+        v = values.T @ (values @ v)
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            break
+        v /= norm
+    return np.argsort(values @ v, kind="stable")
+
+
+def _cluster(values, method, metric, optimal_ordering, approximate):
+    n = values.shape[0]
+    if n < 2:
+        return np.arange(n), None
+    if approximate is None:
+        approximate = n > APPROXIMATE_THRESHOLD
+    if approximate:
+        return embedding_order(values), None
+    import scipy.cluster.hierarchy
+
+    Z = linkage(values, method=method, metric=metric, optimal_ordering=optimal_ordering)
+    return scipy.cluster.hierarchy.leaves_list(Z), Z
 
-    def iter(self, data):
-        assert len(data) == len(self.split), f"{len(data)} != {len(self.split)}"
-        assert data.index.equals(self.split.index), f"{data.index} != {self.split.index}"
-        for i, (name, df) in enumerate(data.groupby(self.split, observed = True)):
-            ratio = df.shape[0]/data.shape[0]
-            size = self.size(df) * ratio
-            yield i, name, df, size
 
 class Clustered(Layout):
-    def __init__(self, padding = 0.05, size = None, resolution = None):
+    """
+    Layout ordering rows or columns by hierarchical clustering
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Values used for clustering, with one row per element of the heatmap axis
+    padding : float
+        Padding in inches
+    method : str
+        Linkage method, see `scipy.cluster.hierarchy.linkage`
+    metric : str
+        Distance metric, see `scipy.spatial.distance.pdist`
+    optimal_ordering : bool
+        Whether to use optimal leaf ordering
+    approximate : bool
+        Whether to order by a 1D embedding instead of clustering. Defaults to True if there are
+        more than `APPROXIMATE_THRESHOLD` elements, as exact linkage requires O(n²) memory.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        padding=0.05,
+        size=None,
+        resolution=None,
+        method="average",
+        metric="euclidean",
+        optimal_ordering=True,
+        approximate=None,
+    ):
         super().__init__(padding = padding, size = size, resolution = resolution)
-        pass
+        self.data = data
+        self.method = method
+        self.metric = metric
+        self.optimal_ordering = optimal_ordering
+        self.approximate = approximate
+        self._order = None
+
+    def _partition(self, index):
+        assert index.equals(self.data.index), f"{index} != {self.data.index}"
+        if self._order is None:
+            self._order = _cluster(
+                np.asarray(self.data.values, dtype=float),
+                self.method,
+                self.metric,
+                self.optimal_ordering,
+                self.approximate,
+            )
+        order, Z = self._order
+        return Partition(
+            names=[None],
+            positions=[order],
+            sizes=np.array([self._size_of(len(index))], dtype=float),
+            padding=self.padding,
+            linkages=[Z],
+        )
+
+
+class BrokenClustered(Broken):
+    """
+    Layout splitting rows or columns in groups, and ordering each group by hierarchical
+    clustering. Groups are clustered in parallel.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Values used for clustering, with one row per element of the heatmap axis
+    split : pd.Series
+        Categorical defining the groups
+    padding : float
+        Padding between groups in inches
+    n_jobs : int
+        Number of groups clustered in parallel. Defaults to the number of processors.
+
+    See `Clustered` for the other parameters.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        split: pd.Series,
+        padding=0.05,
+        size=None,
+        resolution=None,
+        method="average",
+        metric="euclidean",
+        optimal_ordering=True,
+        approximate=None,
+        n_jobs=None,
+    ):
+        self.data = data
+        self.method = method
+        self.metric = metric
+        self.optimal_ordering = optimal_ordering
+        self.approximate = approximate
+        self.n_jobs = n_jobs
+        super().__init__(split, padding = padding, size = size, resolution = resolution)
+
+    def groups(self):
+        if self._groups is None:
+            names, positions = self._split_groups()
+            assert self.data.index.equals(self.split.index), f"{self.data.index} != {self.split.index}"
+            values = np.asarray(self.data.values, dtype=float)
+
+            def cluster(pos):
+                return _cluster(
+                    values[pos], self.method, self.metric, self.optimal_ordering, self.approximate
+                )
+
+            if len(positions) > 1 and self.n_jobs != 1:
+                with concurrent.futures.ThreadPoolExecutor(self.n_jobs) as executor:
+                    results = list(executor.map(cluster, positions))
+            else:
+                results = [cluster(pos) for pos in positions]
+
+            # both are only cached once clustering succeeded
+            self._groups, self._linkages = (
+                (names, [pos[order] for pos, (order, _) in zip(positions, results)]),
+                [Z for _, Z in results],
+            )
+        return self._groups
 
-class BrokenClustered(Layout):
-    def __init__(self, padding = 0.05):
-        super().__init__(padding = padding)
\ No newline at end of file
+    def _partition(self, index):
+        partition = super()._partition(index)
+        partition.linkages = self._linkages
+        return partition
@@ -0,0 +1,233 @@
+import numpy as np
+import matplotlib as mpl
+
+
+class _Store:
+    """
+    Counts of logarithmically spaced buckets, stored densely from an offset key
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+
+    def _extend(self, kmin, kmax):
+        if len(self.counts) == 0:
+            self.counts = np.zeros(kmax - kmin + 1, dtype=np.int64)
+            self.offset = kmin
+            return
+        new_offset = min(self.offset, kmin)
+        new_end = max(self.offset + len(self.counts) - 1, kmax)
+        if new_offset == self.offset and new_end == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_end - new_offset + 1, dtype=np.int64)
+        counts[self.offset - new_offset : self.offset - new_offset + len(self.counts)] = self.counts
+        self.counts = counts
+        self.offset = new_offset
+
+    def add(self, keys):
+        if len(keys) == 0:
+            return
+        kmin, kmax = int(keys.min()), int(keys.max())
+        self._extend(kmin, kmax)
+        counts = np.bincount(keys - kmin, minlength=kmax - kmin + 1)
+        start = kmin - self.offset
+        self.counts[start : start + len(counts)] += counts
+
+    def merge(self, other):
+        if len(other.counts) == 0:
+            return
+        self._extend(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start : start + len(other.counts)] += other.counts
+
+    @property
+    def keys(self):
+        return np.arange(self.offset, self.offset + len(self.counts))
+
+
+class QuantileSketch:
+    """
+    Mergeable sketch of a distribution, giving approximate quantiles with a bounded relative error.
+
+    Values are counted in logarithmically spaced buckets (as in DDSketch), so that memory depends
+    on the dynamic range of the data and not on the number of values. Sketches of different chunks
+    can be merged.
+
+    Parameters
+    ----------
+    relative_accuracy : float
+        Maximal relative error of the quantiles
+    min_value : float
+        Values with an absolute value below this are counted as zero
+    """
+
+    def __init__(self, relative_accuracy=0.005, min_value=1e-12):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.min_value = min_value
+        self._positive = _Store()
+        self._negative = _Store()
+        self.zero_count = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values, n_zeros=0):
+        """
+        Add values to the sketch. NaN values are ignored.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Values to add
+        n_zeros : int
+            Number of additional zeros, e.g. the implicit zeros of a sparse matrix
+        """
+        values = np.asarray(values).ravel()
+        values = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+        if n_zeros:
+            self.zero_count += int(n_zeros)
+            self.count += int(n_zeros)
+            self.min = min(self.min, 0.0)
+            self.max = max(self.max, 0.0)
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        absolute = np.abs(values.astype(float, copy=False))
+        nonzero = absolute >= self.min_value
+        self.zero_count += int((~nonzero).sum())
+        keys = np.ceil(np.log(absolute[nonzero]) / self._log_gamma).astype(np.int64)
+        positive = values[nonzero] > 0
+        self._positive.add(keys[positive])
+        self._negative.add(keys[~positive])
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch with the same accuracy into this one
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Can only merge sketches with the same relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) of the values added to the sketch
+        """
+        if self.count == 0:
+            raise ValueError("Sketch is empty")
+        q = np.asarray(q, dtype=float)
+
+        # buckets ordered from the most negative to the most positive value
+        bucket_values = np.concatenate(
+            [
+                -self._value(self._negative.keys[::-1]),
+                [0.0],
+                self._value(self._positive.keys),
+            ]
+        )
+        bucket_counts = np.concatenate(
+            [self._negative.counts[::-1], [self.zero_count], self._positive.counts]
+        )
+        cumulative = np.cumsum(bucket_counts)
+        rank = q * (self.count - 1)
+        result = bucket_values[np.searchsorted(cumulative, rank, side="right")]
+        result = np.clip(result, self.min, self.max)
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return result if result.ndim else float(result)
+
+    def _value(self, keys):
+        return 2 * self.gamma ** keys.astype(float) / (self.gamma + 1)
+
+    @classmethod
+    def from_data(cls, data, chunk_size=2**20, **kwargs):
+        """
+        Sketch all values of dense, sparse, memory-mapped or chunked data in one pass
+
+        Parameters
+        ----------
+        data : np.ndarray, pd.DataFrame, scipy.sparse matrix or iterable of those
+            The data. Arrays are processed in chunks of rows, so that no copy of the full data is
+            made.
+        chunk_size : int
+            Approximate number of values per chunk
+        """
+        sketch = cls(**kwargs)
+        for values, n_zeros in _iter_chunks(data, chunk_size):
+            sketch.update(values, n_zeros=n_zeros)
+        return sketch
+
+
+def _iter_chunks(data, chunk_size):
+    if hasattr(data, "nnz") and hasattr(data, "tocoo"):
+        # scipy sparse matrix/array
+        n_zeros = int(np.prod(data.shape)) - data.nnz
+        yield data.tocoo(copy=False).data, n_zeros
+        return
+    if hasattr(data, "iloc") and hasattr(data, "columns"):
+        # pd.DataFrame
+        step = max(chunk_size // max(data.shape[1], 1), 1)
+        for start in range(0, data.shape[0], step):
+            yield np.asarray(data.iloc[start : start + step].values, dtype=float), 0
+        return
+    if hasattr(data, "values") and hasattr(data, "index"):
+        # pd.Series
+        yield np.asarray(data.values, dtype=float), 0
+        return
+    if isinstance(data, np.ndarray):
+        if data.ndim == 0:
+            yield data.reshape(1), 0
+            return
+        step = max(chunk_size // max(int(np.prod(data.shape[1:])), 1), 1)
+        for start in range(0, data.shape[0], step):
+            yield data[start : start + step], 0
+        return
+    for chunk in data:
+        yield from _iter_chunks(chunk, chunk_size)
+
+
+def quantile_norm(data=None, lower=0.01, upper=0.99, center=None, sketch=None, clip=False):
+    """
+    Create a color normalization from approximate quantiles, computed in a single streaming pass
+
+    Parameters
+    ----------
+    data : np.ndarray, pd.DataFrame, scipy.sparse matrix or iterable of those
+        The data. Can be omitted if a `sketch` is given.
+    lower : float
+        Quantile mapped to the lowest color
+    upper : float
+        Quantile mapped to the highest color
+    center : float
+        If given, creates a diverging norm centered at this value, with a symmetric range that
+        includes both quantiles
+    sketch : QuantileSketch
+        A precomputed sketch, e.g. merged from several datasets
+    clip : bool
+        Whether to clip values outside of the range
+
+    Returns
+    -------
+    matplotlib.colors.Normalize
+        The norm, which can be shared across multiple heatmaps
+    """
+    if sketch is None:
+        if data is None:
+            raise ValueError("Either data or sketch should be provided")
+        sketch = QuantileSketch.from_data(data)
+    vmin, vmax = sketch.quantile([lower, upper])
+    if center is not None:
+        halfrange = max(abs(vmin - center), abs(vmax - center))
+        return mpl.colors.CenteredNorm(vcenter=center, halfrange=halfrange, clip=clip)
+    return mpl.colors.Normalize(vmin=vmin, vmax=vmax, clip=clip)
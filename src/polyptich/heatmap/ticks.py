@@ -1,11 +1,103 @@
 import polyptich as pp
 import matplotlib as mpl
 import numpy as np
+import pandas as pd
+import bisect
+
+
+def _label_extents(labels, fontsize, rotation, along_x):
+    """
+    Extent of each label along the axis, in points
+    """
+    prop = mpl.font_manager.FontProperties(size=fontsize)
+    text_to_path = mpl.textpath.TextToPath()
+    _, height, _ = text_to_path.get_text_width_height_descent("Mg", prop, ismath=False)
+    angle = np.deg2rad(rotation)
+    cos, sin = abs(np.cos(angle)), abs(np.sin(angle))
+    # the component of the label width along the axis
+    width_factor = cos if along_x else sin
+    if width_factor < 1e-3:
+        return np.full(len(labels), height * (sin if along_x else cos))
+    widths = np.array(
+        [
+            text_to_path.get_text_width_height_descent(str(label), prop, ismath=False)[0]
+            for label in labels
+        ]
+    )
+    return widths * width_factor + height * (sin if along_x else cos)
+
+
+def select_ticks(n, candidates, priority, extents, length, spacing=1.1):
+    """
+    Select a subset of tick positions so that labels do not overlap.
+
+    Candidates are accepted greedily in order of decreasing priority, if they do not overlap with
+    any label that was already accepted.
+
+    Parameters
+    ----------
+    n : int
+        Number of rows/columns
+    candidates : np.ndarray
+        Positions that can get a label
+    priority : np.ndarray
+        Priority of each candidate
+    extents : np.ndarray
+        Extent of the label of each candidate along the axis, in points
+    length : float
+        Length of the axis, in points
+    spacing : float
+        Minimal distance between labels, relative to their extent
+
+    Returns
+    -------
+    np.ndarray
+        Selected positions, sorted
+    """
+    if len(candidates) == 0:
+        return candidates
+    scale = length / n
+    half = extents * spacing / 2 / scale
+    if (half.sum() * 2) <= n:
+        return candidates
+
+    accepted = []
+    accepted_half = []
+    for ix in np.argsort(-np.asarray(priority), kind="stable"):
+        position = candidates[ix]
+        k = bisect.bisect_left(accepted, position)
+        if k > 0 and position - accepted[k - 1] < half[ix] + accepted_half[k - 1]:
+            continue
+        if k < len(accepted) and accepted[k] - position < half[ix] + accepted_half[k]:
+            continue
+        accepted.insert(k, position)
+        accepted_half.insert(k, half[ix])
+    return np.array(accepted, dtype=int)
 
 
 class Ticks(pp.Grid):
-    def __init__(self, data, layout = None, margin=0., orientation="top", size = 1., label_column = "label", fontsize = 10, rotation = None, ha = None, va = None):
-        data = data.copy()
+    """
+    Tick labels for the rows or columns of a heatmap
+
+    If labels do not fit in the available space, a subset of labels is selected based on the font
+    size. Labels with a higher value in the `priority` column (or the `tick` column if it is not
+    boolean) are selected first.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Information about rows/columns. Can contain columns:
+        - label: the label to display
+        - color: the color of the label
+        - tick: whether to show a tick for this row/column
+        - priority: priority of the label when thinning
+    layout :
+        Layout of the heatmap rows or columns
+    thin : bool
+        Whether to drop labels that would overlap
+    """
+
+    def __init__(self, data, layout = None, margin=0., orientation="top", size = 1., label_column = "label", fontsize = 10, rotation = None, ha = None, va = None, thin = True, priority_column = "priority"):
         if layout is None:
             layout = pp.heatmap.layouts.Simple()
         if orientation == "top":
@@ -25,13 +117,34 @@ class Ticks(pp.Grid):
                 margin_left=size, padding_width=0.0,  padding_height=layout.padding, margin_right = 0
             )
 
-        if label_column not in data.columns:
-            data[label_column] = data.index
+        if label_column in data.columns:
+            labels = data[label_column].values
+        else:
+            labels = data.index.values
 
         if "tick" not in data.columns:
-            data["tick"] = True
-        
-        for i, name, df, width in layout.iter(data):
+            tick = np.ones(len(data), dtype=bool)
+            priority = np.zeros(len(data))
+        elif pd.api.types.is_bool_dtype(data["tick"]):
+            tick = data["tick"].values
+            priority = np.zeros(len(data))
+        else:
+            priority = data["tick"].fillna(0).values.astype(float)
+            tick = priority != 0
+
+        if priority_column in data.columns:
+            priority = data[priority_column].values.astype(float)
+
+        colors = data["color"].values if "color" in data.columns else None
+
+        along_x = orientation in ["top", "bottom"]
+        # `rotation` only applies to labels along x, labels along y are always horizontal
+        if along_x:
+            rotation = 90 if rotation is None else rotation
+        else:
+            rotation = 0
+
+        for i, (name, positions, width) in enumerate(layout.partition(data)):
             if orientation == "top":
                 ax = self[0, i] = pp.Panel((width, 0.01))
             elif orientation == "right":
@@ -41,8 +154,17 @@ class Ticks(pp.Grid):
             elif orientation == "left":
                 ax = self[i, 0] = pp.Panel((0.01, width))
 
-            df["ix"] = np.arange(df.shape[0])
-            df_oi = df.loc[df["tick"]]
+            n = len(positions)
+            ix = np.flatnonzero(tick[positions])
+            if thin:
+                ix = select_ticks(
+                    n,
+                    ix,
+                    priority[positions[ix]],
+                    _label_extents(labels[positions[ix]], fontsize, rotation, along_x),
+                    width * 72,
+                )
+            selected = positions[ix]
 
             ax.axis("on")
             ax.set_xticks([])
@@ -50,52 +172,45 @@ class Ticks(pp.Grid):
             label_kwargs = dict(fontsize = fontsize)
             if orientation in ["top", "bottom"]:
                 label_kwargs = {
-                    "rotation": 90 if rotation is None else rotation,
+                    "rotation": rotation,
                     "ha": "center" if ha is None else ha,
                     "va": "top" if orientation == "bottom" else "bottom",
                     **label_kwargs
                 }
 
-                ax.set_xticks(df_oi["ix"])
-                ax.set_xticklabels(df_oi[label_column], **label_kwargs)
-                ax.set_xlim(-0.5, df.shape[0]-0.5)
+                ax.set_xticks(ix, labels[selected], **label_kwargs)
+                ax.set_xlim(-0.5, n-0.5)
 
                 ax.tick_params(axis = "x", size = 2, pad = 2)
 
                 if orientation == "top":
                     ax.xaxis.tick_top()
 
+                ticklabels = ax.get_xticklabels()
+
             elif orientation in ["right", "left"]:
-                ax.set_yticks(df_oi["ix"])
                 label_kwargs = {
                     "rotation": 0,
                     "ha": "left" if orientation == "right" else "right",
                     "va": "center",
                     **label_kwargs
                 }
-                ax.set_yticklabels(df_oi[label_column], **label_kwargs)
-                ax.set_ylim(df.shape[0]-0.5, -0.5)
+                ax.set_yticks(ix, labels[selected], **label_kwargs)
+                ax.set_ylim(n-0.5, -0.5)
                 ax.tick_params(axis = "y", size = 2, pad = 2)
 
-
-                # ax.tick_params(axis = "y", size = 0)
-
-                # ax.set_yticks(np.arange(df.shape[0])-0.5, minor = True)
-                # ax.tick_params(axis = "y", which = "minor", size = 5)
-
                 if orientation == "right":
                     ax.yaxis.tick_right()
 
+                ticklabels = ax.get_yticklabels()
+
             for spine in ax.spines.values():
                 spine.set_visible(False)
 
-            if "color" in data.columns:
-                for i, color in enumerate(df["color"]):
-                    if orientation in ["top", "bottom"]:
-                        ax.get_xticklabels()[i].set_color(color)
-                    elif orientation in ["right", "left"]:
-                        ax.get_yticklabels()[i].set_color(color)
-        
+            if colors is not None:
+                for label, color in zip(ticklabels, colors[selected]):
+                    label.set_color(color)
+
 
 class TicksLeft(Ticks):
     def __init__(self, data, layout = None, margin=0., size = 1, **kwargs):
@@ -2,11 +2,13 @@ from .page import Page
 from .server import create_app, main
 from . import components
 from .overview import OverviewGrid
+from .tiles import TileHeatmap
 from .examples import write_component_library, write_examples, write_overview_grid
 
 __all__ = [
     "Page",
     "OverviewGrid",
+    "TileHeatmap",
     "components",
     "create_app",
     "main",
@@ -0,0 +1,149 @@
+(function () {
+  const config = JSON.parse(document.getElementById("polyptich-tiles-config").textContent);
+  const canvas = document.getElementById("tiles-canvas");
+  const rowLabels = document.getElementById("tiles-row-labels");
+  const colLabels = document.getElementById("tiles-col-labels");
+  const summary = document.getElementById("tiles-summary");
+  const context = canvas.getContext("2d");
+  const [nRows, nCols] = config.shape;
+  const tileSize = config.tileSize;
+  const minLabelSpacing = 12;
+  const tiles = new Map();
+  const labels = { rows: new Map(), cols: new Map() };
+  const state = { scale: 1, x: 0, y: 0, drag: null, labelTimer: null };
+
+  function el(tag, attrs = {}, children = []) {
+    const node = document.createElement(tag);
+    for (const [key, value] of Object.entries(attrs)) {
+      if (value === undefined || value === null) continue;
+      if (key === "class") node.className = value;
+      else if (key === "style") node.style.cssText = value;
+      else node.setAttribute(key, value);
+    }
+    for (const child of children) node.append(child);
+    return node;
+  }
+
+  function fit() {
+    const rect = canvas.getBoundingClientRect();
+    state.scale = Math.min(rect.width / nCols, rect.height / nRows);
+    state.x = 0;
+    state.y = 0;
+  }
+
+  function level() {
+    // cells per tile pixel is 2 ** (maxLevel - level), pick the level closest to one screen pixel
+    const k = Math.max(0, Math.min(config.maxLevel, Math.floor(Math.log2(1 / state.scale))));
+    return { level: config.maxLevel - k, factor: 2 ** k };
+  }
+
+  function tile(levelIndex, ty, tx) {
+    const key = levelIndex + "/" + ty + "/" + tx;
+    if (!tiles.has(key)) {
+      const image = new Image();
+      image.onload = () => requestAnimationFrame(draw);
+      image.src = new URL("tiles/" + key + ".png", window.location.href).toString();
+      tiles.set(key, image);
+    }
+    return tiles.get(key);
+  }
+
+  function draw() {
+    const rect = canvas.getBoundingClientRect();
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = Math.round(rect.width * ratio);
+    canvas.height = Math.round(rect.height * ratio);
+    context.setTransform(ratio, 0, 0, ratio, 0, 0);
+    context.imageSmoothingEnabled = false;
+    context.clearRect(0, 0, rect.width, rect.height);
+
+    const { level: levelIndex, factor } = level();
+    const span = tileSize * factor;
+    const tx0 = Math.max(0, Math.floor(state.x / span));
+    const ty0 = Math.max(0, Math.floor(state.y / span));
+    const tx1 = Math.min(Math.ceil(nCols / span), Math.ceil((state.x + rect.width / state.scale) / span));
+    const ty1 = Math.min(Math.ceil(nRows / span), Math.ceil((state.y + rect.height / state.scale) / span));
+    for (let ty = ty0; ty < ty1; ty++) {
+      for (let tx = tx0; tx < tx1; tx++) {
+        const image = tile(levelIndex, ty, tx);
+        if (!image.complete || !image.naturalWidth) continue;
+        const size = span * state.scale;
+        context.drawImage(image, (tx * span - state.x) * state.scale, (ty * span - state.y) * state.scale, size, size);
+      }
+    }
+    summary.textContent = `${nRows.toLocaleString()} × ${nCols.toLocaleString()} · zoom level ${levelIndex} of ${config.maxLevel}`;
+    scheduleLabels();
+  }
+
+  function scheduleLabels() {
+    clearTimeout(state.labelTimer);
+    state.labelTimer = setTimeout(drawLabels, 80);
+  }
+
+  async function fetchLabels(axis, start, stop) {
+    const key = start + ":" + stop;
+    if (!labels[axis].has(key)) {
+      const url = new URL("labels/" + axis, window.location.href);
+      url.searchParams.set("start", start);
+      url.searchParams.set("stop", stop);
+      labels[axis].set(key, fetch(url).then((response) => response.json()));
+    }
+    return labels[axis].get(key);
+  }
+
+  async function drawAxisLabels(axis, container, offset, length, total, vertical) {
+    container.replaceChildren();
+    if (state.scale < minLabelSpacing) return;
+    const start = Math.max(0, Math.floor(offset));
+    const stop = Math.min(total, Math.ceil(offset + length / state.scale));
+    const data = await fetchLabels(axis, start, stop);
+    const nodes = data.labels.map((label, i) => {
+      const position = (data.start + i + 0.5 - offset) * state.scale;
+      return el("span", { class: "tiles-label", style: (vertical ? "top: " : "left: ") + position + "px", title: label }, [label]);
+    });
+    container.replaceChildren(...nodes);
+  }
+
+  function drawLabels() {
+    const rect = canvas.getBoundingClientRect();
+    drawAxisLabels("rows", rowLabels, state.y, rect.height, nRows, true);
+    drawAxisLabels("cols", colLabels, state.x, rect.width, nCols, false);
+  }
+
+  canvas.addEventListener("wheel", (event) => {
+    event.preventDefault();
+    const rect = canvas.getBoundingClientRect();
+    const px = event.clientX - rect.left;
+    const py = event.clientY - rect.top;
+    const cellX = state.x + px / state.scale;
+    const cellY = state.y + py / state.scale;
+    state.scale = Math.min(64, Math.max(1e-4, state.scale * Math.exp(-event.deltaY * 0.002)));
+    state.x = cellX - px / state.scale;
+    state.y = cellY - py / state.scale;
+    requestAnimationFrame(draw);
+  }, { passive: false });
+
+  canvas.addEventListener("pointerdown", (event) => {
+    state.drag = { x: event.clientX, y: event.clientY, startX: state.x, startY: state.y };
+    canvas.setPointerCapture(event.pointerId);
+    canvas.classList.add("dragging");
+  });
+  canvas.addEventListener("pointermove", (event) => {
+    if (!state.drag) return;
+    state.x = state.drag.startX - (event.clientX - state.drag.x) / state.scale;
+    state.y = state.drag.startY - (event.clientY - state.drag.y) / state.scale;
+    requestAnimationFrame(draw);
+  });
+  canvas.addEventListener("pointerup", () => {
+    state.drag = null;
+    canvas.classList.remove("dragging");
+  });
+  canvas.addEventListener("dblclick", () => {
+    fit();
+    requestAnimationFrame(draw);
+  });
+  window.addEventListener("resize", () => requestAnimationFrame(draw));
+
+  fit();
+  draw();
+})();
@@ -0,0 +1,359 @@
+import json
+import math
+import os
+import shutil
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from flask import abort, jsonify, redirect, request, send_file
+
+
+ENDPOINT_SCHEMA = "polyptich.www.endpoint"
+TILE_SIZE = 256
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _is_tile_heatmap(path):
+    """
+    Whether a directory contains the manifest of a tile heatmap
+    """
+    try:
+        manifest = json.loads((Path(path) / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return False
+    return (
+        isinstance(manifest, dict)
+        and manifest.get("schema") == ENDPOINT_SCHEMA
+        and manifest.get("handler") == "polyptich.www.tiles:TileHeatmapEndpoint"
+    )
+
+
+class TileHeatmap:
+    """
+    Multi-resolution tile pyramid of a large heatmap, served by `polyptich-www` as an endpoint in
+    which the heatmap can be panned and zoomed.
+
+    Every zoom level halves the resolution of the previous one by averaging blocks of 2x2 values,
+    until the whole heatmap fits in one tile. Levels are stored as colormap lookup table indices
+    (see `polyptich.colormaps.quantize`), and tiles are rendered from them as PNG when they are
+    first requested, or upfront with `write_tiles`.
+
+    Parameters
+    ----------
+    path : str or Path
+        Directory of the endpoint, inside a `www` folder
+    values : np.ndarray
+        The [n_rows, n_cols] matrix, as displayed. Can be memory-mapped, it is read in chunks of
+        rows.
+    row_labels : list
+        Label of each row
+    col_labels : list
+        Label of each column
+    cmap : str or matplotlib.colors.Colormap
+        Colormap
+    norm : matplotlib.colors.Normalize
+        Normalization of the values. Defaults to the minimum and maximum.
+    row_order : np.ndarray
+        Order in which the rows are displayed
+    col_order : np.ndarray
+        Order in which the columns are displayed
+    tile_size : int
+        Size of a tile in pixels
+    chunk_size : int
+        Approximate number of values that are processed at once
+    overwrite : bool
+        Whether to replace an existing tile heatmap at `path`. Directories that do not contain a
+        tile heatmap manifest are never removed.
+    """
+
+    def __init__(
+        self,
+        path,
+        values,
+        row_labels=None,
+        col_labels=None,
+        cmap="viridis",
+        norm=None,
+        title=None,
+        description=None,
+        row_order=None,
+        col_order=None,
+        tile_size=TILE_SIZE,
+        chunk_size=2**22,
+        overwrite=False,
+    ):
+        import matplotlib as mpl
+        from ..colormaps import lut
+
+        self.path = Path(path)
+        if self.path.exists() and any(self.path.iterdir()):
+            if not overwrite:
+                raise FileExistsError(
+                    f"{self.path} already exists, use overwrite=True to replace it"
+                )
+            # only remove a previous tile heatmap, never an unrelated directory
+            if not _is_tile_heatmap(self.path):
+                raise FileExistsError(f"{self.path} exists and is not a tile heatmap")
+            shutil.rmtree(self.path)
+        (self.path / "levels").mkdir(parents=True, exist_ok=True)
+
+        row_order = np.arange(values.shape[0]) if row_order is None else np.asarray(row_order)
+        col_order = np.arange(values.shape[1]) if col_order is None else np.asarray(col_order)
+        cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+        if norm is None or not norm.scaled():
+            norm = _min_max_norm(values, norm, chunk_size)
+        np.save(self.path / "lut.npy", lut(cmap))
+
+        row_labels = range(values.shape[0]) if row_labels is None else row_labels
+        col_labels = range(values.shape[1]) if col_labels is None else col_labels
+        row_labels = [str(label) for label in np.asarray(row_labels, dtype=object)[row_order]]
+        col_labels = [str(label) for label in np.asarray(col_labels, dtype=object)[col_order]]
+        (self.path / "rows.json").write_text(json.dumps(row_labels))
+        (self.path / "cols.json").write_text(json.dumps(col_labels))
+
+        shape = (len(row_order), len(col_order))
+        max_level = max(0, math.ceil(math.log2(max(max(shape) / tile_size, 1))))
+        levels = _write_levels(
+            self.path / "levels",
+            values,
+            row_order,
+            col_order,
+            max_level,
+            cmap,
+            norm,
+            tile_size,
+            chunk_size,
+        )
+
+        self.manifest = {
+            "schema": ENDPOINT_SCHEMA,
+            "schema_version": 1,
+            "handler": "polyptich.www.tiles:TileHeatmapEndpoint",
+            "title": title or self.path.name,
+            "description": description,
+            "created_at": _now(),
+            "updated_at": _now(),
+            "shape": list(shape),
+            "tile_size": tile_size,
+            "max_level": max_level,
+            "levels": levels,
+            "rows": "rows.json",
+            "cols": "cols.json",
+        }
+        (self.path / "manifest.json").write_text(json.dumps(self.manifest, indent=2))
+
+    def write_tiles(self, processes=None):
+        """
+        Render all tiles of all levels, in a pool of `processes` processes
+        """
+        tasks = [
+            (str(self.path), level["level"], ty, tx, self.manifest["tile_size"])
+            for level in self.manifest["levels"]
+            for ty in range(level["n_tiles"][0])
+            for tx in range(level["n_tiles"][1])
+        ]
+        if processes == 1:
+            return [_render_tile(*task) for task in tasks]
+        with ProcessPoolExecutor(processes) as executor:
+            return list(executor.map(_render_tile, *zip(*tasks)))
+
+
+def _min_max_norm(values, norm, chunk_size):
+    import matplotlib as mpl
+
+    step = max(chunk_size // max(values.shape[1], 1), 1)
+    vmin, vmax = np.inf, -np.inf
+    for start in range(0, values.shape[0], step):
+        chunk = np.asarray(values[start : start + step], dtype=float)
+        if np.isnan(chunk).all():
+            continue
+        vmin, vmax = min(vmin, np.nanmin(chunk)), max(vmax, np.nanmax(chunk))
+    if norm is None:
+        return mpl.colors.Normalize(vmin=vmin, vmax=vmax)
+    norm.vmin = vmin if norm.vmin is None else norm.vmin
+    norm.vmax = vmax if norm.vmax is None else norm.vmax
+    return norm
+
+
+def _downsample(values):
+    """
+    Average blocks of 2x2 values, ignoring NaN
+    """
+    h, w = values.shape
+    padded = np.full((h + h % 2, w + w % 2), np.nan, dtype=np.float32)
+    padded[:h, :w] = values
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    counts = (~np.isnan(blocks)).sum((1, 3))
+    sums = np.nansum(blocks, (1, 3))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+
+def _write_levels(
+    path, values, row_order, col_order, max_level, cmap, norm, tile_size, chunk_size
+):
+    from ..colormaps import quantize
+
+    dtype = np.uint8 if cmap.N + 3 <= 256 else np.uint16
+    levels = []
+    source = None
+    shape = (len(row_order), len(col_order))
+    for level in range(max_level, -1, -1):
+        indices = np.lib.format.open_memmap(
+            path / f"{level}.npy", mode="w+", dtype=dtype, shape=shape
+        )
+        next_shape = ((shape[0] + 1) // 2, (shape[1] + 1) // 2)
+        downsampled = None
+        if level > 0:
+            downsampled = np.lib.format.open_memmap(
+                path / f"{level - 1}.values.npy", mode="w+", dtype=np.float32, shape=next_shape
+            )
+
+        # an even number of rows per chunk, so that chunks can be downsampled independently
+        step = max(chunk_size // max(shape[1], 1), 2) // 2 * 2
+        for start in range(0, shape[0], step):
+            if source is None:
+                chunk = np.asarray(values[row_order[start : start + step]])[:, col_order]
+            else:
+                chunk = np.asarray(source[start : start + step])
+            quantize(chunk, cmap, norm, out=indices[start : start + step])
+            if downsampled is not None:
+                downsampled[start // 2 : (start + step) // 2] = _downsample(chunk)
+
+        indices.flush()
+        del indices
+        levels.append(
+            {
+                "level": level,
+                "shape": list(shape),
+                "scale": 2 ** (max_level - level),
+                "n_tiles": [math.ceil(shape[0] / tile_size), math.ceil(shape[1] / tile_size)],
+            }
+        )
+        if source is not None:
+            source_path = Path(source.filename)
+            del source
+            source_path.unlink()
+        source = downsampled
+        shape = next_shape
+    return levels[::-1]
+
+
+def _render_tile(path, level, ty, tx, tile_size=TILE_SIZE):
+    """
+    Render a tile of a level as PNG, if it does not exist yet, and return its path
+    """
+    import matplotlib.image
+
+    path = Path(path)
+    tile_path = path / "tiles" / str(level) / f"{ty}_{tx}.png"
+    if tile_path.exists():
+        return tile_path
+    indices = np.load(path / "levels" / f"{level}.npy", mmap_mode="r")
+    block = np.asarray(
+        indices[ty * tile_size : (ty + 1) * tile_size, tx * tile_size : (tx + 1) * tile_size]
+    )
+    if block.size == 0:
+        return None
+    rgba = np.zeros((tile_size, tile_size, 4), dtype=np.uint8)
+    rgba[: block.shape[0], : block.shape[1]] = np.load(path / "lut.npy")[block]
+
+    tile_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = tile_path.with_name(f"{tile_path.name}.{os.getpid()}.tmp")
+    matplotlib.image.imsave(temporary, rgba, format="png")
+    temporary.replace(tile_path)
+    return tile_path
+
+
+class TileHeatmapEndpoint:
+    def __init__(self, path, mount_path, manifest):
+        self.path = Path(path)
+        self.mount_path = mount_path
+        self.manifest = manifest
+        self._labels = {}
+
+    def register(self, app, mount_url, endpoint_name):
+        app.add_url_rule(mount_url, endpoint_name + "_redirect", self.redirect_to_slash)
+        app.add_url_rule(mount_url + "/", endpoint_name, self.index)
+        app.add_url_rule(
+            mount_url + "/tiles/<int:level>/<int:ty>/<int:tx>.png", endpoint_name + "_tile", self.tile
+        )
+        app.add_url_rule(mount_url + "/labels/<axis>", endpoint_name + "_labels", self.labels)
+
+    def redirect_to_slash(self):
+        return redirect(request.path.rstrip("/") + "/")
+
+    def index(self):
+        title = _escape(self.manifest.get("title") or self.path.name)
+        description = self.manifest.get("description")
+        subtitle = f'<p class="subtitle">{_escape(description)}</p>' if description else ""
+        config = json.dumps(
+            {
+                "shape": self.manifest["shape"],
+                "tileSize": self.manifest["tile_size"],
+                "maxLevel": self.manifest["max_level"],
+            }
+        )
+        return f"""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>{title}</title>
+  <link rel="stylesheet" href="/static/polyptich-www.css">
+</head>
+<body>
+  <main class="overview-shell">
+    <header class="report-header">
+      <h1>{title}</h1>
+      {subtitle}
+    </header>
+    <div class="overview-summary" id="tiles-summary"></div>
+    <section class="tiles-viewer">
+      <div class="tiles-col-labels" id="tiles-col-labels"></div>
+      <div class="tiles-row-labels" id="tiles-row-labels"></div>
+      <canvas class="tiles-canvas" id="tiles-canvas"></canvas>
+    </section>
+  </main>
+  <script id="polyptich-tiles-config" type="application/json">{config}</script>
+  <script src="/static/polyptich-tiles.js"></script>
+</body>
+</html>"""
+
+    def tile(self, level, ty, tx):
+        if level < 0 or level > self.manifest["max_level"]:
+            abort(404)
+        tile_path = _render_tile(self.path, level, ty, tx, self.manifest["tile_size"])
+        if tile_path is None:
+            abort(404)
+        return send_file(tile_path, mimetype="image/png")
+
+    def labels(self, axis):
+        if axis not in {"rows", "cols"}:
+            abort(404)
+        if axis not in self._labels:
+            self._labels[axis] = json.loads((self.path / self.manifest[axis]).read_text())
+        labels = self._labels[axis]
+        start = _int_arg("start", 0)
+        stop = min(_int_arg("stop", len(labels)), start + 1000)
+        return jsonify({"start": start, "labels": labels[start:stop], "total": len(labels)})
+
+
+def _int_arg(name, default):
+    try:
+        return max(0, int(request.args.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _escape(value):
+    import html
+
+    return html.escape(str(value), quote=True)
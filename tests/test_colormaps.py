@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+mpl = pytest.importorskip("matplotlib")
+
+from polyptich import colormaps
+
+
+@pytest.mark.parametrize("cmap", ["magma", colormaps.Sets])
+def test_to_rgba_matches_matplotlib(cmap):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(40, 70))
+    values[0, :5] = [np.nan, -10, 10, -2, 2]
+    norm = mpl.colors.Normalize(-2, 2)
+
+    rgba = colormaps.to_rgba(values, cmap, norm, chunk_size=333)
+
+    cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    assert rgba.dtype == np.uint8
+    np.testing.assert_array_equal(rgba, cmap(norm(values), bytes=True))
+
+
+@pytest.mark.parametrize(
+    "norm, values",
+    [
+        (mpl.colors.BoundaryNorm([0, 1, 2, 3, 4], 4), [0.5, 1.5, 2.5, 3.5, -1, 5, np.nan]),
+        (mpl.colors.NoNorm(), [0, 1, 2, 3, -1, 7]),
+    ],
+)
+def test_to_rgba_of_norms_returning_indices(norm, values):
+    cmap = mpl.colormaps["viridis"].resampled(4)
+    values = np.array(values)
+
+    rgba = colormaps.to_rgba(values, cmap, norm)
+
+    np.testing.assert_array_equal(rgba, cmap(norm(values), bytes=True))
+    np.testing.assert_array_equal(
+        colormaps.lut(cmap)[colormaps.quantize(values, cmap, norm)], rgba
+    )
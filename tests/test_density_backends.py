@@ -0,0 +1,88 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich import density
+from polyptich.density import numpy_backend
+from test_density_binned import exact_kde_1d, exact_kde_2d
+
+
+def test_numpy_backend_is_exact_in_chunks():
+    points = np.random.default_rng(0).beta(2, 5, (500, 2))
+
+    result, _, _ = numpy_backend.kde_2d_reflection(points, (0, 1, 0, 1), 0.05, 40, chunk_size=1000)
+    np.testing.assert_allclose(result, exact_kde_2d(points, (0, 1, 0, 1), 0.05, 40))
+
+    result, _ = numpy_backend.kde_1d_reflection(points[:, 0], (0, 1), 0.05, 40, chunk_size=1000)
+    np.testing.assert_allclose(result, exact_kde_1d(points[:, 0], (0, 1), 0.05, 40))
+
+
+def test_exact_method_uses_numpy_backend_by_default():
+    points = np.random.default_rng(1).normal(size=(100, 2))
+
+    exact, _, _ = density.kde_2d(points, (-3, 3, -3, 3), 0.5, 30, method="exact")
+
+    np.testing.assert_allclose(exact, exact_kde_2d(points, (-3, 3, -3, 3), 0.5, 30))
+    with pytest.raises(ValueError):
+        density.kde_2d(points, (-3, 3, -3, 3), 0.5, method="unknown")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("jax") is not None, reason="jax is installed")
+def test_jax_backend_is_optional():
+    with pytest.raises(RuntimeError, match="Install jax"):
+        density.kde_1d(np.zeros(3), (0, 1), 0.1, method="exact", backend="jax")
+    with pytest.raises(ValueError):
+        density.set_backend("torch")
+
+
+def test_jax_backend_reuses_executables_per_bucket():
+    pytest.importorskip("jax")
+    from polyptich.density import jax_backend
+
+    rng = np.random.default_rng(2)
+    jax_backend.timings.clear()
+    for n in [300, 301, 450]:
+        points = rng.beta(2, 5, (n, 2))
+        result, _, _ = jax_backend.kde_2d_reflection(points, (0, 1, 0, 1), 0.05, 30)
+        expected = exact_kde_2d(points, (0, 1, 0, 1), 0.05, 30)
+        np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-5 * expected.max())
+
+    assert [timing["bucket"] for timing in jax_backend.timings] == [512, 512, 512]
+    assert [timing["compile_time"] == 0 for timing in jax_backend.timings][1:] == [True, True]
+
+
+@pytest.mark.parametrize(
+    "method, backend",
+    [
+        ("binned", None),
+        ("exact", "numpy"),
+        pytest.param(
+            "exact",
+            "jax",
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("jax") is None, reason="jax is not installed"
+            ),
+        ),
+    ],
+)
+def test_weights_match_repeated_points(method, backend):
+    rng = np.random.default_rng(2)
+    points = rng.beta(2, 5, (200, 2))
+    counts = rng.integers(0, 4, 200)
+    repeated = np.repeat(points, counts, axis=0)
+    tolerance = {"rtol": 1e-4, "atol": 1e-5} if backend == "jax" else {}
+
+    weighted, _, _ = density.kde_2d(
+        points, (0, 1, 0, 1), 0.1, 30, method=method, backend=backend, weights=counts
+    )
+    expected, _, _ = density.kde_2d(repeated, (0, 1, 0, 1), 0.1, 30, method=method, backend=backend)
+    np.testing.assert_allclose(weighted, expected, **tolerance)
+
+    weighted, _ = density.kde_1d(
+        points[:, 0], (0, 1), 0.1, 30, method=method, backend=backend, weights=counts / 7
+    )
+    expected, _ = density.kde_1d(repeated[:, 0], (0, 1), 0.1, 30, method=method, backend=backend)
+    np.testing.assert_allclose(weighted, expected, **tolerance)
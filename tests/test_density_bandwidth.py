@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich import density
+from polyptich.density import bandwidth
+
+
+def test_rules_of_thumb():
+    x = np.random.default_rng(0).normal(size=10000)
+    n_factor = len(x) ** (-1 / 5)
+
+    np.testing.assert_allclose(
+        density.select_bandwidth(x, (-6, 6), "scott"), 1.059 * x.std() * n_factor, rtol=1e-2
+    )
+    iqr = np.subtract(*np.percentile(x, [75, 25]))
+    np.testing.assert_allclose(
+        density.select_bandwidth(x, (-6, 6), "silverman"),
+        0.9 * min(x.std(), iqr / 1.349) * n_factor,
+        rtol=1e-2,
+    )
+    with pytest.raises(ValueError):
+        density.select_bandwidth(x, (-6, 6), "unknown")
+
+
+def test_isj_adapts_to_multimodal_data():
+    rng = np.random.default_rng(1)
+    normal = rng.normal(size=10000)
+    bimodal = np.concatenate([rng.normal(-2, 0.3, 5000), rng.normal(2, 0.3, 5000)])
+
+    # close to the optimal bandwidth for normal data, 1.059 n^(-1/5)
+    np.testing.assert_allclose(density.select_bandwidth(normal, (-6, 6), "isj"), 0.168, rtol=0.1)
+    # much narrower than the rules of thumb, which assume a single mode
+    assert density.select_bandwidth(bimodal, (-6, 6), "isj") < 0.3 * density.select_bandwidth(
+        bimodal, (-6, 6), "silverman"
+    )
+    # too few samples for a fixed point falls back to Silverman's rule
+    assert np.isfinite(density.select_bandwidth(normal[:3], (-6, 6), "isj"))
+
+
+def test_bandwidths_of_features_and_pairs_are_vectorized():
+    rng = np.random.default_rng(2)
+    Z = rng.beta(2, 5, (2000, 3)) * [1, 0.5, 0.25]
+    pairs = [(0, 1), (1, 2), (0, 2)]
+
+    bandwidths = density.select_bandwidth(Z, (0, 1), "isj")
+    for i in range(Z.shape[1]):
+        np.testing.assert_allclose(bandwidths[i], density.select_bandwidth(Z[:, i], (0, 1), "isj"))
+    assert bandwidths[0] > bandwidths[1] > bandwidths[2]
+
+    pair_bandwidths = density.select_pairwise_bandwidth(Z, (0, 1), "scott", pairs)
+    std = Z.std(0)
+    expected = np.sqrt([std[0] * std[1], std[1] * std[2], std[0] * std[2]]) * 2000 ** (-1 / 6)
+    np.testing.assert_allclose(pair_bandwidths, expected, rtol=2e-2)
+
+
+def test_densities_with_selected_bandwidths():
+    Z = np.random.default_rng(3).beta(2, 5, (1000, 3))
+    pairs = [(0, 1), (0, 2), (1, 2)]
+
+    densities, _, _ = density.pairwise_kde_2d(Z, (0, 1), "isj", 30)
+    bandwidths = density.select_pairwise_bandwidth(Z, (0, 1), "isj")
+    for density_2d, (i, j), h in zip(densities, pairs, bandwidths):
+        expected, _, _ = density.kde_2d(Z[:, [i, j]], (0, 1, 0, 1), h, 30)
+        np.testing.assert_allclose(density_2d, expected, atol=1e-10)
+
+    accumulator = density.accumulate_density(iter([Z[:500], Z[500:]]), (0, 1), 30)
+    densities_1d, _ = accumulator.marginal_kde_1d("silverman")
+    expected = bandwidth.bandwidths_from_counts(
+        accumulator.counts_1d, accumulator.totals_1d, (0, 1), "silverman"
+    )
+    for i in range(Z.shape[1]):
+        np.testing.assert_allclose(
+            densities_1d[i], density.kde_1d(Z[:, i], (0, 1), expected[i], 30)[0], atol=1e-10
+        )
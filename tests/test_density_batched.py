@@ -0,0 +1,105 @@
+import importlib.util
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich import density
+
+
+def data_with_missing(seed=0):
+    rng = np.random.default_rng(seed)
+    Z = rng.beta(2, 5, (400, 4))
+    Z[rng.random(Z.shape) < 0.1] = np.nan
+    return Z
+
+
+def per_pair(Z, pairs, **kwargs):
+    densities = []
+    for i, j in pairs:
+        points = Z[:, [i, j]]
+        points = points[~np.isnan(points).any(axis=1)]
+        densities.append(density.kde_2d(points, (0, 1, 0, 1), 0.1, 30, **kwargs)[0])
+    return np.stack(densities)
+
+
+@pytest.mark.parametrize("method", ["binned", "exact"])
+def test_pairwise_kde_2d_matches_per_pair(method):
+    Z = data_with_missing()
+    pairs = list(combinations(range(Z.shape[1]), 2))
+
+    densities, grid_x, grid_y = density.pairwise_kde_2d(
+        Z, (0, 1), 0.1, 30, method=method, batch_size=4
+    )
+
+    assert densities.shape == (len(pairs), 30, 30)
+    np.testing.assert_allclose(densities, per_pair(Z, pairs, method=method), atol=1e-10)
+    np.testing.assert_allclose(grid_x[:, 0], np.linspace(0, 1, 30))
+
+
+def test_pairwise_kde_2d_in_process_pool():
+    Z = data_with_missing(1)
+    pairs = [(0, 1), (2, 3), (1, 3)]
+
+    densities, _, _ = density.pairwise_kde_2d(Z, (0, 1), 0.1, 30, pairs, method="exact", n_jobs=2)
+
+    np.testing.assert_allclose(densities, per_pair(Z, pairs, method="exact"))
+
+
+@pytest.mark.skipif(importlib.util.find_spec("jax") is None, reason="jax is not installed")
+def test_pairwise_kde_2d_jax_batches():
+    Z = data_with_missing(2)
+    pairs = list(combinations(range(Z.shape[1]), 2))
+
+    densities, _, _ = density.pairwise_kde_2d(
+        Z, (0, 1), 0.1, 30, method="exact", backend="jax", batch_size=4
+    )
+
+    np.testing.assert_allclose(
+        densities, per_pair(Z, pairs, method="exact"), rtol=1e-3, atol=1e-4
+    )
+
+
+
+@pytest.mark.skipif(importlib.util.find_spec("jax") is None, reason="jax is not installed")
+def test_pairwise_kde_2d_follows_set_backend():
+    from polyptich.density import jax_backend
+
+    Z = data_with_missing(3)
+    jax_backend.timings.clear()
+    density.set_backend("jax")
+    try:
+        density.pairwise_kde_2d(Z, (0, 1), 0.1, 30, method="exact", batch_size=4)
+    finally:
+        density.set_backend("numpy")
+
+    assert len(jax_backend.timings) > 0
+
+
+@pytest.mark.parametrize("method", ["binned", "exact"])
+def test_marginal_kde_1d_matches_per_feature(method):
+    Z = data_with_missing(3)
+
+    densities, grid_points = density.marginal_kde_1d(Z, (0, 1), 0.1, 30, method=method)
+
+    for i in range(Z.shape[1]):
+        values = Z[:, i][~np.isnan(Z[:, i])]
+        expected, _ = density.kde_1d(values, (0, 1), 0.1, 30, method=method)
+        np.testing.assert_allclose(densities[i], expected, atol=1e-10)
+
+
+@pytest.mark.parametrize("method", ["binned", "exact"])
+def test_pairwise_kde_2d_with_weights(method):
+    Z = data_with_missing(4)
+    weights = np.random.default_rng(4).integers(0, 3, len(Z))
+    repeated = np.repeat(Z, weights, axis=0)
+
+    densities, _, _ = density.pairwise_kde_2d(Z, (0, 1), 0.1, 30, method=method, weights=weights)
+    expected, _, _ = density.pairwise_kde_2d(repeated, (0, 1), 0.1, 30, method=method)
+    np.testing.assert_allclose(densities, expected, atol=1e-10)
+
+    densities, _ = density.marginal_kde_1d(Z, (0, 1), 0.1, 30, method=method, weights=weights)
+    expected, _ = density.marginal_kde_1d(repeated, (0, 1), 0.1, 30, method=method)
+    np.testing.assert_allclose(densities, expected, atol=1e-10)
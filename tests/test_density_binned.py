@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich.density import binned
+
+
+def exact_kde_1d(points, boundaries, bandwidth, grid_size):
+    xmin, xmax = boundaries
+    reflected = np.concatenate([points, 2 * xmin - points, 2 * xmax - points])
+    grid = np.linspace(xmin, xmax, grid_size)
+    kernel = np.exp(-0.5 * ((grid[:, None] - reflected) / bandwidth) ** 2)
+    return kernel.sum(1) / (len(points) * bandwidth * np.sqrt(2 * np.pi))
+
+
+def exact_kde_2d(points, boundaries, bandwidth, grid_size):
+    xmin, xmax, ymin, ymax = boundaries
+    x, y = points[:, 0], points[:, 1]
+    reflected = np.concatenate(
+        [
+            np.stack([rx, ry], 1)
+            for rx in [x, 2 * xmin - x, 2 * xmax - x]
+            for ry in [y, 2 * ymin - y, 2 * ymax - y]
+        ]
+    )
+    grid_x, grid_y = np.meshgrid(
+        np.linspace(xmin, xmax, grid_size), np.linspace(ymin, ymax, grid_size), indexing="ij"
+    )
+    sq_dist = (grid_x.ravel()[:, None] - reflected[:, 0]) ** 2 + (
+        grid_y.ravel()[:, None] - reflected[:, 1]
+    ) ** 2
+    density = np.exp(-0.5 * sq_dist / bandwidth**2).sum(1).reshape(grid_size, grid_size)
+    return density / (len(points) * bandwidth**2 * 2 * np.pi)
+
+
+def test_linear_binning_preserves_mass_and_mean():
+    points = np.random.default_rng(0).uniform(-1, 2, (1000, 2))
+
+    counts = binned.linear_binning(points, (0, 1, 0, 1), 11)
+
+    inside = ((points >= 0) & (points <= 1)).all(1)
+    assert counts.sum() == pytest.approx(inside.sum())
+    grid = np.linspace(0, 1, 11)
+    assert (counts.sum(1) * grid).sum() == pytest.approx(points[inside, 0].sum())
+
+
+def test_binned_kde_1d_matches_exact():
+    points = np.random.default_rng(1).beta(2, 5, 2000)
+
+    density, grid = binned.kde_1d_reflection_binned(points, (0, 1), 0.05, 100)
+
+    expected = exact_kde_1d(points, (0, 1), 0.05, 100)
+    np.testing.assert_allclose(grid, np.linspace(0, 1, 100))
+    np.testing.assert_allclose(density, expected, atol=2e-3 * expected.max())
+
+
+@pytest.mark.parametrize("bandwidth", [0.05, 0.1, 0.6])
+def test_binned_kde_2d_matches_exact(bandwidth):
+    points = np.random.default_rng(2).beta(2, 5, (1000, 2)) * [2, 1] - [1, 0]
+
+    density, grid_x, grid_y = binned.kde_2d_reflection_binned(points, (-1, 1, 0, 1), bandwidth, 80)
+
+    expected = exact_kde_2d(points, (-1, 1, 0, 1), bandwidth, 80)
+    assert grid_x[1, 0] > grid_x[0, 0] and grid_y[0, 1] > grid_y[0, 0]
+    np.testing.assert_allclose(density, expected, atol=1e-2 * expected.max())
+
+
+
+def plotted_densities(fig):
+    """
+    Highest contour level of each 2D panel, and the density curve of each 1D panel
+    """
+    result = []
+    for ax in fig.axes:
+        if ax.lines:
+            result.append(np.concatenate([ax.lines[0].get_xdata(), ax.lines[0].get_ydata()]))
+        else:
+            result.append(max(c.levels.max() for c in ax.collections if hasattr(c, "levels")))
+    return result
+
+
+@pytest.mark.parametrize("plot", ["plot_all_pairwise_kde", "plot_corner_kde"])
+def test_binned_plots_match_exact_plots(plot):
+    from polyptich import density
+
+    Z = np.random.default_rng(4).beta(2, 5, (300, 3))
+
+    densities = {}
+    for method in ["exact", "binned"]:
+        fig = getattr(density, plot)(Z, (0, 1), 0.1, grid_size=30, method=method)
+        fig.plot()
+        densities[method] = plotted_densities(fig)
+        fig.close()
+
+    assert len(densities["exact"]) == len(densities["binned"]) > 0
+    for exact, binned in zip(densities["exact"], densities["binned"]):
+        np.testing.assert_allclose(binned, exact, rtol=2e-2, atol=2e-2 * np.max(exact))
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich import density
+from polyptich.density import bandwidth
+
+
+def test_grouped_kde_matches_kde_of_each_group():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 4, 5000)
+    values = rng.normal(groups, 0.5)
+    weights = rng.uniform(0, 2, 5000)
+    values[0] = np.nan
+    groups[1] = -1
+
+    densities, grid_points = density.grouped_kde_1d(
+        values, groups, (-2, 6), 0.3, 100, n_groups=5, weights=weights
+    )
+
+    assert densities.shape == (5, 100)
+    for i in range(4):
+        included = (groups == i) & ~np.isnan(values)
+        expected, expected_grid = density.kde_1d(
+            values[included], (-2, 6), 0.3, 100, weights=weights[included]
+        )
+        np.testing.assert_allclose(densities[i], expected, atol=1e-6)
+    np.testing.assert_allclose(grid_points, expected_grid)
+    # a group without values
+    assert (densities[4] == 0).all()
+
+
+def test_grouped_kde_selects_the_bandwidth_of_each_group():
+    rng = np.random.default_rng(1)
+    groups = np.repeat([0, 1], 2000)
+    values = rng.normal(0, np.where(groups == 0, 0.2, 1.0))
+
+    densities, _ = density.grouped_kde_1d(values, groups, (-5, 5), "silverman", 200)
+
+    counts = np.stack([np.histogram(values[groups == i], 200, (-5, 5))[0] for i in range(2)])
+    expected = bandwidth.bandwidths_from_counts(counts, [2000, 2000], (-5, 5), "silverman")
+    assert expected[0] < 0.5 * expected[1]
+    for i in range(2):
+        np.testing.assert_allclose(
+            densities[i],
+            density.kde_1d(values[groups == i], (-5, 5), expected[i], 200)[0],
+            atol=2e-2 * densities[i].max(),
+        )
+
+
+def test_ridgeline_shares_the_normalization_of_all_groups():
+    rng = np.random.default_rng(2)
+    labels = np.array(["b", "a", "c"])[rng.integers(0, 3, 3000)]
+    values = rng.normal(size=3000) * np.where(labels == "c", 3, 1)
+    fig = pp.grid.Figure(pp.grid.Grid())
+
+    ridgeline = fig.main[0, 0] = density.Ridgeline.from_values(
+        values,
+        labels,
+        (-10, 10),
+        0.5,
+        overlap=2,
+        row_height=0.1,
+        colors={"a": "red", "b": "blue", "c": "green"},
+    )
+
+    assert list(ridgeline.collections) == [ridgeline.collection]
+    assert [label.get_text() for label in ridgeline.get_yticklabels()] == ["a", "b", "c"]
+    assert ridgeline.dim == (3.0, pytest.approx(0.4))
+    paths = ridgeline.collection.get_paths()
+    heights = [1 + i - path.vertices[:, 1].min() for i, path in enumerate(paths)]
+    # the highest ridge is 2 rows high, the wide group is lower
+    assert max(heights) == pytest.approx(2)
+    assert heights[2] < 0.5 * heights[0]
+    np.testing.assert_allclose(ridgeline.collection.get_facecolors()[0], [1, 0, 0, 1])
+
+    with pytest.raises(ValueError):
+        density.Ridgeline(np.zeros((2, 10)), np.arange(10), labels=["a"])
+    fig.close()
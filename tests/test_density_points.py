@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich import density
+
+
+def exact_point_density(points, boundaries, bandwidth):
+    xmin, xmax, ymin, ymax = boundaries
+
+    def kernel(values, low, high):
+        return sum(
+            np.exp(-0.5 * ((values[:, None] - reflected[None, :]) / bandwidth) ** 2)
+            for reflected in [values, 2 * low - values, 2 * high - values]
+        )
+
+    kernel_x = kernel(points[:, 0], xmin, xmax)
+    kernel_y = kernel(points[:, 1], ymin, ymax)
+    return (kernel_x * kernel_y).sum(1) / (len(points) * bandwidth**2 * 2 * np.pi)
+
+
+def test_point_density_matches_exact_kde():
+    points = np.random.default_rng(0).normal(size=(2000, 2))
+    boundaries = (-5, 5, -5, 5)
+
+    values, order = density.point_density(points, boundaries, 0.3, grid_size=200)
+
+    expected = exact_point_density(points, boundaries, 0.3)
+    np.testing.assert_allclose(values, expected, atol=1e-2 * expected.max())
+    assert np.all(np.diff(values[order]) >= 0)
+
+
+def test_point_density_defaults_and_missing_values():
+    points = np.random.default_rng(1).normal(size=(1000, 2)) * [1, 100]
+    points[0] = np.nan
+
+    values, order = density.point_density(points)
+
+    assert np.isnan(values[0])
+    assert np.all(values[1:] > 0)
+    # points without a density are drawn first, and the densest points last
+    assert order[0] == 0
+    assert values[order[-1]] == np.nanmax(values)
+
+
+def test_plot_point_density_is_one_rasterized_collection():
+    points = np.random.default_rng(2).normal(size=(500, 2))
+    fig = pp.grid.Figure(pp.grid.Grid())
+    ax = fig.main[0, 0] = pp.grid.Panel((1, 1))
+
+    collection = density.plot_point_density(ax, points)
+
+    assert list(ax.collections) == [collection]
+    assert collection.get_rasterized()
+    assert len(collection.get_offsets()) == len(points)
+    fig.close()
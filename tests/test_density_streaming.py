@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich import density
+from test_density_batched import data_with_missing
+
+
+def test_accumulated_chunks_match_full_data():
+    Z = data_with_missing(5)
+    weights = np.random.default_rng(5).random(len(Z))
+    chunks = [
+        (Z[start : start + 64], weights[start : start + 64]) for start in range(0, len(Z), 64)
+    ]
+
+    accumulator = density.accumulate_density(iter(chunks), (0, 1), 30)
+
+    densities, _, _ = accumulator.pairwise_kde_2d(0.1)
+    expected, _, _ = density.pairwise_kde_2d(Z, (0, 1), 0.1, 30, weights=weights)
+    np.testing.assert_allclose(densities, expected, atol=1e-10)
+
+    densities, _ = accumulator.marginal_kde_1d(0.1)
+    expected, _ = density.marginal_kde_1d(Z, (0, 1), 0.1, 30, weights=weights)
+    np.testing.assert_allclose(densities, expected, atol=1e-10)
+
+
+def test_accumulator_checks_chunks():
+    accumulator = density.DensityAccumulator((0, 1), 30)
+    with pytest.raises(ValueError):
+        accumulator.marginal_kde_1d(0.1)
+
+    accumulator.update(pd.DataFrame(np.full((10, 3), 0.5), columns=["a", "b", "c"]))
+    assert accumulator.labels == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        accumulator.update(np.zeros((10, 2)))
+
+
+def test_plot_corner_kde_from_chunks():
+    Z = data_with_missing(6)
+    chunks = (
+        pd.DataFrame(Z[start : start + 100], columns=list("abcd"))
+        for start in range(0, len(Z), 100)
+    )
+
+    fig = density.plot_corner_kde(chunks, (0, 1), 0.1, grid_size=30, method="binned")
+    fig.plot()
+
+    # the labels are taken from the columns of the chunks
+    assert sorted(ax.get_xlabel() + ax.get_ylabel() for ax in fig.axes)[-6:] == list("abbccd")
+    fig.close()
+    with pytest.raises(ValueError):
+        density.plot_corner_kde(
+            iter([Z]), (0, 1), 0.1, grid_size=30, method="binned", diag_kind="hist"
+        )
+
+
+@pytest.mark.parametrize("plot", ["plot_all_pairwise_kde", "plot_corner_kde"])
+def test_plot_labels_default_to_dataframe_columns(plot):
+    Z = pd.DataFrame(data_with_missing(7), columns=list("abcd"))
+
+    fig = getattr(density, plot)(Z, (0, 1), 0.1, grid_size=30, diag_kind="hist")
+    fig.plot()
+
+    labels = {ax.get_xlabel() for ax in fig.axes} | {ax.get_ylabel() for ax in fig.axes}
+    assert labels - {""} == set("abcd")
+    fig.close()
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich.grid import broken
+
+
+def make_breaking():
+    regions = pd.DataFrame({"start": [1000, 0, 5000], "end": [2000, 500, 5100]})
+    return broken.Breaking(regions, gap=0.1, resolution=100)
+
+
+def test_transform_broken_maps_regions_in_order():
+    breaking = make_breaking()
+    transform = broken.TransformBroken(breaking)
+
+    y = transform(np.array([1000, 1500, 2000, 0, 500, 5050, 700, -1, 6000]))
+
+    # gaps of 0.1 inch at 100 bp per inch
+    np.testing.assert_allclose(y[:6], [0, 500, 1000, 1010, 1510, 1570])
+    assert np.isnan(y[6:]).all()
+    assert list(breaking.regions.columns) == ["start", "end"]
+
+
+def test_transform_broken_inverse():
+    transform = broken.TransformBroken(make_breaking())
+    x = np.array([1000, 1700, 0, 400, 5100])
+
+    np.testing.assert_allclose(transform.inverse(transform(x)), x)
+    assert np.isnan(transform.inverse(np.array([1005, 1515, -5, 1700]))).all()
+
+
+
+def test_transform_broken_without_regions():
+    transform = broken.TransformBroken(broken.Breaking(pd.DataFrame({"start": [], "end": []})))
+
+    np.testing.assert_array_equal(transform.region_ix(np.array([0.0, 10.0])), [-1, -1])
+    assert np.isnan(transform(np.array([0.0, 10.0]))).all()
+    assert np.isnan(transform.inverse(np.array([0.0, 10.0]))).all()
+
+def test_broken_transform_for_artists():
+    transform = broken.TransformBroken(make_breaking()).transform()
+    points = np.array([[1500, 0.2], [250, 0.7]])
+
+    np.testing.assert_allclose(transform.transform(points), [[500, 0.2], [1260, 0.7]])
+    np.testing.assert_allclose(transform.inverted().transform(transform.transform(points)), points)
+
+
+def test_transform_broken_region_resolution():
+    regions = pd.DataFrame({"start": [0, 1000], "end": [100, 1100], "resolution": [100, 50]})
+    transform = broken.TransformBroken(broken.Breaking(regions, gap=0.1, resolution=100))
+
+    # the second region is shown at twice the resolution
+    np.testing.assert_allclose(transform(np.array([50, 1000, 1050])), [50, 110, 210])
+    np.testing.assert_allclose(transform.inverse(np.array([210])), [1050])
+
+
+def test_broken_panel_draws_regions_on_one_axes():
+    import polyptich as pp
+
+    starts = np.arange(1000) * 10000
+    breaking = broken.Breaking(pd.DataFrame({"start": starts, "end": starts + 500}), resolution=1e5)
+    fig = pp.Figure()
+    try:
+        panel = broken.BrokenPanel(breaking)
+        line = panel.clip(panel.plot([0, 25000], [0.5, 0.5], transform=panel.transBroken)[0])
+
+        assert panel.get_xlim() == (0, panel.transform_broken.cumends[-1])
+        assert len(panel.collections) == 2
+        assert line.get_clip_path() is not None
+    finally:
+        fig.close()
+
+
+def test_breaking_does_not_modify_regions():
+    import polyptich as pp
+
+    regions = pd.DataFrame({"start": [0, 1000], "end": [100, 1300], "resolution": [100, 150]})
+    breaking = broken.Breaking(regions, gap=0.1, resolution=100)
+
+    np.testing.assert_allclose(breaking.widths, [1.0, 2.0])
+    np.testing.assert_allclose(breaking.offsets, [0.0, 1.1])
+    assert breaking.width == pytest.approx(3.1)
+
+    fig = pp.Figure()
+    try:
+        broken.Broken(breaking)
+        broken.BrokenGrid(breaking)
+        broken.TransformBroken(breaking)
+    finally:
+        fig.close()
+    assert list(regions.columns) == ["start", "end", "resolution"]
+
+
+def test_breaking_merges_and_drops_regions():
+    regions = pd.DataFrame(
+        {
+            "start": [0, 110, 500, 2000, 5000],
+            "end": [100, 200, 600, 2001, 6000],
+            "name": list("abcde"),
+        }
+    )
+
+    breaking = broken.Breaking(regions, resolution=100, merge_distance=20, dpi=50)
+
+    assert list(breaking.regions["name"]) == ["a", "c", "e"]
+    assert list(breaking.regions["start"]) == [0, 500, 5000]
+    assert list(breaking.regions["end"]) == [200, 600, 6000]
+    assert len(regions) == 5
+
+
+
+def test_merge_regions_uses_the_furthest_end():
+    # the second region is contained in the first, the third is close to the end of the first
+    regions = pd.DataFrame({"start": [0, 100, 1010, 500], "end": [1000, 200, 1100, 600]})
+
+    merged = broken.merge_regions(regions, 20)
+
+    # the last region starts before the previous one, and is not merged
+    assert list(merged["start"]) == [0, 500]
+    assert list(merged["end"]) == [1100, 600]
+
+
+def test_breaking_arrays_follow_regions_modified_in_place():
+    regions = pd.DataFrame({"start": [0, 1000], "end": [100, 1300]})
+    breaking = broken.Breaking(regions, gap=0.1, resolution=100)
+    np.testing.assert_allclose(breaking.widths, [1.0, 3.0])
+
+    breaking.regions.loc[1, "end"] = 1100
+
+    np.testing.assert_allclose(breaking.widths, [1.0, 1.0])
+    np.testing.assert_allclose(breaking.offsets, [0.0, 1.1])
+
+def test_expanding_draws_one_collection():
+    import polyptich as pp
+
+    breaking1 = broken.Breaking(pd.DataFrame({"start": [0], "end": [10000]}), resolution=5000)
+    starts = np.arange(100) * 100
+    breaking2 = broken.Breaking(pd.DataFrame({"start": starts, "end": starts + 50}), resolution=2000)
+    fig = pp.Figure()
+    try:
+        expanding = broken.Expanding(breaking1, breaking2)
+
+        (collection,) = expanding.collections
+        assert len(collection.get_paths()) == 100
+        np.testing.assert_allclose(
+            collection.get_facecolors()[:2, 0], [0xD6 / 255, 0xE6 / 255], atol=1e-6
+        )
+    finally:
+        fig.close()
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich.grid import broken, features
+
+
+def test_feature_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    feature_starts = rng.integers(0, 10000, 300)
+    feature_ends = feature_starts + rng.integers(0, 2000, 300)
+    region_starts = rng.integers(0, 10000, 50)
+    region_ends = region_starts + rng.integers(0, 500, 50)
+
+    region_ix, feature_ix = features.FeatureIndex(feature_starts, feature_ends).overlaps(
+        region_starts, region_ends
+    )
+
+    expected = np.argwhere(
+        (feature_starts[None, :] <= region_ends[:, None])
+        & (feature_ends[None, :] >= region_starts[:, None])
+    )
+    assert sorted(zip(region_ix, feature_ix)) == sorted(map(tuple, expected))
+
+
+def test_feature_index_with_a_long_feature_has_few_candidates():
+    rng = np.random.default_rng(3)
+    # a gene spanning the whole locus, followed by many short features
+    feature_starts = np.concatenate([[0], np.sort(rng.integers(0, 1000000, 20000))])
+    feature_ends = feature_starts + np.concatenate([[1000000], rng.integers(0, 100, 20000)])
+    region_starts = rng.integers(0, 1000000, 2000)
+    region_ends = region_starts + 500
+
+    index = features.FeatureIndex(feature_starts, feature_ends)
+    region_ix, feature_ix = index.overlaps(region_starts, region_ends)
+
+    expected = [
+        (i, j)
+        for i in range(len(region_starts))
+        for j in np.flatnonzero(
+            (feature_starts <= region_ends[i]) & (feature_ends >= region_starts[i])
+        )
+    ]
+    assert list(zip(region_ix, feature_ix)) == expected
+    # the long feature does not make regions scan all features that start after it
+    candidate_region_ix, _ = index._candidates(region_starts, region_ends)
+    assert len(candidate_region_ix) < 2 * len(region_ix)
+
+
+def test_pack_rows_does_not_overlap():
+    rng = np.random.default_rng(1)
+    starts = rng.uniform(0, 100, 200)
+    ends = starts + rng.uniform(0, 10, 200)
+
+    rows = features.pack_rows(starts, ends, spacing=1.0)
+
+    for row in np.unique(rows):
+        order = np.argsort(starts[rows == row])
+        assert (starts[rows == row][order][1:] >= ends[rows == row][order][:-1] + 1.0).all()
+    # as many rows as the maximal number of overlapping intervals
+    depth = max(((starts <= x) & (ends + 1.0 > x)).sum() for x in starts)
+    assert rows.max() + 1 == depth
+
+
+def test_feature_track_clips_features_to_regions():
+    import polyptich as pp
+
+    breaking = broken.Breaking(
+        pd.DataFrame({"start": [0, 1000], "end": [100, 1100]}), gap=0.1, resolution=100
+    )
+    genes = pd.DataFrame({"start": [50, 60, 500, 1050], "end": [1020, 80, 600, 1200]})
+    fig = pp.Figure()
+    try:
+        track = features.FeatureTrack(breaking, genes)
+
+        pieces = track.pieces.sort_values(["region_ix", "feature_ix"])
+        assert list(pieces["feature_ix"]) == [0, 1, 0, 3]
+        np.testing.assert_allclose(pieces["x0"], [50, 60, 110, 160])
+        np.testing.assert_allclose(pieces["x1"], [100, 80, 130, 210])
+        assert track.get_ylim() == (2, 0)
+    finally:
+        fig.close()
@@ -0,0 +1,87 @@
+import io
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich.grid import scatter
+
+
+def test_aggregate_pixels_matches_histogram():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 1, (2, 10000))
+    values = rng.normal(size=10000)
+    x[0] = np.nan
+
+    counts = scatter.aggregate_pixels(x, y, (0, 1), (0, 1), (20, 30))
+    expected, _, _ = np.histogram2d(y, x, bins=[20, 30], range=[(0, 1), (0, 1)])
+    np.testing.assert_array_equal(counts, expected)
+
+    sums = scatter.aggregate_pixels(x, y, (0, 1), (0, 1), (20, 30), values, "mean")
+    expected_sums, _, _ = np.histogram2d(
+        y, x, bins=[20, 30], range=[(0, 1), (0, 1)], weights=values
+    )
+    np.testing.assert_allclose(sums[..., 0], expected_sums)
+    np.testing.assert_array_equal(sums[..., 1], expected)
+
+    codes = (x > 0.5).astype(np.intp)
+    modes = scatter.aggregate_pixels(x, y, (0, 1), (0, 1), (20, 30), codes, "mode", 2)
+    np.testing.assert_array_equal(modes.sum(-1), expected)
+    assert (modes[:, :15, 1] == 0).all() and (modes[:, 15:, 0] == 0).all()
+
+
+def test_spreading_only_sparse_images():
+    sparse = np.zeros((50, 50), dtype=bool)
+    sparse[5::10, 5::10] = True
+    dense = np.random.default_rng(1).uniform(size=(50, 50)) > 0.5
+
+    assert scatter.spread_radius(sparse, max_spread=3) == 3
+    assert scatter.spread_radius(sparse, max_spread=5) == 4
+    assert scatter.spread_radius(dense) == 0
+
+    spread = scatter._box_sum(sparse.astype(float), 1)
+    assert spread.sum() == 9 * sparse.sum()
+
+
+def test_image_is_rebinned_at_the_output_dpi():
+    rng = np.random.default_rng(2)
+    x, y = rng.normal(size=(2, 100000))
+    fig = pp.grid.Figure(pp.grid.Grid())
+    panel = fig.main[0, 0] = pp.grid.AggregatedScatter(x, y, dim=(2, 1.5), max_spread=0)
+
+    for dpi in [50, 120]:
+        fig.savefig(io.BytesIO(), dpi=dpi)
+        image = panel.image.get_array()
+        assert image.shape == (round(1.5 * dpi), 2 * dpi, 4)
+        # all points are within the default limits
+        assert panel.aggregate(image.shape[:2]).sum() == len(x)
+
+    assert list(panel.images) == [panel.image]
+    assert not list(panel.collections)
+
+
+def test_mean_and_mode_colors():
+    x = np.array([0.1, 0.1, 0.9, 0.9, 0.9])
+    y = np.array([0.5, 0.5, 0.5, 0.5, 0.5])
+    fig = pp.grid.Figure(pp.grid.Grid())
+    mean = fig.main[0, 0] = pp.grid.AggregatedScatter(
+        x, y, [0.0, 2.0, 2.0, 2.0, np.nan], aggregation="mean", cmap="viridis", max_spread=0
+    )
+    mode = fig.main[0, 1] = pp.grid.AggregatedScatter(
+        x, y, ["a", "b", "b", "b", "a"], aggregation="mode", colors={"a": "red", "b": "blue"}
+    )
+
+    # means of 1 and 2, normalized to the range of the values
+    rgba = mean._render((1, 2), (0, 1), (0, 1))
+    expected = pp.colormaps.to_rgba(np.array([[1.0, 2.0]]), "viridis", mean.norm)
+    np.testing.assert_array_equal(rgba, expected)
+
+    rgba = mode._render((1, 3), (0, 1), (0, 1))
+    assert tuple(rgba[0, 2]) == (0, 0, 255, 255)
+    assert rgba[0, 1, 3] == 0
+
+    with pytest.raises(ValueError):
+        pp.grid.AggregatedScatter(x, y, aggregation="mean")
+    fig.close()
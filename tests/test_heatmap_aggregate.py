@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("scipy")
+
+from polyptich.heatmap import aggregate, layouts
+
+
+def make_data():
+    rng = np.random.default_rng(0)
+    index = [f"cell{i}" for i in range(200)]
+    values = rng.poisson(0.5, size=(200, 6)).astype(float)
+    data = pd.DataFrame(values, index=index, columns=[f"gene{i}" for i in range(6)])
+    split = pd.Series(rng.choice(["b", "a", "c"], 200), index=index, name="celltype")
+    split = split.astype(pd.CategoricalDtype(["c", "b", "a", "d"]))
+    return data, split
+
+
+def assert_frame_equal(result, expected):
+    # groupby returns a CategoricalIndex, aggregate a plain index of the observed groups
+    expected.index = pd.Index(list(expected.index), name=expected.index.name)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_aggregate_matches_groupby(sparse):
+    data, split = make_data()
+    grouped = data.groupby(split, observed=True)
+    source = data.astype(pd.SparseDtype(float, 0.0)) if sparse else data
+
+    results = aggregate(source, split, ["mean", "sum", "fraction", "var"], chunk_size=50)
+
+    assert_frame_equal(results["mean"], grouped.mean())
+    assert_frame_equal(results["sum"], grouped.sum())
+    assert_frame_equal(
+        results["fraction"], (data != 0).astype(float).groupby(split, observed=True).mean()
+    )
+    assert_frame_equal(results["var"], grouped.var(ddof=0))
+
+
+def test_aggregate_ignores_missing_groups():
+    data, split = make_data()
+    split.iloc[:10] = np.nan
+
+    result = aggregate(data, split, "count")
+
+    expected = (data.iloc[10:] != 0).groupby(split.iloc[10:], observed=True).sum()
+    assert_frame_equal(result, expected.astype(float))
+
+
+def test_aggregate_rejects_unknown_statistic():
+    data, split = make_data()
+
+    with pytest.raises(ValueError):
+        aggregate(data, split, "median")
+
+
+def test_broken_aggregated_layout_aligns_with_aggregate():
+    data, split = make_data()
+    layout = layouts.Broken(split, padding=0.1)
+
+    result = aggregate(data, split)
+    partition = layout.aggregated().partition(result)
+
+    assert partition.names == list(result.index) == ["c", "b", "a"]
+    assert [list(positions) for positions in partition.positions] == [[0], [1], [2]]
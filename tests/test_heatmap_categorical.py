@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich.heatmap import categorical
+
+
+def make_data():
+    return pd.DataFrame(
+        {"x": ["a", "b", None, "c"], "y": ["c", "c", "a", "b"], "z": ["b", "a", "a", "a"]}
+    )
+
+
+def test_encode_uses_small_codes():
+    codes, categories = categorical.encode(make_data())
+
+    assert codes.dtype == np.int8
+    assert list(categories) == ["a", "b", "c"]
+    np.testing.assert_array_equal(codes[:, 0], [0, 1, -1, 2])
+    assert categorical.code_dtype(200) == np.int16
+
+
+def test_encode_categorical_columns_and_given_categories():
+    data = make_data().astype(pd.CategoricalDtype(["c", "b", "a"]))
+
+    codes, categories = categorical.encode(data)
+    assert list(categories) == ["c", "b", "a"]
+    np.testing.assert_array_equal(codes[:, 1], [0, 0, 2, 1])
+
+    codes, categories = categorical.encode(data, ["a", "b"])
+    np.testing.assert_array_equal(codes[:, 1], [-1, -1, 0, 1])
+
+
+def test_codes_to_rgba_matches_boundary_norm():
+    colors = categorical.category_colors(["a", "b", "c"])
+    cmap, norm = categorical.categorical_cmap(colors.values)
+    codes = np.array([[0, 1], [2, -1]], dtype=np.int8)
+
+    np.testing.assert_array_equal(
+        categorical.codes_to_rgba(codes, cmap), cmap(norm(codes), bytes=True)
+    )
+
+
+def test_categorical_heatmap_and_legend():
+    fig = pp.Figure()
+    try:
+        colors = {"a": "red", "b": "blue", "c": "green"}
+        heatmap = pp.heatmap.Heatmap(make_data(), categorical=True, colors=colors)
+        legend = heatmap.legend(title="cluster")
+
+        assert heatmap.codes.dtype == np.int8
+        assert [text.get_text() for text in legend.get_legend().get_texts()] == ["a", "b", "c"]
+        # heatmap rows are the columns of the data
+        image = heatmap[0, 0].get_images()[0].get_array()
+        np.testing.assert_array_equal(image[0, 0], [255, 0, 0, 255])
+        np.testing.assert_array_equal(image[0, 2], [255, 255, 255, 255])
+    finally:
+        fig.close()
+
+
+def test_categorical_heatmap_with_a_list_of_colors():
+    fig = pp.Figure()
+    try:
+        heatmap = pp.heatmap.Heatmap(
+            make_data(), categorical=True, colors=["red", "blue", "green"]
+        )
+
+        # colors follow the sorted categories
+        assert heatmap.colors.to_dict() == {"a": "red", "b": "blue", "c": "green"}
+        image = heatmap[0, 0].get_images()[0].get_array()
+        np.testing.assert_array_equal(image[0, 0], [255, 0, 0, 255])
+    finally:
+        fig.close()
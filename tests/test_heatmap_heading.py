@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+mpl = pytest.importorskip("matplotlib")
+
+import polyptich as pp
+
+
+@pytest.mark.parametrize(
+    "cls", [pp.heatmap.heading.HeadingTop, pp.heatmap.annotation.AnnotationTop]
+)
+def test_single_axes_heading_draws_one_collection_and_culls_labels(cls):
+    split = pd.Series(np.repeat(["wide", "x"], [90, 10])).astype("category")
+    info = pd.DataFrame(
+        {"label": ["wide group", "a label that is too long"], "color": ["red", "blue"]},
+        index=["wide", "x"],
+    )
+    layout = pp.heatmap.layouts.Broken(split, size=5)
+    fig = pp.Figure()
+
+    heading = cls(split.to_frame(), layout, info=info, single_axes=True)
+
+    ax = heading[0, 0]
+    assert heading.nrow == 1 and heading.ncol == 1
+    assert ax.dim[0] == pytest.approx(layout.partition(split).size)
+    assert len(ax.collections) == 1
+    assert [text.get_text() for text in ax.texts] == ["wide group"]
+    fig.close()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich.heatmap.labels import contrasting_colors, format_values
+
+
+def test_contrasting_colors():
+    rgba = np.array([[0, 0, 0, 255], [255, 255, 255, 255], [255, 255, 0, 255], [0, 0, 128, 255]])
+
+    colors = contrasting_colors(rgba.astype(np.uint8))
+
+    np.testing.assert_array_equal(colors[:, 0], [1.0, 0.0, 0.0, 1.0])
+    np.testing.assert_array_equal(colors, contrasting_colors(rgba / 255))
+
+
+def test_format_values_shares_labels():
+    labels, ix = format_values(np.array([[0.101, 0.102], [0.2, np.inf]]), ".1f")
+
+    assert list(labels[ix].ravel()) == ["0.1", "0.1", "0.2", "inf"]
+    assert len(labels) == 3
+
+
+@pytest.mark.parametrize("resolution, n_labels", [(0.3, 11), (0.02, 0)])
+def test_heatmap_cell_labels_are_culled(resolution, n_labels):
+    data = pd.DataFrame(np.arange(12.0).reshape(4, 3) / 7)
+    data.iloc[0, 0] = np.nan
+    fig = pp.Figure()
+    try:
+        heatmap = pp.heatmap.Heatmap(
+            data,
+            col_layout=pp.heatmap.layouts.Simple(resolution=resolution),
+            row_layout=pp.heatmap.layouts.Simple(resolution=0.2),
+            cell_labels=".2f",
+        )
+        collections = heatmap[0, 0].collections
+        # the NaN cell never gets a label
+        assert sum(len(collection.get_offsets()) for collection in collections) == n_labels
+    finally:
+        fig.close()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich.heatmap import layouts
+
+
+def make_split():
+    split = pd.Series(["b", "a", "b", "c", "a"], index=[f"x{i}" for i in range(5)])
+    return split.astype(pd.CategoricalDtype(["a", "b", "c", "d"]))
+
+
+def test_broken_partition_matches_groupby():
+    split = make_split()
+    data = pd.DataFrame({"value": np.arange(5)}, index=split.index)
+    layout = layouts.Broken(split, padding=0.1)
+
+    partition = layout.partition(data)
+
+    assert partition.names == ["a", "b", "c"]
+    assert [list(pos) for pos in partition.positions] == [[1, 4], [0, 2], [3]]
+    np.testing.assert_allclose(partition.sizes, [2.0, 2.0, 1.0])
+    np.testing.assert_allclose(partition.offsets, [0.0, 2.1, 4.2])
+    for (_, name, df, _), (group, expected) in zip(
+        layout.iter(data), data.groupby(split, observed=True)
+    ):
+        assert name == group
+        assert df.equals(expected)
+
+
+def test_broken_partition_is_cached_and_invalidated():
+    split = make_split()
+    data = pd.DataFrame({"value": np.arange(5)}, index=split.index)
+    layout = layouts.Broken(split)
+
+    partition = layout.partition(data)
+    assert layout.partition(data) is partition
+    assert layout.partition(data.index) is partition
+
+    layout.split = split.cat.reorder_categories(["d", "c", "b", "a"])
+    assert layout.partition(data).names == ["c", "b", "a"]
+
+
+def test_broken_partition_rejects_mismatched_index():
+    layout = layouts.Broken(make_split())
+
+    with pytest.raises(AssertionError):
+        layout.partition(pd.Index(list("abcde")))
+
+
+def test_clustered_orders_by_linkage_and_caches():
+    scipy = pytest.importorskip("scipy.cluster.hierarchy")
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(size=(30, 4)))
+
+    partition = layouts.Clustered(data).partition(data)
+    Z = partition.linkages[0]
+
+    np.testing.assert_array_equal(partition.positions[0], scipy.leaves_list(Z))
+    assert layouts.Clustered(data.copy()).partition(data).linkages[0] is Z
+
+
+def test_broken_clustered_orders_within_groups():
+    pytest.importorskip("scipy")
+    rng = np.random.default_rng(0)
+    split = pd.Series(rng.choice(["a", "b", "c"], 50)).astype("category")
+    data = pd.DataFrame(rng.normal(size=(50, 3)))
+
+    partition = layouts.BrokenClustered(data, split, n_jobs=2).partition(data)
+
+    assert partition.names == ["a", "b", "c"]
+    for name, positions, _ in partition:
+        assert sorted(positions) == list(np.flatnonzero(split == name))
+
+
+
+def test_broken_clustered_does_not_cache_failed_clustering(monkeypatch):
+    pytest.importorskip("scipy")
+    rng = np.random.default_rng(1)
+    split = pd.Series(rng.choice(["a", "b"], 20)).astype("category")
+    data = pd.DataFrame(rng.normal(size=(20, 3)))
+    layout = layouts.BrokenClustered(data, split, n_jobs=1)
+    cluster = layouts._cluster
+
+    def failing_cluster(*args):
+        raise RuntimeError("clustering failed")
+
+    monkeypatch.setattr(layouts, "_cluster", failing_cluster)
+    with pytest.raises(RuntimeError):
+        layout.partition(data)
+    monkeypatch.setattr(layouts, "_cluster", cluster)
+
+    partition = layout.partition(data)
+    expected = layouts.BrokenClustered(data, split, n_jobs=1).partition(data)
+    assert len(partition.linkages) == 2
+    for (_, positions, _), (_, expected_positions, _) in zip(partition, expected):
+        np.testing.assert_array_equal(positions, expected_positions)
+
+def test_clustered_approximate_ordering():
+    data = pd.DataFrame(np.linspace(0, 1, 20)[[5, 3, 19, 0, 10]][:, None] * [1, 2])
+
+    partition = layouts.Clustered(data, approximate=True).partition(data)
+
+    assert partition.linkages == [None]
+    assert list(partition.positions[0]) in ([3, 1, 0, 4, 2], [2, 4, 0, 1, 3])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from polyptich.heatmap import heatmap
+from polyptich.heatmap.norm import QuantileSketch, quantile_norm
+
+
+def test_sketch_quantiles_have_bounded_relative_error():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.lognormal(size=50000), -rng.lognormal(size=10000), np.zeros(100)])
+
+    sketch = QuantileSketch.from_data(values.reshape(-1, 10), chunk_size=1000)
+
+    qs = [0.01, 0.1, 0.5, 0.9, 0.99]
+    np.testing.assert_allclose(sketch.quantile(qs), np.quantile(values, qs), rtol=0.02)
+    assert sketch.quantile(0.0) == values.min()
+    assert sketch.quantile(1.0) == values.max()
+
+
+def test_sketches_merge_and_ignore_nan():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(size=1000), rng.normal(size=1000) + 5
+    b[:10] = np.nan
+
+    merged = QuantileSketch().update(a).merge(QuantileSketch().update(b))
+    full = QuantileSketch().update(np.concatenate([a, b]))
+
+    assert merged.count == 1990
+    np.testing.assert_allclose(merged.quantile([0.1, 0.5, 0.9]), full.quantile([0.1, 0.5, 0.9]))
+
+
+def test_quantile_norm_sparse_and_centered():
+    sparse = pytest.importorskip("scipy.sparse")
+    matrix = sparse.random(200, 100, density=0.05, format="csr", random_state=0) - 0.5 * sparse.random(
+        200, 100, density=0.05, format="csr", random_state=1
+    )
+
+    norm = quantile_norm(matrix, 0.0, 0.999)
+    centered = quantile_norm(matrix, center=0.0)
+
+    assert norm.vmin == pytest.approx(matrix.toarray().min())
+    assert norm.vmax == pytest.approx(np.quantile(matrix.toarray(), 0.999), rel=0.02)
+    assert centered.vcenter == 0.0
+    assert centered.vmin == -centered.vmax
+
+
+def test_heatmap_default_norm_is_min_max_without_sketch(monkeypatch):
+    def no_sketch(data):
+        raise AssertionError("the default norm should not build a sketch")
+
+    monkeypatch.setattr(QuantileSketch, "from_data", no_sketch)
+    data = pd.DataFrame([[1.0, np.nan], [-3.0, 7.0]])
+
+    norm = heatmap._get_norm(None, data)
+
+    assert (norm.vmin, norm.vmax) == (-3.0, 7.0)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import polyptich as pp
+from polyptich.heatmap.ticks import select_ticks
+
+
+def test_select_ticks_keeps_all_labels_that_fit():
+    candidates = np.arange(10)
+
+    selected = select_ticks(10, candidates, np.zeros(10), np.full(10, 10.0), length=200)
+
+    np.testing.assert_array_equal(selected, candidates)
+
+
+def test_select_ticks_prefers_high_priority_without_overlap():
+    priority = np.zeros(100)
+    priority[41] = 1
+
+    selected = select_ticks(100, np.arange(100), priority, np.full(100, 10.0), length=100)
+
+    assert 41 in selected
+    assert np.all(np.diff(selected) >= 11)
+
+
+def test_ticks_thin_labels_and_color_selected_rows():
+    n = 1000
+    var = pd.DataFrame(
+        {"color": np.where(np.arange(n) % 2 == 0, "red", "blue")},
+        index=[f"gene_{i}" for i in range(n)],
+    )
+    fig = pp.Figure()
+    ticks = pp.heatmap.ticks.TicksLeft(var, pp.heatmap.layouts.Simple(size=2))
+
+    labels = ticks[0, 0].get_yticklabels()
+
+    assert 0 < len(labels) < 20
+    for label in labels:
+        i = int(label.get_text().split("_")[1])
+        assert label.get_color() == ("red" if i % 2 == 0 else "blue")
+    fig.close()
+
+
+def test_rotation_only_applies_to_labels_along_x():
+    var = pd.DataFrame(index=[f"gene_{i}" for i in range(5)])
+    fig = pp.Figure()
+    left = pp.heatmap.ticks.TicksLeft(var, rotation=45)
+    top = pp.heatmap.ticks.TicksTop(var, rotation=45)
+
+    assert {label.get_rotation() for label in left[0, 0].get_yticklabels()} == {0}
+    assert {label.get_rotation() for label in top[0, 0].get_xticklabels()} == {45}
+    fig.close()
@@ -0,0 +1,97 @@
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from test_www_endpoints import load_create_app
+
+
+def load_tiles_module():
+    pytest.importorskip("flask")
+    pytest.importorskip("matplotlib")
+    root = Path(__file__).parents[1]
+    package = types.ModuleType("polyptich")
+    package.__path__ = [str(root / "src" / "polyptich")]
+    www_package = types.ModuleType("polyptich.www")
+    www_package.__path__ = [str(root / "src" / "polyptich" / "www")]
+    sys.modules.setdefault("polyptich", package)
+    sys.modules.setdefault("polyptich.www", www_package)
+
+    path = root / "src" / "polyptich" / "www" / "tiles.py"
+    spec = importlib.util.spec_from_file_location("polyptich.www.tiles", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["polyptich.www.tiles"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_tile_pyramid_levels_are_downsampled_means(tmp_path):
+    tiles = load_tiles_module()
+    values = np.arange(300 * 130, dtype=float).reshape(300, 130)
+    values[:4, :4] = np.nan
+    values[0, 0] = 1.0
+
+    heatmap = tiles.TileHeatmap(tmp_path / "www" / "heatmap", values, tile_size=64)
+
+    manifest = heatmap.manifest
+    assert manifest["max_level"] == 3
+    assert [level["shape"] for level in manifest["levels"]] == [[38, 17], [75, 33], [150, 65], [300, 130]]
+    assert not list((tmp_path / "www" / "heatmap" / "levels").glob("*.values.npy"))
+
+    level = np.load(tmp_path / "www" / "heatmap" / "levels" / "2.npy")
+    expected = np.nanmean(values[:100, :64].reshape(50, 2, 32, 2), (1, 3))
+    import matplotlib as mpl
+    from polyptich.colormaps import quantize
+
+    norm = mpl.colors.Normalize(np.nanmin(values), np.nanmax(values))
+    np.testing.assert_array_equal(level[:50, :32], quantize(expected, "viridis", norm))
+    assert level[1, 1] == 256 + 2  # all-NaN block uses the bad color
+
+
+def test_tile_endpoint_serves_tiles_and_labels(tmp_path):
+    tiles = load_tiles_module()
+    values = np.random.default_rng(0).normal(size=(100, 40))
+    heatmap = tiles.TileHeatmap(
+        tmp_path / "www" / "heatmap",
+        values,
+        row_labels=[f"cell {i}" for i in range(100)],
+        col_labels=[f"gene {i}" for i in range(40)],
+        row_order=np.arange(100)[::-1],
+        tile_size=32,
+    )
+    heatmap.write_tiles(processes=1)
+
+    client = load_create_app()(tmp_path).test_client()
+    page = client.get("/endpoint/heatmap/")
+    tile = client.get("/endpoint/heatmap/tiles/2/3/1.png")
+    labels = client.get("/endpoint/heatmap/labels/rows?start=2&stop=4").get_json()
+
+    assert b"polyptich-tiles-config" in page.data
+    assert tile.status_code == 200
+    assert tile.data[:8] == b"\x89PNG\r\n\x1a\n"
+    assert client.get("/endpoint/heatmap/tiles/2/9/9.png").status_code == 404
+    assert labels == {"start": 2, "labels": ["cell 97", "cell 96"], "total": 100}
+
+
+def test_existing_directories_are_only_replaced_if_they_hold_tiles(tmp_path):
+    tiles = load_tiles_module()
+    values = np.random.default_rng(1).normal(size=(20, 10))
+    unrelated = tmp_path / "www" / "results"
+    unrelated.mkdir(parents=True)
+    (unrelated / "keep.txt").write_text("keep me")
+
+    with pytest.raises(FileExistsError):
+        tiles.TileHeatmap(unrelated, values)
+    with pytest.raises(FileExistsError):
+        tiles.TileHeatmap(unrelated, values, overwrite=True)
+    assert (unrelated / "keep.txt").exists()
+
+    path = tmp_path / "www" / "heatmap"
+    tiles.TileHeatmap(path, values, title="First")
+    with pytest.raises(FileExistsError):
+        tiles.TileHeatmap(path, values, title="Second")
+    heatmap = tiles.TileHeatmap(path, values, title="Second", overwrite=True)
+    assert heatmap.manifest["title"] == "Second"